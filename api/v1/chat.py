@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from api.v1.models import ChatMCPRequest
 from services.llm_manager import dashscope_mcp_stream, create_assistant,dashscope_chat_json
+from services.llm_client import dashscope_chat_json_async
+from services.llm_cache import require_keys
 from api.v1.dependencies import get_current_user
 # 创建路由器实例
 router = APIRouter(tags=["聊天"])
@@ -194,6 +196,7 @@ async def chat_make_json(chat: ChatMCPRequest, request: Request, current_user: d
 
 
 
-    # 调用同步方法获取JSON响应
-  return dashscope_chat_json(system_prompt, chat.question)
+    # 获取JSON响应，相同问题直接使用缓存（只缓存包含接口名和响应字段的配置）
+  return await dashscope_chat_json_async(system_prompt, chat.question, cache="mcp_config",
+                                         cache_valid=require_keys("api_name", "response"))
 
@@ -3,6 +3,7 @@
 from fastapi import Depends, HTTPException, status # 导入FastAPI的依赖注入和异常处理模块
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # 导入HTTP Bearer认证模块
 from services.supabase_manager import SupabaseManager # 导入Supabase管理器
+from services.token_cache import verify_token_cached # 导入带缓存的token验证
 
 # 创建HTTPBearer实例，用于从请求头中提取Token
 security = HTTPBearer()
@@ -23,7 +24,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     """
     supabase = get_supabase_manager() # 获取SupabaseManager实例
     token = credentials.credentials # 提取token
-    is_valid, user_info = supabase.verify_token(token) # 验证token
+    is_valid, user_info = await verify_token_cached(supabase, token) # 验证token（优先使用缓存）
 
     if not is_valid:
         # 如果token无效，抛出401异常
@@ -8,6 +8,9 @@ from api.v1.dependencies import get_current_user,get_supabase_manager # 导入
 from api.v1.models import QuestionRequest # 导入请求模型
 from services.llm_manager import dashscope_chat_stream # 导入LLM服务
 from services.supabase_manager import SupabaseManager # 导入Supabase管理器
+from services.neo4j_driver import pool_stats # 导入Neo4j连接池统计
+from services.token_cache import token_cache_stats # 导入token缓存统计
+from services.llm_cache import llm_cache_stats # 导入大模型响应缓存统计
 from dotenv import load_dotenv
 from pydantic import BaseModel
 # 创建路由器实例
@@ -26,6 +29,24 @@ async def health_check():
     except Exception as e:
         return f"Service error: {str(e)}" # 返回服务错误
 
+# Neo4j连接池统计接口
+@router.get("/neo4j/stats")
+async def neo4j_stats():
+    """获取Neo4j共享驱动的连接池使用情况"""
+    return pool_stats()
+
+# token验证缓存统计接口
+@router.get("/auth/token-cache/stats")
+async def token_cache_stats_view():
+    """获取token验证缓存的命中情况"""
+    return token_cache_stats()
+
+# 大模型响应缓存统计接口
+@router.get("/llm/cache/stats")
+async def llm_cache_stats_view():
+    """获取大模型响应缓存各调用位置的命中率"""
+    return llm_cache_stats()
+
 # 聊天流式接口
 @router.post("/chat/health")
 async def chat_check(chat: QuestionRequest, request: Request, current_user: dict = Depends(get_current_user)): # 添加认证依赖
@@ -1,4 +1,5 @@
 import copy  # 导入 copy 模块，用于深度复制对象
+import asyncio  # 导入异步IO模块，用于并行请求
 from fastapi import APIRouter, HTTPException, Request, Depends
 from dashscope import Application
 from dashscope import Generation
@@ -8,7 +9,9 @@ import os
 from datetime import datetime
 from api.v1.models import ChatIntentRequest
 from api.v1.dependencies import get_current_user
-from services.llm_manager import dashscope_chat_block, dashscope_chat_stream, dashscope_chat_tool, dashscope_chat_intent
+from services.llm_manager import dashscope_chat_stream
+from services.llm_client import dashscope_chat_block_async, dashscope_chat_tool_async, dashscope_chat_intent_async
+from services.intent_classifier import predict_intent_async
 from services.R import log
 from services.supabase_manager import SupabaseManager
 
@@ -134,11 +137,47 @@ def search_intent_by_keywords(question: str) -> str:
     return best_intent
 
 
+def _speculate(coro) -> asyncio.Task:
+    """
+    提前启动一个可能用到的大模型请求（推测执行），与意图分类同时进行
+    """
+    return asyncio.create_task(coro)
+
+
+def _discard(task: asyncio.Task):
+    """
+    丢弃未用到的推测执行结果
+    """
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()  # 已失败的推测请求不再抛出，避免"异常未被获取"的警告
+
+
+async def _extract_with_memory(question: str, memory: dict, intent: str, tool: dict) -> tuple:
+    """
+    结合memory中的上次对话提取工具参数
+
+    Returns:
+        tuple: (合并后的问题, 工具调用结果)
+    """
+    new_question = await get_tool_call(question, memory, intent)
+    response = await dashscope_chat_tool_async(tool, new_question)
+    return new_question, response
+
+
 @router.post("/chat/intent")
 async def chat_intent(chat: ChatIntentRequest, current_user: dict = Depends(get_current_user)):
     """
     聊天意图识别
+
+    意图分类与按关键词预测的意图提取工具参数同时进行：分类结果与原有顺序流程
+    需要的工具调用一致时使用提前得到的参数，否则丢弃。
     """
+    # 关键词匹配只依赖问题本身，先算出来用于预测意图
+    keyword_intent = search_intent_by_keywords(chat.question)
 
     # 是否有memory
     if chat.memory:
@@ -148,42 +187,46 @@ async def chat_intent(chat: ChatIntentRequest, current_user: dict = Depends(get_
         flag = memory.get("flag")
 
         if intent and flag == "[callback]":  # 有memory的方法
-            comfirm = search_intent_by_keywords(chat.question)
+            comfirm = keyword_intent
             if comfirm == None or comfirm == intent:
                 other_list = ["其他","修改"]
                 reject_list = ["否定", "拒绝"]
-                comfirm = dashscope_chat_intent(
-                reject_list+other_list, chat.question)
-                if comfirm in reject_list:
-                    memory["hint"] = get_talk("好！我聊天点别的吧")
-                    memory["flag"] = "[reject]"
-                    return memory
-                else:
-                    val = tools.get(intent)
-                    tool = val.get("tool")
-                    #  取memory的tool 新question补充memory的question
-                    new_question = get_tool_call(chat.question, memory, intent)
-                    response = dashscope_chat_tool(
-                        tool, new_question)
-                    # 判断是否有tool调用
-                    if response:  # 识别到工具调用
-                        if "name" in response and "arguments" in response:  # 识别到具调用的参数工
-                            if not are_objects_equal(memory["answer"], response):
-                                memory["answer"] = merge_objects(memory["answer"], response)  # 覆盖答案
-                                memory["question"] = new_question
-                                properties = analyze_tool_arguments(
-                                    memory["answer"], tool)
-                                memory["hint"] =  get_hint(
-                                    tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
-                                if properties["all_required_filled"]:
-                                    memory["flag"] = "[comfirm]"
-                                else:  # 有参数缺失或为空
+                val = tools.get(intent)
+                # 未被拒绝时都要提取工具参数，与意图分类同时进行
+                speculative = _speculate(_extract_with_memory(chat.question, memory, intent, val.get("tool"))) if val else None
+                try:
+                    comfirm = await dashscope_chat_intent_async(
+                    reject_list+other_list, chat.question)
+                    if comfirm in reject_list:
+                        memory["hint"] = await get_talk("好！我聊天点别的吧")
+                        memory["flag"] = "[reject]"
+                        return memory
+                    else:
+                        val = tools.get(intent)
+                        tool = val.get("tool")
+                        #  取memory的tool 新question补充memory的question
+                        new_question, response = await speculative
+                        # 判断是否有tool调用
+                        if response:  # 识别到工具调用
+                            if "name" in response and "arguments" in response:  # 识别到具调用的参数工
+                                if not are_objects_equal(memory["answer"], response):
+                                    memory["answer"] = merge_objects(memory["answer"], response)  # 覆盖答案
+                                    memory["question"] = new_question
+                                    properties = analyze_tool_arguments(
+                                        memory["answer"], tool)
+                                    memory["hint"] =  await get_hint(
+                                        tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
+                                    if properties["all_required_filled"]:
+                                        memory["flag"] = "[comfirm]"
+                                    else:  # 有参数缺失或为空
+                                        memory["flag"] = "[callback]"
+                                    return memory
+                                else:
+                                    memory["answer"] = await get_talk("您是否还有要修改信息？可发送过来")
                                     memory["flag"] = "[callback]"
-                                return memory
-                            else:
-                                memory["answer"] = get_talk("您是否还有要修改信息？可发送过来")
-                                memory["flag"] = "[callback]"
-                                return memory
+                                    return memory
+                finally:
+                    _discard(speculative)
                             
         # 有memory，但是没有命中关键词，返回兜底意图
         if intent and flag == "[doubt]":
@@ -192,28 +235,32 @@ async def chat_intent(chat: ChatIntentRequest, current_user: dict = Depends(get_
             other_list = ["其他","修改"]
             reject_list = ["否定", "拒绝"]
             intent_list = ["确认",  "肯定"]
-            comfirm = dashscope_chat_intent(
-                reject_list+intent_list+other_list, chat.question)
-            if comfirm in intent_list:
-                #  取memory的tool 新question补充memory的question
-                response = dashscope_chat_tool(
-                    tool, get_tool_call("", memory, intent))
-                # 判断是否有tool调用
-                if response:  # 识别到工具调用
-                    if "name" in response and "arguments" in response:  # 识别到工具调用的参数
-                        memory["answer"] = response  # 覆盖答案
-                        # memory["question"] = memory["question"] # 不要累积问题
-                        properties = analyze_tool_arguments(response, tool)
-                        memory["hint"] =  get_hint(
-                            tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
-                        if properties["all_required_filled"]:
-                            memory["flag"] = "[comfirm]"
-                        else:  # 有参数缺失或为空
-                            memory["flag"] = "[callback]"
-                        return memory
-            if comfirm in reject_list:
-                memory["flag"] = "[stream]"
-                return memory
+            # 确认时才需要工具参数，与意图分类同时提取
+            speculative = _speculate(_extract_with_memory("", memory, intent, tool))
+            try:
+                comfirm = await dashscope_chat_intent_async(
+                    reject_list+intent_list+other_list, chat.question)
+                if comfirm in intent_list:
+                    #  取memory的tool 新question补充memory的question
+                    _, response = await speculative
+                    # 判断是否有tool调用
+                    if response:  # 识别到工具调用
+                        if "name" in response and "arguments" in response:  # 识别到工具调用的参数
+                            memory["answer"] = response  # 覆盖答案
+                            # memory["question"] = memory["question"] # 不要累积问题
+                            properties = analyze_tool_arguments(response, tool)
+                            memory["hint"] =  await get_hint(
+                                tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
+                            if properties["all_required_filled"]:
+                                memory["flag"] = "[comfirm]"
+                            else:  # 有参数缺失或为空
+                                memory["flag"] = "[callback]"
+                            return memory
+                if comfirm in reject_list:
+                    memory["flag"] = "[stream]"
+                    return memory
+            finally:
+                _discard(speculative)
             
 
         if intent and flag == "[comfirm]":
@@ -221,47 +268,52 @@ async def chat_intent(chat: ChatIntentRequest, current_user: dict = Depends(get_
             tool = val.get("tool")
             other_list = ["其他"]
             reject_list = ["否定","拒绝"]
-            comfirm = dashscope_chat_intent(
-                reject_list+other_list, chat.question)
-            if comfirm in reject_list:
-                memory["flag"] = "[callback]"
-                memory["hint"] = get_talk("您是否要修改信息？可发送过来")
-                return memory
-            if comfirm in other_list:
-                comfirm = search_intent_by_keywords(chat.question)
-                if comfirm == None:
-                    comfirm_list = ["肯定","确认"]
-                    comfirm = dashscope_chat_intent(comfirm_list+other_list, chat.question)
-                    if comfirm in comfirm_list:
-                        memory["flag"] = "[function]"
-                        return memory
-                if comfirm == intent or comfirm == None:
-                    val = tools.get(intent)
-                    tool = val.get("tool")
-                    #  取memory的tool 新question补充memory的question
-                    new_question= get_tool_call(chat.question, memory, intent)
-                    response = dashscope_chat_tool(
-                        tool, new_question)
-                    # 判断是否有tool调用
-                    if response:  # 识别到工具调用
-                        if "name" in response and "arguments" in response:  # 识别到工具调用的参数
-                            if not are_objects_equal(memory["answer"], response):
-                                memory["answer"] = merge_objects(memory["answer"], response)  # 覆盖答案
-                                memory["answer"] = response  # 覆盖答案
-                                memory["question"] = new_question
-                                properties = analyze_tool_arguments(
-                                    memory["answer"], tool)
-                                memory["hint"] =  get_hint(
-                                    tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
-                                if properties["all_required_filled"]:
-                                    memory["flag"] = "[comfirm]"
-                                else:  # 有参数缺失或为空
+            # 关键词为空或与当前意图一致时可能需要重新提取工具参数，与意图分类同时进行
+            speculative = None
+            if keyword_intent == None or keyword_intent == intent:
+                speculative = _speculate(_extract_with_memory(chat.question, memory, intent, tool))
+            try:
+                comfirm = await dashscope_chat_intent_async(
+                    reject_list+other_list, chat.question)
+                if comfirm in reject_list:
+                    memory["flag"] = "[callback]"
+                    memory["hint"] = await get_talk("您是否要修改信息？可发送过来")
+                    return memory
+                if comfirm in other_list:
+                    comfirm = keyword_intent
+                    if comfirm == None:
+                        comfirm_list = ["肯定","确认"]
+                        comfirm = await dashscope_chat_intent_async(comfirm_list+other_list, chat.question)
+                        if comfirm in comfirm_list:
+                            memory["flag"] = "[function]"
+                            return memory
+                    if comfirm == intent or comfirm == None:
+                        val = tools.get(intent)
+                        tool = val.get("tool")
+                        #  取memory的tool 新question补充memory的question
+                        new_question, response = await speculative
+                        # 判断是否有tool调用
+                        if response:  # 识别到工具调用
+                            if "name" in response and "arguments" in response:  # 识别到工具调用的参数
+                                if not are_objects_equal(memory["answer"], response):
+                                    memory["answer"] = merge_objects(memory["answer"], response)  # 覆盖答案
+                                    memory["answer"] = response  # 覆盖答案
+                                    memory["question"] = new_question
+                                    properties = analyze_tool_arguments(
+                                        memory["answer"], tool)
+                                    memory["hint"] =  await get_hint(
+                                        tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
+                                    if properties["all_required_filled"]:
+                                        memory["flag"] = "[comfirm]"
+                                    else:  # 有参数缺失或为空
+                                        memory["flag"] = "[callback]"
+                                    return memory 
+                                else:
+                                    memory["answer"] = await get_talk("您是否还有要修改信息？可发送过来")
                                     memory["flag"] = "[callback]"
-                                return memory 
-                            else:
-                                memory["answer"] = get_talk("您是否还有要修改信息？可发送过来")
-                                memory["flag"] = "[callback]"
-                                return memory               
+                                    return memory               
+            finally:
+                _discard(speculative)
 
     # 步骤1: 先通过关键词检索快速匹配意图
     memory = {
@@ -274,49 +326,60 @@ async def chat_intent(chat: ChatIntentRequest, current_user: dict = Depends(get_
     reject_list = ["政治敏感", "违法犯罪", "违反道德"]
     talk_list = ["关于我"]
     intent_list = list(tools.keys())
-    intent = dashscope_chat_intent(
-        reject_list+intent_list+talk_list, chat.question)  # 有识别到意图
-    memory["question"] = chat.question  # 记录原始问题
-    if intent in reject_list:
-        memory["answer"] = get_talk("不好意思！我好像没有理解您的意思。")
-        memory["flag"] = "[reject]"
-        return memory
-    if intent in talk_list:
-        memory["hint"] = "话题讨论"
-        memory["flag"] = "[stream]"
-        return memory
+    # 关键词预测的意图有工具时，与意图分类同时提取工具参数
+    val = tools.get(keyword_intent) if keyword_intent else None
+    speculative = None
+    if val and val.get("tool"):
+        speculative = _speculate(dashscope_chat_tool_async(
+            val.get("tool"), chat.question + "\n"+val.get("hint", "")))
+    try:
+        # 先用本地示例分类，没有把握时再调用远程意图模型
+        intent = await predict_intent_async(reject_list+intent_list+talk_list, chat.question)
+        if intent is None:
+            intent = await dashscope_chat_intent_async(
+                reject_list+intent_list+talk_list, chat.question)  # 有识别到意图
+        memory["question"] = chat.question  # 记录原始问题
+        if intent in reject_list:
+            memory["answer"] = await get_talk("不好意思！我好像没有理解您的意思。")
+            memory["flag"] = "[reject]"
+            return memory
+        if intent in talk_list:
+            memory["hint"] = "话题讨论"
+            memory["flag"] = "[stream]"
+            return memory
 
-    if intent in intent_list:
-        memory["intent"] = search_intent_by_keywords(chat.question)
+        if intent in intent_list:
+            memory["intent"] = keyword_intent
 
-        # 没有命中关键词，返回怀疑意图
-        if not memory["intent"]:
-            val = tools.get(intent)
-            tool = val.get("tool")
-            memory["intent"] = intent
-            memory["hint"] = get_talk("不太确定您的意思，"+tool.get("description", "")+"？")
-            memory["flag"] = "[doubt]"  # 标记为怀疑
-            return memory
+            # 没有命中关键词，返回怀疑意图
+            if not memory["intent"]:
+                val = tools.get(intent)
+                tool = val.get("tool")
+                memory["intent"] = intent
+                memory["hint"] = await get_talk("不太确定您的意思，"+tool.get("description", "")+"？")
+                memory["flag"] = "[doubt]"  # 标记为怀疑
+                return memory
 
-        val = tools.get(memory["intent"])
-        if bool(val):  # 有意图对应的工具集
-            tool = val.get("tool")
-            if bool(tool):  # 有意图对应的方法
-                response = dashscope_chat_tool(
-                    tool, chat.question + "\n"+val.get("hint", ""))
-                if response:  # 识别到工具调用
-                    if "name" in response and "arguments" in response:  # 识别到工具调用的参数
-                        memory["answer"] = response
-                        properties = analyze_tool_arguments(response, tool)
-                        memory["hint"] =  get_hint(
-                                tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
-                        if properties["all_required_filled"]:
-                            memory["flag"] = "[comfirm]"
-                        else:  # 有参数缺失或为空
-                            memory["flag"] = "[callback]"
-                        return memory
-        memory["flag"] = "[stream]"
-    return memory
+            val = tools.get(memory["intent"])
+            if bool(val):  # 有意图对应的工具集
+                tool = val.get("tool")
+                if bool(tool):  # 有意图对应的方法
+                    response = await speculative
+                    if response:  # 识别到工具调用
+                        if "name" in response and "arguments" in response:  # 识别到工具调用的参数
+                            memory["answer"] = response
+                            properties = analyze_tool_arguments(response, tool)
+                            memory["hint"] =  await get_hint(
+                                    tool.get("description", intent), properties["has_value"], properties["missing_or_none"])
+                            if properties["all_required_filled"]:
+                                memory["flag"] = "[comfirm]"
+                            else:  # 有参数缺失或为空
+                                memory["flag"] = "[callback]"
+                            return memory
+            memory["flag"] = "[stream]"
+        return memory
+    finally:
+        _discard(speculative)
 
 
 def analyze_tool_arguments(tool_call: dict, tool_schema: dict) -> dict:
@@ -376,7 +439,7 @@ def analyze_tool_arguments(tool_call: dict, tool_schema: dict) -> dict:
     }
 
 
-def get_hint(intent: str, properties_with_value: dict, properties_missing_or_none: dict = {}) -> str:
+async def get_hint(intent: str, properties_with_value: dict, properties_missing_or_none: dict = {}) -> str:
 
     system_prompt = """
     你是一个助手，请用户核对参数，用一句有礼貌提示语，说人话，有一说一，不要凭空编造。
@@ -396,29 +459,29 @@ def get_hint(intent: str, properties_with_value: dict, properties_missing_or_non
         用户的意图：{intent}
         核对与确认：{properties_with_value}
         """.format(intent=intent, properties_with_value=properties_with_value)
-    hint = dashscope_chat_block(system_prompt, user_prompt)
+    hint = await dashscope_chat_block_async(system_prompt, user_prompt)
     if hint:
         return "【"+intent+"】"+ hint
     else:
         return ""
 
-def get_talk(answer:str) -> str:
+async def get_talk(answer:str) -> str:
 
     system_prompt = """
     你是一个客服,用一句有礼貌提示语，说人话。
     """
-    hint = dashscope_chat_block(system_prompt, answer)
+    hint = await dashscope_chat_block_async(system_prompt, answer)
     if hint:
         return hint
     else:
         return ""
 
 
-def get_summer(qustion:str)-> str:
+async def get_summer(qustion:str)-> str:
     system_prompt = """
     你用一句概况问题，说人话，不要编造新。
     """
-    hint = dashscope_chat_block(system_prompt, qustion)
+    hint = await dashscope_chat_block_async(system_prompt, qustion)
     print(hint)
     if hint:
         return hint
@@ -432,7 +495,7 @@ def get_summer(qustion:str)-> str:
 
 
 
-def get_tool_call(question: str, memory: dict, intent: str) -> dict:
+async def get_tool_call(question: str, memory: dict, intent: str) -> dict:
     """
     # 定义一个方法，用于从工具调用返回中提取工具调用的参数
     # answer: str - 工具调用返回的字符串
@@ -446,7 +509,7 @@ def get_tool_call(question: str, memory: dict, intent: str) -> dict:
         "更新信息": question,
         "辅助信息": hint,
     }
-    return get_summer(json.dumps(response, ensure_ascii=False))
+    return await get_summer(json.dumps(response, ensure_ascii=False))
     # return json.dumps(response, ensure_ascii=False)
 
 
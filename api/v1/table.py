@@ -8,11 +8,14 @@ from fastapi.responses import StreamingResponse
 from api.v1.dependencies import get_current_user
 import pandas as pd
 import io
-from services.chroma_sercice import search_similar_fields_in_batch,get_model,search_similar_field
-from services.neo4j_service import find_relation_path_logic,find_data_by_path
+import asyncio
+from services.chroma_sercice import search_similar_fields_in_batch_async,search_similar_field
+from services.embedding_worker import get_embedding_worker, run_search
+from services.neo4j_service import find_relation_path_logic_async,find_data_by_path,rebuild_relation_index
 from services.tool import clear_data
+from services.scheme_registry import get_scheme_registry
 from datawork.migrate_to_neo4j import clear_graph_database, rebuild_graph_database
-from chroma_tool import build_chroma, clear_chroma
+from services.field_search import get_field_search_backend
 # 添加项目根目录到 sys.path，以便导入 codegen_tool
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 if BASE_DIR not in sys.path:
@@ -38,6 +41,8 @@ async def rebuild_database():
     """
     try:
         rebuild_graph_database()
+        # 表结构和关系可能已变化，重建路径索引
+        rebuild_relation_index()
         return {"message": "Neo4j 数据库已成功重建。"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"重建数据库时出错: {str(e)}")
@@ -45,29 +50,28 @@ async def rebuild_database():
 @router.post("/build-vector/build-vector")
 async def build_vector_collection():
     """
-    构建向量数据库集合。
+    构建向量数据库集合（或FIELD_SEARCH_BACKEND配置的进程内索引）。
     """
     try:
-        build_chroma()
-        return {"message": "向量数据库集合已成功构建。"}
+        # 增量同步，只处理新增、变化和删除的字段
+        report = get_field_search_backend().build()
+        return {"message": "向量数据库集合已成功构建。", "report": report}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"构建向量数据库时出错: {str(e)}")
 
 @router.post("/clear-vector")
 async def clear_vector_collection():
     """
-    清空向量数据库集合。
+    清空向量数据库集合（或FIELD_SEARCH_BACKEND配置的进程内索引）。
     """
     try:
-        clear_chroma()
+        get_field_search_backend().clear()
         return {"message": "向量数据库集合已成功清空。"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"清空向量数据库时出错: {str(e)}")
 
 
 
-model = get_model()
-
 MCP_JSON_PATH = os.path.join(BASE_DIR, "mcp.json")
 MCP_RELATION_PATH = os.path.join(BASE_DIR, "mcp_relation.json")
 SCHEME_DIR_PATH = os.path.join(BASE_DIR, "scheme")
@@ -79,7 +83,8 @@ class HeaderInput(BaseModel):
 async def upload_excel_header(item: HeaderInput):
     try:
         headers = item.headers
-        similar_fields_map = search_similar_fields_in_batch(model, headers)
+        # 编码和向量查询在线程池中执行，并发请求的编码合并成批；大模型选择字段经过并发限制、超时和重试，都不阻塞事件循环
+        similar_fields_map = await search_similar_fields_in_batch_async(get_embedding_worker(), headers)
 
         if "message" not in similar_fields_map:
             raise HTTPException(status_code=400, detail=similar_fields_map)
@@ -90,11 +95,12 @@ async def upload_excel_header(item: HeaderInput):
             if field:
                 matched_fields.append(field)
 
-        relation_paths = find_relation_path_logic(matched_fields)
+        # 大模型选择路径、Neo4j查询都不阻塞事件循环
+        relation_paths = await find_relation_path_logic_async(matched_fields)
         if "message" not in relation_paths:
             raise HTTPException(status_code=400, detail=relation_paths)
         
-        path_data_list = find_data_by_path(relation_paths["message"])
+        path_data_list = await asyncio.to_thread(find_data_by_path, relation_paths["message"])
         
         if "message" not in path_data_list or not path_data_list["message"]:
             raise HTTPException(status_code=400, detail="未根据关系路径找到任何数据")
@@ -115,7 +121,7 @@ class GuessInput(BaseModel):
 @router.post("/guess")
 async def guess_field(item: GuessInput):
     try:
-        similar_fields = search_similar_field(item.query)
+        similar_fields = await run_search(search_similar_field, item.query, get_embedding_worker())
         if similar_fields:
             return {"data": similar_fields}
         else:
@@ -125,57 +131,30 @@ async def guess_field(item: GuessInput):
 
 @router.get("/scheme/structure")
 async def get_scheme_structure():
-
-    structure = {}
-    if not os.path.exists(SCHEME_DIR_PATH):
-        return {}
-    
     try:
-        for root, dirs, files in os.walk(SCHEME_DIR_PATH):
-            # 获取相对于 scheme 目录的路径作为 key
-            relative_dir = os.path.relpath(root, SCHEME_DIR_PATH)
-            # 在Windows上，路径分隔符是'\'，我们将其替换为'/'以保持一致性
-            if os.sep != '/':
-                relative_dir = relative_dir.replace(os.sep, '/')
-            
-            # 如果是根目录，使用'/'
-            if relative_dir == '.':
-                relative_dir = '/'
-
-            json_files = [os.path.splitext(file)[0] for file in files if file.endswith('.json')]
-            if json_files:
-                structure[relative_dir] = json_files
-        return structure
+        # 从内存中的注册表读取（目录不存在时为空），文件变化时自动重新加载
+        return get_scheme_registry().structure()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/scheme/content/{filename}")
 async def get_scheme_content_by_filename(filename: str):
-    SCHEME_DIR_PATH = os.path.join(BASE_DIR, "scheme")
-    
     if not filename.endswith(".json"):
         filename += ".json"
 
     if ".." in filename:
         raise HTTPException(status_code=400, detail="Invalid path components.")
 
-    found_path = None
-    if os.path.exists(SCHEME_DIR_PATH):
-        for root, dirs, files in os.walk(SCHEME_DIR_PATH):
-            if filename in files:
-                found_path = os.path.join(root, filename)
-                break
-    
-    if not found_path:
-        raise HTTPException(status_code=404, detail=f"File '{filename}' not found in scheme directory.")
-
     try:
-        with open(found_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        content = get_scheme_registry().get_content(filename)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"File '{filename}' not found in scheme directory.")
+    return content
+
 @router.get("/relation")
 async def get_mcp_relation():
     try:
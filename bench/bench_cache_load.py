@@ -0,0 +1,77 @@
+"""
+cache_load 吞吐量微基准
+
+对比两种读取方式（需要本地可用的Redis，配置同 services/cache.py）：
+- 旧方式：max_connections=10 的普通连接池，每次 GET 前先 PING
+- 新方式：cache_load，阻塞式连接池 + 健康检查 + 出错重试，无 PING
+
+用法: python bench/bench_cache_load.py [次数] [并发数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+from concurrent.futures import ThreadPoolExecutor # 导入线程池
+import redis # 导入Redis客户端
+import pandas as pd # 导入Pandas库
+from services.cache import cache_save, cache_load, _get_redis_client # 导入缓存服务
+
+TOKEN = "bench_cache_load"  # 基准测试使用的缓存键
+
+
+def legacy_load(client: redis.Redis, token: str):
+    """旧的读取方式：每次GET前PING"""
+    client.ping()
+    data = client.get(token)
+    return data.decode("utf-8") if data is not None else None
+
+
+def run(fn, total: int, workers: int) -> float:
+    """执行total次读取，返回每秒次数"""
+    start = time.perf_counter()
+    if workers <= 1:
+        for _ in range(total):
+            fn()
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(fn) for _ in range(total)]:
+                future.result()
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000 # 读取次数
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 32 # 并发线程数
+
+    # 准备一张小表（CSV格式），只测连接与往返开销
+    df = pd.DataFrame({"订单号": [f"SO{i:06d}" for i in range(50)], "数量": range(50)})
+    cache_save(TOKEN, df.to_csv(index=False), expire_time=600)
+
+    # 旧方式的连接池，与改造前配置一致
+    shared = _get_redis_client().connection_pool.connection_kwargs
+    legacy_pool = redis.ConnectionPool(
+        host=shared.get("host", "localhost"),
+        port=shared.get("port", 6379),
+        db=shared.get("db", 0),
+        password=shared.get("password"),
+        max_connections=10,
+    )
+    legacy_client = redis.Redis(connection_pool=legacy_pool)
+
+    for label, n_workers in (("单线程", 1), (f"{workers}并发", workers)):
+        try:
+            before = run(lambda: legacy_load(legacy_client, TOKEN), total, n_workers)
+            before_text = f"{before:10.0f} 次/秒"
+        except redis.ConnectionError as e:
+            # 旧连接池在并发超过10时会直接报 Too many connections
+            before_text = f"失败: {e}"
+        after = run(lambda: cache_load(TOKEN), total, n_workers)
+        print(f"[{label}] 改造前(PING+GET): {before_text}")
+        print(f"[{label}] 改造后(cache_load): {after:10.0f} 次/秒")
+
+    legacy_pool.disconnect()
+    _get_redis_client().delete(TOKEN)
+
+
+if __name__ == "__main__":
+    main()
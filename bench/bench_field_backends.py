@@ -0,0 +1,84 @@
+"""
+字段检索后端一致性检查
+
+对比ChromaDB与进程内索引后端（hnsw或faiss）（需要运行中的ChromaDB，且集合已构建，配置同 services/chroma_sercice.py）：
+- 原始检索：两个后端前k条的重合率、共同结果的相似度差值、相似度是否大于0的判断是否一致
+- 排序结果：rank_similar_fields_in_batch（按相似度和表关联关系排序、过滤）之后每个表头的候选字段是否相同
+
+search_similar_fields_in_batch 按相似度是否大于0选择排序方式，两个后端的相似度尺度不同时排序结果会不同。
+表头取表结构中的字段描述，另取描述的前4个字模拟较短的Excel表头（相似度多数不大于0）。
+进程内索引与表结构不一致时先同步。
+
+用法: python bench/bench_field_backends.py [hnsw|faiss] [表头数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import io # 导入io模块
+import time # 导入时间模块
+import contextlib # 导入上下文管理工具
+from services.chroma_sercice import get_model, scan_and_process_datawork, rank_similar_fields_in_batch # 导入向量检索服务
+from services.field_search import ChromaBackend, HnswBackend, FaissBackend, BASE_DIR # 导入字段检索后端
+
+K = 100 # 与 search_similar_fields_in_batch 的默认值一致
+
+
+def rank(model, headers, backend):
+    """按后端执行检索和排序，返回 表头 -> [(clazz, field)] 和耗时，排序过程中的打印不输出"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = rank_similar_fields_in_batch(model, headers, K, backend=backend)
+    ranked = {header: [(item["clazz"], item["field"]) for item in items] for header, items in results.items()}
+    return ranked, time.perf_counter() - start
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else "hnsw" # 进程内索引后端
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50 # 表头数
+
+    model = get_model()
+    if model is None:
+        return
+    chroma = ChromaBackend()
+    if not chroma.load():
+        return
+    local = {"hnsw": HnswBackend, "faiss": FaissBackend}[name]()
+    if local.build() is None:
+        return
+
+    # 用表结构中的字段描述及其前4个字模拟Excel表头
+    contents = list(dict.fromkeys(item["content"] for item in scan_and_process_datawork(os.path.join(BASE_DIR, "scheme"))))
+    contents = contents[:count]
+    headers = list(dict.fromkeys(contents + [content[:4] for content in contents]))
+    print(f"表头数: {len(headers)}, 每个表头返回 {K} 条, 对比 chroma 与 {name}")
+
+    # 原始检索结果
+    expected = chroma.search(model, headers, K)
+    actual = local.search(model, headers, K)
+    overlap = total = sign_mismatch = 0
+    max_diff = 0.0
+    for header in headers:
+        reference = {(item["clazz"], item["field"]): item["similarity"] for item in expected[header]}
+        total += len(reference)
+        for item in actual[header]:
+            similarity = reference.get((item["clazz"], item["field"]))
+            if similarity is None:
+                continue
+            overlap += 1
+            max_diff = max(max_diff, abs(similarity - item["similarity"]))
+            sign_mismatch += (similarity > 0) != (item["similarity"] > 0)
+    print(f"前{K}条重合率: {overlap / max(total, 1) * 100:.2f}%, 相似度最大差值: {max_diff:.6f}, "
+          f"大于0判断不一致: {sign_mismatch} 条")
+
+    # 排序、过滤之后的候选字段
+    chroma_ranked, chroma_time = rank(model, headers, chroma)
+    local_ranked, local_time = rank(model, headers, local)
+    mismatched = [header for header in headers if chroma_ranked[header] != local_ranked[header]]
+    print(f"排序耗时: chroma {chroma_time * 1000:.1f} ms, {name} {local_time * 1000:.1f} ms")
+    print(f"排序结果一致: {len(headers) - len(mismatched)}/{len(headers)}")
+    for header in mismatched[:10]:
+        print(f"  {header}:\n    chroma: {chroma_ranked[header]}\n    {name}: {local_ranked[header]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+/chat/intent 意图流程延迟微基准（大模型为本地桩函数，只模拟延迟）
+
+按 test_intent.html 和 test_other_intent.py 中的对话构造流程（首轮提问、补充信息、确认），对比：
+- 顺序执行：意图分类完成后再提取工具参数（推测请求延迟到被用到时才执行，等价于原流程）
+- 推测执行：意图分类与按关键词预测的意图提取工具参数同时进行
+
+桩函数的延迟可通过参数调整，单位毫秒。
+
+用法: python bench/bench_intent_flow.py [意图分类延迟] [工具参数延迟] [文本生成延迟] [重复次数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+import json # 导入JSON模块
+import asyncio # 导入异步IO模块
+from api.v1 import intent # 导入意图识别路由模块
+from api.v1.models import ChatIntentRequest # 导入请求模型
+
+INTENT_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 300 # 意图分类延迟
+TOOL_MS = float(sys.argv[2]) if len(sys.argv) > 2 else 600 # 工具参数提取延迟
+BLOCK_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 400 # 文本生成（提示语、问题概括）延迟
+REPEAT = int(sys.argv[4]) if len(sys.argv) > 4 else 3 # 重复次数
+
+
+async def fake_chat_intent(intent_list, user_prompt, model=None):
+    """意图分类桩：按问题内容返回列表中的意图"""
+    await asyncio.sleep(INTENT_MS / 1000)
+    for candidate, words in (("起名", ("名字", "起名", "几个字")), ("订单", ("订单", "查询")), ("确认", ("确认", "好的")), ("修改", ("姓", "男", "点"))):
+        if candidate in intent_list and any(word in user_prompt for word in words):
+            return candidate
+    return "关于我" if "关于我" in intent_list else "其他"
+
+
+async def fake_predict_intent(intent_list, question):
+    """本地意图分类桩：全部交给远程意图模型"""
+    return None
+
+
+async def fake_chat_tool(tool, user_prompt, model=None):
+    """工具参数提取桩：返回部分参数"""
+    await asyncio.sleep(TOOL_MS / 1000)
+    arguments = {name: "NONE" for name in tool.get("parameters", {}).get("properties", {})}
+    if "姓" in user_prompt:
+        arguments["姓氏"] = "李"
+    return {"name": tool["name"], "arguments": arguments}
+
+
+async def fake_chat_block(system_prompt, user_prompt, model=None, enable_thinking=False):
+    """文本生成桩"""
+    await asyncio.sleep(BLOCK_MS / 1000)
+    return "好的"
+
+
+class _Lazy:
+    """顺序执行基线：推测请求在被await时才开始，丢弃时直接关闭"""
+
+    def __init__(self, coro):
+        self.coro = coro
+
+    def __await__(self):
+        return self.coro.__await__()
+
+    def done(self):
+        return False
+
+    def cancel(self):
+        self.coro.close()
+
+
+async def run_flow(steps):
+    """按顺序发送一组对话，返回最后的memory"""
+    memory = ""
+    for question in steps:
+        result = await intent.chat_intent(ChatIntentRequest(question=question, memory=memory), {})
+        memory = json.dumps(result, ensure_ascii=False)
+    return result
+
+
+FLOWS = {
+    "首轮-起名": ["帮我给孩子起个名字"],
+    "首轮-模糊查询": ["帮我查询一下"],
+    "首轮-闲聊": ["你好"],
+    "补充信息": ["帮我给孩子起个名字", "姓李，男孩"],
+    "怀疑后确认": ["给孩子想几个字", "确认"],
+}
+
+
+async def main():
+    intent.dashscope_chat_intent_async = fake_chat_intent
+    intent.predict_intent_async = fake_predict_intent
+    intent.dashscope_chat_tool_async = fake_chat_tool
+    intent.dashscope_chat_block_async = fake_chat_block
+    speculate = intent._speculate
+    print(f"意图分类 {INTENT_MS:.0f} ms, 工具参数 {TOOL_MS:.0f} ms, 文本生成 {BLOCK_MS:.0f} ms, 重复 {REPEAT} 次")
+    for name, steps in FLOWS.items():
+        timings = {}
+        for mode, speculate_func in (("顺序", _Lazy), ("推测", speculate)):
+            intent._speculate = speculate_func
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                result = await run_flow(steps)
+            timings[mode] = (time.perf_counter() - start) / REPEAT
+            timings[mode + "结果"] = result
+        same = timings["顺序结果"] == timings["推测结果"]
+        print(f"[{name:8s}] 顺序 {timings['顺序'] * 1000:7.0f} ms, 推测 {timings['推测'] * 1000:7.0f} ms, "
+              f"节省 {(1 - timings['推测'] / timings['顺序']) * 100:5.1f}%, 结果一致: {same}, flag: {timings['推测结果'].get('flag')}")
+    intent._speculate = speculate
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
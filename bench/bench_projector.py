@@ -0,0 +1,118 @@
+"""
+字段投影器正确性检查与微基准
+
+用合成的上游记录（整数代码、布尔值、缺失字段、null值、同名列）对比：
+- 旧方式：逐行逐字段判断配置类型，追加到列式缓冲区后构建DataFrame
+- 新方式：services/projector.py 的 FieldProjector
+
+先检查两者输出一致（列顺序除外），再比较耗时。
+
+用法: python bench/bench_projector.py [行数] [字段数] [重复次数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+import random # 导入随机数模块
+import pandas as pd # 导入Pandas库
+from services.projector import FieldProjector # 导入字段投影器
+
+
+def legacy_project(page: list, filtered_fields: dict) -> pd.DataFrame:
+    """旧的转换方式：逐行逐字段判断配置类型，缺失的值补None"""
+    columns = {}
+    row_count = 0
+    for item in page:
+        filtered_item = {}
+        for field_key, field_config in filtered_fields.items():
+            if field_key in item:
+                raw_value = item[field_key]
+                if isinstance(field_config, dict):
+                    csv_header = field_config.get("name", field_key)
+                    if "values" in field_config and isinstance(field_config["values"], dict):
+                        str_val = str(raw_value).lower()
+                        mapping = field_config["values"]
+                        if raw_value in mapping:
+                            filtered_item[csv_header] = mapping[raw_value]
+                        elif str_val in mapping:
+                            filtered_item[csv_header] = mapping[str_val]
+                        else:
+                            filtered_item[csv_header] = raw_value
+                    else:
+                        filtered_item[csv_header] = raw_value
+                else:
+                    filtered_item[field_config] = raw_value
+        for header, value in filtered_item.items():
+            column = columns.get(header)
+            if column is None:
+                column = columns[header] = [None] * row_count
+            column.append(value)
+        row_count += 1
+        for column in columns.values():
+            if len(column) < row_count:
+                column.append(None)
+    return pd.DataFrame(columns)
+
+
+# 真实配置中的值映射（staffSex、bizOrderDetailBizOrderExternalState）
+SEX_VALUES = {"1": "男", "2": "女", "3": "未知"}
+STATE_VALUES = {"0": "未开始", "1": "进行中", "2": "已完成", "3": "已取消", "4": "已关闭", "5": "异常"}
+BOOL_VALUES = {"true": "是", "false": "否"}
+
+
+def make_case(rows: int, fields: int):
+    """构造字段配置和记录：约10%的字段缺失、5%为null"""
+    filtered_fields = {
+        "state": {"name": "状态", "values": STATE_VALUES},
+        "sex": {"name": "性别", "values": SEX_VALUES},
+        "enabled": {"name": "启用", "values": BOOL_VALUES},
+        "remark": "备注",
+        "memo": "备注",  # 与remark映射到同一列名
+    }
+    for i in range(fields):
+        filtered_fields[f"f{i}"] = f"字段{i}" if i % 3 else {"name": f"字段{i}", "values": STATE_VALUES}
+    rng = random.Random(0)
+    records = []
+    for r in range(rows):
+        record = {"unused": r}
+        for key in filtered_fields:
+            roll = rng.random()
+            if roll < 0.1:
+                continue  # 缺失字段
+            if roll < 0.15:
+                record[key] = None  # null值
+            elif key == "enabled":
+                record[key] = rng.random() < 0.5
+            elif key in ("remark", "memo"):
+                record[key] = f"{key}{r}"
+            else:
+                record[key] = rng.randint(0, 6)
+        records.append(record)
+    return filtered_fields, records
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000 # 行数
+    fields = int(sys.argv[2]) if len(sys.argv) > 2 else 150 # 字段数
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3 # 重复次数
+
+    # 小例子：整数代码列中有缺失的记录
+    small = {"state": {"name": "状态", "values": {"0": "未开始", "1": "进行中"}}}
+    small_records = [{"state": 0}, {"state": 1}, {}, {"state": None}]
+    print(FieldProjector(small)(small_records)["状态"].tolist())
+    pd.testing.assert_frame_equal(FieldProjector(small)(small_records), legacy_project(small_records, small))
+
+    filtered_fields, records = make_case(rows, fields)
+    projector = FieldProjector(filtered_fields)
+    pd.testing.assert_frame_equal(projector(records), legacy_project(records, filtered_fields), check_like=True)
+    print(f"输出一致: {rows} 行, {len(filtered_fields)} 个字段")
+
+    for name, fn in (("旧方式", lambda: legacy_project(records, filtered_fields)), ("投影器", lambda: projector(records))):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        print(f"{name}: {(time.perf_counter() - start) / repeat * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+表关系路径查找微基准
+
+对比两种查找方式（使用 datawork 下的全部表结构和 mcp_relation.json）：
+- 旧方式：每次请求重新读取元数据和关系文件，列表BFS（queue.pop(0)、复制路径）逐对搜索
+- 新方式：启动时构建 RelationIndex，查询时直接从字典取出路径
+
+用法: python bench/bench_relation_path.py [旧方式抽样表对数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+import random # 导入随机数模块
+from itertools import permutations # 导入排列函数
+from services.neo4j_service import load_datawork_meta, load_relations # 导入元数据加载函数
+from services.relation_index import RelationIndex # 导入表关系路径索引
+
+
+def legacy_paths(start_node, end_node, adj, directed_edges, limit=5, max_depth=12):
+    """旧的查找方式：无向图上列表BFS，找到终点后检查方向一致性"""
+    queue = [[start_node]]
+    found_paths = []
+    iterations = 0
+    while queue and len(found_paths) < limit and iterations < 50000:
+        iterations += 1
+        path = queue.pop(0)
+        node = path[-1]
+        if node == end_node:
+            all_forward = all((path[i], path[i + 1]) in directed_edges for i in range(len(path) - 1))
+            all_backward = all((path[i + 1], path[i]) in directed_edges for i in range(len(path) - 1))
+            if all_forward or all_backward:
+                found_paths.append(path)
+            continue
+        if len(path) >= max_depth:
+            continue
+        for neighbor in adj.get(node, []):
+            if neighbor not in path:
+                new_path = list(path)
+                new_path.append(neighbor)
+                queue.append(new_path)
+    return found_paths
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 100 # 旧方式抽样的表对数
+
+    start = time.perf_counter()
+    attr_map, table_map = load_datawork_meta()
+    adj, directed_edges = load_relations()
+    load_time = time.perf_counter() - start
+    tables = sorted(set(attr_map.values()))
+    print(f"表结构: {len(tables)} 张表, 关系: {len(directed_edges)} 条, 读取耗时 {load_time * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    index = RelationIndex(attr_map, table_map, adj, directed_edges)
+    print(f"构建索引: {(time.perf_counter() - start) * 1000:.1f} ms, {index.stats()}")
+
+    # 新方式：全部表对各查询一次
+    pairs = list(permutations(tables, 2))
+    start = time.perf_counter()
+    for start_node, end_node in pairs:
+        index.paths(start_node, end_node)[:5]
+    elapsed = time.perf_counter() - start
+    print(f"[索引] {len(pairs)} 个表对, 平均 {elapsed * 1e6 / len(pairs):.2f} us/对")
+
+    # 旧方式：抽样表对（全部表对需要数小时），每次请求还要重新读取文件
+    random.seed(0)
+    sampled = random.sample(pairs, min(samples, len(pairs)))
+    start = time.perf_counter()
+    missing = 0
+    for start_node, end_node in sampled:
+        found = legacy_paths(start_node, end_node, adj, directed_edges)
+        # 旧方式找到的路径应当都在索引中
+        indexed = index.paths(start_node, end_node)
+        missing += sum(1 for path in found if path not in indexed)
+    elapsed = time.perf_counter() - start
+    print(f"[旧BFS] {len(sampled)} 个表对, 平均 {elapsed * 1000 / len(sampled):.2f} ms/对"
+          f"（另加每次请求读取文件 {load_time * 1000:.1f} ms）, 索引中缺少的路径 {missing} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+文本向量化模型加载与编码微基准
+
+对比两种编码后端（配置同 services/model_registry.py）：
+- torch：text2vec SentenceModel
+- onnx：int8动态量化的ONNX模型，ONNX Runtime CPU推理（首次运行会自动导出）
+
+分别统计冷启动耗时（加载+预热）、编码吞吐量，以及两种后端向量的余弦相似度（检查量化后精度）。
+
+用法: python bench/bench_text_model.py [文本数] [重复次数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+import numpy as np # 导入NumPy库
+from services.chroma_sercice import scan_and_process_datawork # 导入表结构扫描
+from services.model_registry import get_text_model, model_stats, EMBEDDING_MODEL_NAME # 导入模型注册表
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500 # 文本数
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3 # 重复次数
+
+    # 用datawork中的字段描述作为编码文本
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    items = scan_and_process_datawork(os.path.join(base_dir, "datawork"))
+    texts = list(dict.fromkeys(item["content"] for item in items))[:count]
+    print(f"模型: {EMBEDDING_MODEL_NAME}, 文本数: {len(texts)}, 重复 {repeat} 次")
+
+    vectors = {}
+    for backend in ("torch", "onnx"):
+        model = get_text_model(EMBEDDING_MODEL_NAME, backend)
+        if model is None:
+            continue
+        start = time.perf_counter()
+        for _ in range(repeat):
+            vectors[backend] = np.asarray(model.encode(texts), dtype='float32')
+        elapsed = (time.perf_counter() - start) / repeat
+        load_seconds = model_stats()[f"{EMBEDDING_MODEL_NAME}@{backend}"]
+        print(f"[{backend:5s}] 冷启动 {load_seconds:7.2f} s, 编码 {elapsed * 1000:9.1f} ms, "
+              f"{len(texts) / elapsed:8.1f} 条/秒, 实际模型: {model.cache_key}")
+
+    if len(vectors) == 2:
+        a, b = vectors["torch"], vectors["onnx"]
+        cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+        print(f"两种后端向量的余弦相似度: 平均 {cosine.mean():.4f}, 最小 {cosine.min():.4f}")
+
+
+if __name__ == "__main__":
+    main()
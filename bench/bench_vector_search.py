@@ -0,0 +1,77 @@
+"""
+表头批量向量检索微基准
+
+模拟上传一个50列表头的Excel，对比两种检索方式（需要运行中的ChromaDB，且集合已构建，配置同 services/chroma_sercice.py）：
+- 旧方式：逐个表头检索，每次新建HttpClient、获取集合、单独编码一个文本、单独query
+- 新方式：search_similar_fields_chroma_batch，一次编码所有表头，一次query，复用客户端
+
+用法: python bench/bench_vector_search.py [表头数] [重复次数]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+import chromadb # 导入ChromaDB客户端库
+from services.chroma_sercice import ( # 导入向量检索服务
+    CHROMA_HOST, CHROMA_PORT, CHROMA_NAME, get_model, scan_and_process_datawork,
+    search_similar_fields_chroma_batch,
+)
+
+K = 100 # 与 search_similar_fields_in_batch 的默认值一致
+
+
+def legacy_search(model, headers):
+    """旧的检索方式：每个表头一次客户端创建、一次编码、一次query"""
+    results = {}
+    for header in headers:
+        client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+        collection = client.get_collection(name=CHROMA_NAME)
+        query_vector = model.encode([header])
+        result = collection.query(query_embeddings=query_vector.tolist(), n_results=K)
+        results[header] = [
+            {"clazz": metadata["clazz"], "field": metadata["field"]}
+            for metadata in result["metadatas"][0]
+        ]
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50 # 表头数
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5 # 重复次数
+
+    model = get_model()
+    if model is None:
+        return
+
+    # 用datawork中的字段描述模拟Excel表头
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    items = scan_and_process_datawork(os.path.join(base_dir, "datawork"))
+    headers = list(dict.fromkeys(item["content"] for item in items))[:count]
+    print(f"表头数: {len(headers)}, 每个表头返回 {K} 条, 重复 {repeat} 次")
+
+    # 预热：模型首次推理和首次连接不计入
+    legacy_search(model, headers[:1])
+    search_similar_fields_chroma_batch(model, headers[:1], K)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        before = legacy_search(model, headers)
+    legacy_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        after = search_similar_fields_chroma_batch(model, headers, K)
+    batch_time = (time.perf_counter() - start) / repeat
+
+    # 两种方式返回的字段应当一致
+    same = all(
+        [(item["clazz"], item["field"]) for item in after[header]]
+        == [(item["clazz"], item["field"]) for item in before[header]]
+        for header in headers
+    )
+    print(f"[逐个检索] {legacy_time * 1000:10.1f} ms/次上传")
+    print(f"[批量检索] {batch_time * 1000:10.1f} ms/次上传, 加速 {legacy_time / batch_time:.1f}x, 结果一致: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+本地意图分类器离线评估
+
+用 services/intent_classifier.py 的kNN分类器（json/intent_examples.json 中的全部示例）分类留出的标注问题：
+- 默认使用 json/intent_eval.json：与示例不重复的问题，另含"其他"类无关问题（不在候选意图中，
+  正确结果是交给远程模型，本地给出任何意图都算误判）
+- 参数为 loo 时对示例做留一评估：每条示例从投票中排除自己后再分类（只反映示例内部的区分度）
+
+候选意图为示例中的全部意图（同 /chat/intent 首轮提问），INTENT_LOCAL_SKIP 中的意图本地不作答。
+对不同的相似度下限、投票占比下限统计：
+- 本地作答：本地给出结果的问题占比，即省掉的远程意图模型调用比例
+- 本地准确率：本地给出结果的问题中分类正确的比例（其余问题交给远程模型，不计入）
+- 无关误判：无关问题被本地判成某个意图的条数
+最后给出本地准确率不低于目标且没有无关误判时，本地作答最多的阈值组合。
+
+用法: python bench/eval_intent_classifier.py [标注文件|loo] [目标准确率]
+"""
+import sys # 导入sys模块
+import os # 导入os模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 将上上级目录添加到系统路径
+import time # 导入时间模块
+from services.model_registry import get_text_model # 导入模型注册表
+from services.intent_classifier import IntentClassifier, load_intent_examples, BASE_DIR, INTENT_LOCAL_SKIP, \
+    INTENT_MIN_SIMILARITY, INTENT_MIN_CONFIDENCE # 导入意图分类器
+
+SIMILARITY_GRID = [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95] # 相似度下限
+CONFIDENCE_GRID = [0.6, 0.7, 0.8, 0.9, 1.0] # 投票占比下限
+
+
+def evaluate(results: list, labels: list, min_similarity: float, min_confidence: float) -> dict:
+    """按阈值统计本地作答、准确率和无关误判"""
+    answered = correct = off_topic = 0
+    per_label = {}
+    for expected, result in results:
+        counts = per_label.setdefault(expected, [0, 0])  # [本地作答, 总数]
+        counts[1] += 1
+        label, confidence, similarity = result
+        if similarity < min_similarity or confidence < min_confidence or label in INTENT_LOCAL_SKIP:
+            continue
+        answered += 1
+        counts[0] += 1
+        correct += label == expected
+        off_topic += expected not in labels
+    return {"answered": answered, "correct": correct, "off_topic": off_topic, "per_label": per_label,
+            "coverage": answered / len(results), "accuracy": correct / answered if answered else None}
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, "json", "intent_eval.json") # 标注文件
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 0.98 # 目标准确率
+
+    examples = load_intent_examples()
+    if not examples:
+        print("没有意图示例")
+        return
+    labels = list(examples)
+    start = time.perf_counter()
+    classifier = IntentClassifier(examples, get_text_model())
+    print(f"示例 {len(classifier.texts)} 条, 意图 {len(labels)} 个, k={classifier.k}, 编码耗时 {time.perf_counter() - start:.2f} s")
+    print(f"本地不作答: {'、'.join(INTENT_LOCAL_SKIP) or '无'}")
+
+    # 每个问题只计算一次投票结果，各阈值组合复用
+    results = []
+    start = time.perf_counter()
+    if source == "loo":
+        for i, (text, expected) in enumerate(zip(classifier.texts, classifier.labels)):
+            results.append((str(expected), classifier.scores(text, labels, exclude=i)))
+        print("留一评估（示例内部）")
+    else:
+        for expected, questions in load_intent_examples(source).items():
+            for question in questions:
+                results.append((expected, classifier.scores(question, labels)))
+        print(f"标注文件: {source}")
+    print(f"问题 {len(results)} 条, 平均分类耗时 {(time.perf_counter() - start) / max(len(results), 1) * 1000:.2f} ms")
+    results = [(expected, (str(result[0]), result[1], result[2])) for expected, result in results if result is not None]
+    if not results:
+        print("没有可评估的问题")
+        return
+    top1 = sum(result[0] == expected for expected, result in results) / len(results)
+    print(f"不设阈值的Top-1准确率: {top1 * 100:.1f}%（无关问题计为错误）")
+
+    print(f"{'相似度下限':>8s} {'占比下限':>6s} {'本地作答':>8s} {'本地准确率':>8s} {'无关误判':>6s}")
+    best = None
+    for min_similarity in SIMILARITY_GRID:
+        for min_confidence in CONFIDENCE_GRID:
+            stats = evaluate(results, labels, min_similarity, min_confidence)
+            accuracy = f"{stats['accuracy'] * 100:7.1f}%" if stats["accuracy"] is not None else "      -"
+            default = " <- 默认" if (min_similarity, min_confidence) == (INTENT_MIN_SIMILARITY, INTENT_MIN_CONFIDENCE) else ""
+            print(f"{min_similarity:11.2f} {min_confidence:9.2f} {stats['coverage'] * 100:11.1f}% {accuracy:>12s} {stats['off_topic']:9d}{default}")
+            # 满足目标时取本地作答最多的组合，作答相同时取更严格的阈值
+            if stats["accuracy"] is not None and stats["accuracy"] >= target and stats["off_topic"] == 0 \
+                    and (best is None or stats["answered"] >= best[2]["answered"]):
+                best = (min_similarity, min_confidence, stats)
+
+    if best is None:
+        print(f"没有本地准确率达到 {target * 100:.0f}% 且无无关误判的阈值组合，建议保持 INTENT_CLASSIFIER=false")
+        return
+    min_similarity, min_confidence, stats = best
+    print(f"建议: INTENT_MIN_SIMILARITY={min_similarity} INTENT_MIN_CONFIDENCE={min_confidence}，"
+          f"本地作答 {stats['coverage'] * 100:.1f}%，本地准确率 {stats['accuracy'] * 100:.1f}%")
+    for label, (answered, total) in stats["per_label"].items():
+        print(f"  {label}: 本地作答 {answered}/{total}")
+
+
+if __name__ == "__main__":
+    main()
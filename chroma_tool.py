@@ -1,7 +1,8 @@
 import os  # 导入操作系统模块，用于文件和目录操作
 import json  # 导入JSON模块，用于读写JSON文件
 import chromadb  # 导入ChromaDB客户端库
-from text2vec import SentenceModel  # 从text2vec库导入SentenceModel，用于加载预训练模型并生成文本向量
+from services.model_registry import get_text_model  # 导入共享的文本向量化模型
+from services.chroma_sercice import build_chroma_collection  # 导入集合增量同步
 
 # 注意：此脚本现在使用客户端-服务器模式，需要一个正在运行的 ChromaDB 实例。
 # 您可以使用 Docker 启动一个： docker run -p 8000:8000 chromadb/chroma
@@ -43,57 +44,12 @@ def scan_and_process_datawork(root_dir):  # 定义函数，用于扫描指定目
     return datawork_json  # 返回包含所有处理后数据的列表
 
 def get_model():
-    # 2. 加载文本向量化模型
-    print("正在加载模型 shibing624/text2vec-base-chinese (使用 text2vec)...")  # 打印模型加载提示
-    try:  # 尝试加载模型
-        model = SentenceModel('shibing624/text2vec-base-chinese')  # 实例化SentenceModel并加载模型
-        return model  # 返回加载的模型实例
-    except Exception as e:  # 捕获加载异常
-        print(f"加载模型失败: {e}")  # 打印失败信息
-        return None
+    # 2. 获取文本向量化模型（进程内只加载一次，加载失败返回None）
+    return get_text_model()
 
 # --- ChromaDB 操作 ---
 
-# 3. 构建或更新 ChromaDB 集合
-def build_chroma_collection(model, data_list, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):  # 定义构建集合的函数
-    if not data_list:  # 检查数据列表是否为空
-        print("没有数据可用于构建集合。")  # 打印提示
-        return  # 提前退出
-
-    if model is None:  # 检查模型是否加载成功
-        print("模型未加载，无法生成向量。")  # 打印提示
-        return  # 提前退出
-
-    print(f"正在为 {len(data_list)} 个条目生成向量...")  # 打印向量生成提示
-    contents = [item['content'] for item in data_list]  # 提取所有待处理的文本内容
-    embeddings = model.encode(contents, show_progress_bar=True)  # 批量将文本编码为向量
-
-    print(f"正在连接到 ChromaDB 服务器 (地址: {host}:{port})...")  # 打印连接数据库的提示
-    client = chromadb.HttpClient(host=host, port=port)  # 创建一个连接到服务器的ChromaDB客户端实例
-
-    print(f"正在获取或创建集合: {collection_name}...")  # 打印集合操作的提示
-    collection = client.get_or_create_collection(name=collection_name)  # 获取或创建一个新的集合
-
-    batch_size = 5000  # 设置每个批次的大小，以避免超出ChromaDB的最大限制
-    total_items = len(data_list)  # 获取数据总数
-    for i in range(0, total_items, batch_size):  # 遍历所有数据，步长为批次大小
-        batch_end = min(i + batch_size, total_items)  # 计算当前批次的结束索引
-        print(f"正在向集合中添加/更新条目 {i + 1} 到 {batch_end} (共 {total_items} 条)...")  # 打印当前批次处理的进度信息
-
-        # 为当前批次准备数据
-        batch_data = data_list[i:batch_end]  # 获取当前批次的数据列表
-        batch_embeddings = embeddings[i:batch_end]  # 获取当前批次的向量
-        batch_documents = [item['content'] for item in batch_data]  # 获取当前批次的文档内容
-        batch_metadatas = [{"clazz": item['clazz'], "field": item['field']} for item in batch_data]  # 获取当前批次的元数据
-        batch_ids = [item['id'] for item in batch_data]  # 获取当前批次的ID
-
-        collection.upsert(  # 使用upsert方法添加或更新当前批次的数据
-            embeddings=batch_embeddings.tolist(),  # 将numpy数组格式的向量转换为列表
-            documents=batch_documents,  # 提供当前批次的原始文本文档
-            metadatas=batch_metadatas,  # 提供当前批次的元数据
-            ids=batch_ids  # 提供当前批次的唯一ID列表
-        )  # 结束当前批次的upsert操作
-    print("集合构建/更新完成。")  # 所有批次处理完成后打印最终提示
+# 3. 构建或更新 ChromaDB 集合：使用 services/chroma_sercice.py 中的 build_chroma_collection（增量同步）
 
 # 4. 从 ChromaDB 查询相似字段
 def search_similar_field_chroma(model, query_text, k=3, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):  # 定义查询函数
@@ -154,19 +110,21 @@ def clear_chroma(host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME
 def build_chroma():
     # --- 步骤一：构建索引 (如果需要，取消注释来运行) ---
     print("--- 开始构建 ChromaDB 集合 ---")
+    report = None # 同步统计
     model = get_model() # 统一加载模型
     if not model:
-        return # 模型加载失败则退出
+        return report # 模型加载失败则退出
 
     base_dir = os.path.dirname(os.path.abspath(__file__)) # 获取当前脚本的绝对目录
     datawork_dir = os.path.join(base_dir, "scheme")  # 构建datawork目录的路径
     if os.path.exists(datawork_dir):  # 检查目录是否存在
          json_data = scan_and_process_datawork(datawork_dir)  # 扫描并处理数据
          if json_data:  # 如果有数据
-             build_chroma_collection(model, json_data)  # 构建ChromaDB集合
+             report = build_chroma_collection(model, json_data)  # 增量同步ChromaDB集合，只处理新增、变化和删除的条目
     else:
         print(f"目录未找到: {datawork_dir}")
     print("--- 集合构建完成 ---\n")
+    return report
 
 def search():
     # --- 步骤二：执行查询 ---
@@ -13,19 +13,17 @@ root_dir = os.path.dirname(parent_dir) # 获取项目根目录
 load_dotenv() # 加载根目录下的 .env 文件
 
 import re
-from neo4j import GraphDatabase
+from services.neo4j_driver import get_driver, neo4j_session, close_driver  # 导入共享的Neo4j驱动
 import psycopg2
 import pandas as pd
 import json
 import services.auth_service as auth_service
+import services.http_client as http_client
 import requests
 import json # 导入json库
 
 # ================= 配置区 =================
-# Neo4j 配置 (请根据你的实际情况修改)
-NEO4J_URI = "neo4j://127.0.0.1:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "12345678"  # 替换为你刚才设置的密码
+# Neo4j 配置统一由 services/neo4j_driver.py 从环境变量读取（NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD）
 
 # Supabase (Postgres) 配置
 PG_CONN_STR = "postgresql://192.168.0.33:5432/xy_erp_fwz_ai_test?user=root&password=123456"
@@ -91,13 +89,12 @@ def save_to_neo4j(label, records, schema_map):
         :param schema_map: 字段含义映射 (Dict)
         """
 
-        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-        # 验证连接是否可用
-        driver.verify_connectivity()
+        # 验证共享驱动的连接是否可用
+        get_driver().verify_connectivity()
         print("✅ 连接成功！Neo4j 服务运行正常且可访问。")
         
         # 简单查询测试
-        with driver.session() as session:
+        with neo4j_session() as session:
             # 1. 确定主键
             pk_field = None
             
@@ -184,9 +181,9 @@ def getData(access_token,data):
                     
                     url = f"{BASE_URL}{url}?access_token={access_token}"
 
-                    # 发送POST请求
+                    # 通过共享长连接会话发送POST请求
                     if params:
-                        response = requests.post(url, json=params)
+                        response = http_client.post(url, json=params)
                         
                     response.raise_for_status()  # 检查请求是否成功
                     
@@ -226,8 +223,6 @@ def create_relations_from_link_table(source_label, target_label, rel_type, link_
         print("  ⚠️ 过滤后无有效关系数据，跳过")
         return
 
-    # 连接到 Neo4j 数据库
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
     # 打印开始创建关系的信息
     print(f"🚀 开始批量创建关系: ({source_label}) -[{rel_type}]-> ({target_label})，共 {len(link_data)} 条")
@@ -246,7 +241,7 @@ def create_relations_from_link_table(source_label, target_label, rel_type, link_
     """
     
     # 创建一个会话来执行查询
-    with driver.session() as session:
+    with neo4j_session() as session:
         # 分批处理数据
         for i in range(0, total, batch_size):
             # 获取当前批次的数据
@@ -258,8 +253,6 @@ def create_relations_from_link_table(source_label, target_label, rel_type, link_
             
     # 打印关系导入完成的信息
     print(f"  ✅ 关系导入完成")
-    # 关闭数据库连接
-    driver.close()
 
 
 def get_link_data(access_token: str, relation_info: dict):  # 定义测试函数
@@ -451,8 +444,7 @@ def renew():
     """
     清空 Neo4j 数据库中的所有数据和约束。
     """
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) # 连接到Neo4j数据库
-    with driver.session() as session: # 创建一个会话
+    with neo4j_session() as session: # 创建一个会话
         print("正在清空 Neo4j 数据库...") # 打印开始清空数据库的日志
         try:
             # 删除所有约束
@@ -468,7 +460,6 @@ def renew():
             print("✅ Neo4j 数据库已清空。") # 打印数据库清空成功的日志
         except Exception as e: # 捕获异常
             print(f"❌ 清空数据库时出错: {e}") # 打印错误日志
-    driver.close() # 关闭数据库连接
 
 
 def rebuild_graph_database():
@@ -526,7 +517,6 @@ def create_parent():
         return # 结束函数执行
 
     print("开始创建父子关系...") # 打印任务开始的提示信息
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) # 初始化Neo4j数据库驱动
 
     try: # 使用try-except块来处理潜在的文件读取和JSON解析错误
         with open(MCP_RELATION_PATH, 'r', encoding='utf-8') as f: # 以只读模式打开JSON配置文件
@@ -538,7 +528,7 @@ def create_parent():
             print("  🤷‍♂️ JSON文件中没有找到'parent_relations'数据或列表为空。") # 如果列表为空，则打印提示信息
             return # 结束函数执行
 
-        with driver.session() as session: # 创建一个数据库会话
+        with neo4j_session() as session: # 创建一个数据库会话
             for rel_info in parent_relations: # 遍历每个父子关系定义
                 child_clazz = rel_info.get("t") # 获取子节点的标签
                 parent_clazz = rel_info.get("s") # 获取父节点的标签
@@ -586,9 +576,6 @@ def create_parent():
         print(f"  ❌ 无法解析JSON文件: {MCP_RELATION_PATH}") # 打印文件解析失败的错误信息
     except Exception as e: # 捕获其他所有异常
         print(f"  ❌ 处理父子关系时出错: {e}") # 打印通用错误信息
-    finally: # 使用finally块确保数据库驱动被关闭
-        if 'driver' in locals() and driver: # 检查driver是否已成功初始化
-            driver.close() # 关闭数据库驱动连接
 
 
 
@@ -625,9 +612,8 @@ def clear_graph_database():
     警告：这将删除所有节点和关系！
     """
     print("⚠️ 正在清空 Neo4j 数据库...")
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
-    with driver.session() as session:
+    with neo4j_session() as session:
         # 使用 DETACH DELETE 删除所有节点及其关系
         # 对于大数据量，建议分批删除，避免事务日志溢出
         
@@ -664,8 +650,7 @@ def clear_graph_database():
                 print("✅ 数据库已清空 (一次性删除模式)")
             except Exception as e2:
                 print(f"  ❌ 一次性删除也失败: {e2}")
-            
-    driver.close()
+
 
 
 
@@ -678,58 +663,52 @@ def select_path(clazz_list):
     if not clazz_list or len(clazz_list) < 2: # 校验输入是否有效
         return []
 
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) # 创建 Neo4j 驱动连接
     full_results = [] # 存储所有片段的结果
     
-    try: # 使用 try-finally 确保资源释放
-        with driver.session() as session: # 创建数据库会话
-            # 遍历标签数组，处理每一对相邻的标签
-            for i in range(len(clazz_list) - 1):
-                start_clazz = clazz_list[i] # 当前片段起点
-                end_clazz = clazz_list[i+1] # 当前片段终点
-                
-                # 构建 Cypher 查询，查找 1-5 跳的路径（无向查询，忽略箭头方向）
-                # 使用 -[...]-( 而不是 -[...]-> 确保能找到反向或混合方向的关联
-                cypher = f"""
-                MATCH p = (a:`{start_clazz}`)-[*1..5]-(b:`{end_clazz}`) 
-                WITH p, [rel IN relationships(p) | type(rel)] AS path_signature 
-                RETURN 
-                    path_signature, 
-                    collect(p) AS paths, 
-                    count(p) AS number_of_paths
-                """
-                
-                print(f"执行路径聚合查询: {start_clazz} -> {end_clazz}") # 打印日志
-                result = session.run(cypher) # 执行 Cypher 查询
-                
-                segment_data = { # 当前片段的数据容器
-                    "segment_index": i, # 片段序号
-                    "start_clazz": start_clazz, # 起点标签
-                    "end_clazz": end_clazz, # 终点标签
-                    "connections": [] # 存储该片段的所有连接模式
+    with neo4j_session() as session: # 创建数据库会话
+        # 遍历标签数组，处理每一对相邻的标签
+        for i in range(len(clazz_list) - 1):
+            start_clazz = clazz_list[i] # 当前片段起点
+            end_clazz = clazz_list[i+1] # 当前片段终点
+            
+            # 构建 Cypher 查询，查找 1-5 跳的路径（无向查询，忽略箭头方向）
+            # 使用 -[...]-( 而不是 -[...]-> 确保能找到反向或混合方向的关联
+            cypher = f"""
+            MATCH p = (a:`{start_clazz}`)-[*1..5]-(b:`{end_clazz}`) 
+            WITH p, [rel IN relationships(p) | type(rel)] AS path_signature 
+            RETURN 
+                path_signature, 
+                collect(p) AS paths, 
+                count(p) AS number_of_paths
+            """
+            
+            print(f"执行路径聚合查询: {start_clazz} -> {end_clazz}") # 打印日志
+            result = session.run(cypher) # 执行 Cypher 查询
+            
+            segment_data = { # 当前片段的数据容器
+                "segment_index": i, # 片段序号
+                "start_clazz": start_clazz, # 起点标签
+                "end_clazz": end_clazz, # 终点标签
+                "connections": [] # 存储该片段的所有连接模式
+            }
+            
+            for record in result: # 遍历查询结果的每一行
+                item = { # 构建结果项字典
+                    "signature": record["path_signature"], # 获取路径签名（关系类型列表）
+                    "count": record["number_of_paths"], # 获取该签名下的路径总数
+                    "paths": [] # 初始化该签名下的路径详情列表
                 }
                 
-                for record in result: # 遍历查询结果的每一行
-                    item = { # 构建结果项字典
-                        "signature": record["path_signature"], # 获取路径签名（关系类型列表）
-                        "count": record["number_of_paths"], # 获取该签名下的路径总数
-                        "paths": [] # 初始化该签名下的路径详情列表
-                    }
-                    
-                    # 遍历该分组下的所有路径对象
-                    for path_obj in record["paths"]: 
-                        # 调用 serialize_path 函数序列化路径（该函数需在作用域内可用）
-                        item["paths"].append(serialize_path(path_obj)) 
-                    
-                    segment_data["connections"].append(item) # 将构建好的项加入片段连接列表
-                
-                full_results.append(segment_data) # 将当前片段数据加入总结果
+                # 遍历该分组下的所有路径对象
+                for path_obj in record["paths"]: 
+                    # 调用 serialize_path 函数序列化路径（该函数需在作用域内可用）
+                    item["paths"].append(serialize_path(path_obj)) 
                 
-            return full_results # 返回所有片段的聚合数据
+                segment_data["connections"].append(item) # 将构建好的项加入片段连接列表
             
-    finally: # 无论是否发生异常
-        driver.close() # 关闭数据库驱动连接
-
+            full_results.append(segment_data) # 将当前片段数据加入总结果
+            
+        return full_results # 返回所有片段的聚合数据
 
 
 
@@ -828,9 +807,8 @@ def useGDS(node_labels: list, max_hops: int = 8):
     print(pure_cypher_query)
     # 执行查询并处理结果
     try:
-        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
-        with driver.session() as session:
+        with neo4j_session() as session:
             result = session.run(pure_cypher_query)
             # 直接将 result 对象传递给辅助函数进行迭代处理
             return _format_records_to_graph_json(result)
@@ -857,6 +835,7 @@ if __name__ == '__main__':
     #renameJSON()
     #clear_graph_database()
     rebuild_graph_database() 
+    close_driver() # 关闭共享的Neo4j驱动
   
     """
     relation_info =  {
@@ -2,7 +2,7 @@ import os  # 导入操作系统模块
 import json  # 导入 JSON 处理模块
 import numpy as np  # 导入 numpy 用于数组处理
 import faiss  # 导入 FAISS 用于向量检索
-from sentence_transformers import SentenceTransformer  # 导入 SentenceTransformer 用于加载模型
+from services.model_registry import get_text_model  # 导入共享的文本向量化模型
 
 # 1. 轮询 datawork JSON 文件并整理
 def scan_and_process_datawork(root_dir):  # 定义函数，参数为根目录
@@ -42,17 +42,13 @@ def scan_and_process_datawork(root_dir):  # 定义函数，参数为根目录
 # 2. 辅助函数：获取向量
 # 加载 HuggingFace 上的中文模型 shibing624/text2vec-base-chinese
 # 注意：首次运行会自动下载模型
-print("Loading model shibing624/text2vec-base-chinese...")  # 打印加载提示
-try:
-    model = SentenceTransformer('shibing624/text2vec-base-chinese')  # 加载模型
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model = None
+# 使用进程内共享的模型，第一次用到时才加载
 
 def get_embedding(text):  # 定义获取向量的函数
     """
     获取文本的向量表示
     """
+    model = get_text_model()  # 获取共享的模型
     if model is None: 
         raise ValueError("Model not loaded")
     # 使用 model.encode 获取向量
@@ -71,6 +67,7 @@ def save_to_faiss(data_list, index_file="datawork.index", meta_file="datawork_me
     contents = [item['content'] for item in data_list]  # 提取 content 列表
     
     # 批量获取向量
+    model = get_text_model()  # 获取共享的模型
     if model is None:
         print("Model not loaded, cannot generate embeddings.")
         return
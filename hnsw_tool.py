@@ -2,7 +2,7 @@ import os  # 导入操作系统模块，用于文件和目录操作
 import json  # 导入JSON模块，用于读写JSON文件
 import numpy as np  # 导入NumPy库，用于高效的数值运算，特别是数组操作
 import hnswlib  # 导入HNSWlib库，用于高效的近似最近邻搜索
-from text2vec import SentenceModel  # 从text2vec库导入SentenceModel，用于加载预训练模型并生成文本向量
+from services.model_registry import get_text_model  # 导入共享的文本向量化模型
 
 # 1. 轮询 datawork 目录下的JSON文件并整理数据结构
 def scan_and_process_datawork(root_dir):  # 定义函数，用于扫描指定目录并处理数据
@@ -39,15 +39,8 @@ def scan_and_process_datawork(root_dir):  # 定义函数，用于扫描指定目
                     
     return datawork_json  # 返回包含所有处理后数据的列表
 
-# 2. 加载文本向量化模型
-# 加载HuggingFace上的预训练中文模型'shibing624/text2vec-base-chinese'
-# 注意：首次运行时会自动从网上下载模型文件
-print("正在加载模型 shibing624/text2vec-base-chinese (使用 text2vec)...")  # 打印模型加载提示信息
-try:  # 尝试加载模型
-    model = SentenceModel('shibing624/text2vec-base-chinese')  # 实例化SentenceModel并加载指定模型
-except Exception as e:  # 捕获加载模型时可能发生的异常
-    print(f"加载模型失败: {e}")  # 打印失败信息
-    model = None  # 将model变量设置为None，表示模型不可用
+# 2. 文本向量化模型
+# 使用进程内共享的模型，第一次用到时才加载（注意：首次运行时会自动从网上下载模型文件）
 
 # 3. 将数据存入 HNSWlib 索引
 def save_to_hnsw(data_list, index_file="datawork_hnsw.index", meta_file="datawork_meta.json"):  # 定义函数，将数据保存为HNSW索引和元数据文件
@@ -57,6 +50,7 @@ def save_to_hnsw(data_list, index_file="datawork_hnsw.index", meta_file="datawor
         
     print(f"正在为 {len(data_list)} 个条目生成向量...")  # 打印将要处理的条目数量
     contents = [item['content'] for item in data_list]  # 从数据列表中提取所有'content'字段，形成一个新列表
+    model = get_text_model()  # 获取共享的模型
     
     if model is None:  # 检查模型是否已成功加载
         print("模型未加载，无法生成向量。")  # 如果模型不可用，打印提示
@@ -109,6 +103,7 @@ def search_similar_fields(query_text, k=3, index_file="datawork_hnsw.index", met
     :return: 一个包含相似结果的列表，每个结果都是一个字典。
     """
     global p_query, metadata # 声明使用全局变量
+    model = get_text_model() # 获取共享的模型
 
     # 检查向量化模型是否已加载
     if model is None:
@@ -5,11 +5,36 @@ from fastapi.middleware.cors import CORSMiddleware
 # 导入认证路由器
 from api.v1 import intent, auth, health, chat, mcp, table
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from services.neo4j_driver import close_driver
+from services.neo4j_service import rebuild_relation_index
+from services.field_search import get_field_search_backend
+from services.embedding_worker import get_embedding_worker, shutdown_embedding_worker
+from services.intent_classifier import get_intent_classifier
+import asyncio
 import os
 
 import uvicorn  # 导入ASGI服务器
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时预先构建表关系路径索引
+    rebuild_relation_index()
+    # 启动时加载字段检索索引（或连接ChromaDB）
+    get_field_search_backend().load()
+    # 启动时加载并预热文本向量化模型、启动编码工作池，不阻塞事件循环
+    await asyncio.to_thread(get_embedding_worker)
+    # 编码意图示例，构建本地意图分类器
+    await asyncio.to_thread(get_intent_classifier)
+    yield
+    # 服务关闭时释放共享的Neo4j连接池
+    close_driver()
+    # 等待进行中的编码完成后关闭工作池
+    shutdown_embedding_worker()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 添加CORS中间件配置
 app.add_middleware(
@@ -1,4 +1,10 @@
 from fastmcp import FastMCP # 导入FastMCP
+from starlette.requests import Request # 导入请求对象
+from starlette.responses import JSONResponse # 导入JSON响应
+
+from services.cache import local_cache_stats
+from services.http_client import latency_stats
+from services.neo4j_driver import close_driver, pool_stats
 
 from services.admin_service import admin_mcp
 from services.auth_service import auth_mcp
@@ -34,8 +40,23 @@ mcp.mount(quality_mcp, prefix="quality")
 mcp.mount(task_mcp, prefix="task")
 mcp.mount(work_mcp, prefix="work")
 
+@mcp.custom_route("/cache/stats", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse: # 进程内表缓存统计
+    return JSONResponse(local_cache_stats())
+
+@mcp.custom_route("/http/stats", methods=["GET"])
+async def http_stats(request: Request) -> JSONResponse: # 上游ERP接口耗时直方图
+    return JSONResponse(latency_stats())
+
+@mcp.custom_route("/neo4j/stats", methods=["GET"])
+async def neo4j_stats(request: Request) -> JSONResponse: # Neo4j连接池统计
+    return JSONResponse(pool_stats())
+
 def main(): # 定义主函数
-    mcp.run(transport='sse', port=9050, host='0.0.0.0') # 运行MCP服务
+    try:
+        mcp.run(transport='sse', port=9050, host='0.0.0.0') # 运行MCP服务
+    finally:
+        close_driver() # 服务退出时释放共享的Neo4j连接池
 
 if __name__ == "__main__": # 判断是否为主程序入口
     main() # 调用主函数
\ No newline at end of file
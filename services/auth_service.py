@@ -1,5 +1,6 @@
 from fastmcp import FastMCP
 import requests
+import services.http_client as http_client
 import json
 import os
 from dotenv import load_dotenv
@@ -58,7 +59,7 @@ def auth_login() -> str:
 
     try:
         # 发送POST请求获取令牌
-        response = requests.get(url, params=params, timeout=30)
+        response = http_client.get(url, params=params)
         # 检查HTTP状态码
         response.raise_for_status()
 
@@ -1,49 +1,104 @@
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import csv
+import hashlib
 import io
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
+import pandas as pd
+import pyarrow as pa
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 from dotenv import load_dotenv
 
 
-# Redis连接池（懒加载）
+# Redis连接池与客户端（懒加载）
 _redis_pool = None
+_redis_client = None
+# 异步Redis连接池与客户端（懒加载，供FastAPI/FastMCP异步处理函数使用）
+_async_redis_pool = None
+_async_redis_client = None
+
+# 列式表缓存的文件头（Arrow IPC文件格式自带的魔数）
+_ARROW_MAGIC = b"ARROW1"
+# 列式表缓存的压缩算法
+_ARROW_COMPRESSION = "zstd"
+
+# 进程内DataFrame缓存（LRU，按内存上限淘汰）：token -> (DataFrame, 过期时间戳, 占用字节)
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+_local_cache_bytes = 0
+_local_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+# 进程内缓存的内存上限（MB）
+LOCAL_CACHE_MAX_MB = int(os.getenv("LOCAL_CACHE_MAX_MB", "256"))
+
+
+def _redis_pool_kwargs() -> dict:
+    """
+    读取环境变量，生成同步与异步连接池共用的配置（私有方法）
+
+    Returns:
+        dict: 连接池配置
+    """
+    # 加载环境变量
+    load_dotenv()
+
+    # Redis连接配置
+    REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+    REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+    # 连接池配置
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))  # 最大连接数
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))  # 等待空闲连接的超时（秒）
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))  # 读写超时（秒）
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))  # 健康检查间隔（秒）
+    return {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "db": REDIS_DB,
+        "password": REDIS_PASSWORD,
+        "decode_responses": False,  # 列式表缓存为二进制，文本在读取时自行解码
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_keepalive": True,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_error": [redis.ConnectionError, redis.TimeoutError],
+    }
 
 
 def _get_redis_client():
     """
     获取Redis客户端实例（私有方法）
 
+    连接池为阻塞式：连接耗尽时等待空闲连接，超过REDIS_POOL_TIMEOUT秒才报错；
+    空闲连接在复用前按REDIS_HEALTH_CHECK_INTERVAL做健康检查，连接或超时错误
+    按指数退避自动重试，因此调用方无需在每次读写前PING。
+
     Returns:
         redis.Redis: Redis客户端实例
 
     Raises:
         Exception: 当Redis连接失败时抛出
     """
-    global _redis_pool
+    global _redis_pool, _redis_client
 
     # 如果连接池不存在，创建新的连接池
     if _redis_pool is None:
-        # 加载环境变量
-        load_dotenv()
-
-        # Redis连接配置
-        REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-        REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
-        REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-        REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
-        # 创建Redis连接池
-        _redis_pool = redis.ConnectionPool(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            db=REDIS_DB,
-            password=REDIS_PASSWORD,
-            decode_responses=True,
-            max_connections=10
+        _redis_pool = redis.BlockingConnectionPool(
+            **_redis_pool_kwargs(),
+            retry=Retry(ExponentialBackoff(cap=1, base=0.05), int(os.getenv("REDIS_RETRIES", "3"))),
         )
+        _redis_client = redis.Redis(connection_pool=_redis_pool)
 
-    # 从连接池获取Redis客户端
-    return redis.Redis(connection_pool=_redis_pool)
+    # 返回共享的Redis客户端
+    return _redis_client
 
 
 def cache_load(token: str) -> Optional[str]:
@@ -64,9 +119,6 @@ def cache_load(token: str) -> Optional[str]:
         # 获取Redis客户端
         redis_client = _get_redis_client()
 
-        # 检查Redis连接是否正常
-        redis_client.ping()
-
         # 使用token作为键从Redis获取缓存数据
         cached_data = redis_client.get(token)
 
@@ -74,12 +126,12 @@ def cache_load(token: str) -> Optional[str]:
         if cached_data is None:
             return None
 
-        # 如果缓存数据已经是CSV格式字符串，直接返回
-        if isinstance(cached_data, str):
-            return cached_data
+        # 列式表缓存，仅在需要返回文本时转换为CSV
+        if cached_data.startswith(_ARROW_MAGIC):
+            return _arrow_to_df(cached_data).to_csv(index=False)
 
-        # 如果缓存数据是其他格式，尝试转换为CSV格式
-        return _convert_to_csv(cached_data)
+        # 旧的CSV格式字符串，解码后直接返回
+        return cached_data.decode("utf-8")
 
     except redis.ConnectionError as e:
         # Redis连接异常
@@ -92,6 +144,269 @@ def cache_load(token: str) -> Optional[str]:
         raise Exception(f"缓存读取失败: {str(e)}")
 
 
+def cache_load_df(token: str) -> Optional[pd.DataFrame]:
+    """
+    从Redis缓存中读取数据并返回DataFrame
+
+    先读取进程内LRU缓存，未命中时再读取Redis：列式表缓存直接还原为带类型的
+    DataFrame，不经过文本解析；旧的CSV格式缓存按CSV解析，保证兼容。
+
+    Args:
+        token: 访问令牌，用作Redis的键
+
+    Returns:
+        pd.DataFrame: 缓存的数据表，如果缓存不存在则返回None
+
+    Raises:
+        Exception: 当Redis连接失败或数据处理异常时抛出
+    """
+    # 优先读取进程内缓存，命中时返回副本，避免调用方修改缓存中的数据
+    df = _local_get(token)
+    if df is not None:
+        return df.copy()
+
+    try:
+        # 获取Redis客户端
+        redis_client = _get_redis_client()
+
+        # 同一次往返中读取缓存数据和剩余过期时间（毫秒）
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(token)
+        pipe.pttl(token)
+        cached_data, ttl_ms = pipe.execute()
+
+        # 如果缓存不存在，返回None
+        if cached_data is None:
+            return None
+
+        # 还原为DataFrame
+        df = _decode_df(cached_data)
+
+        # 写入进程内缓存，过期时间跟随Redis
+        if ttl_ms > 0:
+            _local_put(token, df.copy(), ttl_ms / 1000)
+        return df
+
+    except redis.ConnectionError as e:
+        # Redis连接异常
+        raise Exception(f"Redis连接失败: {str(e)}")
+    except redis.TimeoutError as e:
+        # Redis超时异常
+        raise Exception(f"Redis操作超时: {str(e)}")
+    except Exception as e:
+        # 其他异常
+        raise Exception(f"缓存读取失败: {str(e)}")
+
+
+def _decode_df(cached_data: bytes) -> pd.DataFrame:
+    """
+    将Redis中的缓存数据还原为DataFrame（私有方法）
+
+    Args:
+        cached_data: Redis返回的原始字节
+
+    Returns:
+        pd.DataFrame: 还原后的DataFrame
+    """
+    if cached_data.startswith(_ARROW_MAGIC):
+        # 列式表缓存，直接还原为DataFrame
+        return _arrow_to_df(cached_data)
+    # 旧的CSV格式字符串，按CSV解析
+    return pd.read_csv(io.StringIO(cached_data.decode("utf-8")), sep=',')
+
+
+def _encode_payload(data):
+    """
+    将要缓存的数据编码为写入Redis的内容（私有方法）
+
+    Args:
+        data: 要缓存的数据，DataFrame按列式二进制存储，其他数据按CSV存储
+
+    Returns:
+        bytes | str: 写入Redis的内容
+    """
+    if isinstance(data, pd.DataFrame):
+        # DataFrame编码为列式二进制，保留数据类型
+        return _df_to_arrow(data)
+    # 将数据转换为CSV格式字符串
+    return _convert_to_csv(data)
+
+
+def _local_get(token: str) -> Optional[pd.DataFrame]:
+    """
+    从进程内缓存读取DataFrame，过期则删除（私有方法）
+
+    Args:
+        token: 访问令牌
+
+    Returns:
+        pd.DataFrame: 缓存的数据表，未命中或已过期返回None
+    """
+    global _local_cache_bytes
+    with _local_cache_lock:
+        entry = _local_cache.get(token)
+        if entry is not None and entry[1] <= time.monotonic():
+            # 已过期，删除并按未命中处理
+            _local_cache.pop(token)
+            _local_cache_bytes -= entry[2]
+            entry = None
+        if entry is None:
+            _local_cache_stats["misses"] += 1
+            return None
+        # 命中，移动到LRU队尾
+        _local_cache.move_to_end(token)
+        _local_cache_stats["hits"] += 1
+        return entry[0]
+
+
+def _local_put(token: str, df: pd.DataFrame, expire_time: float):
+    """
+    写入进程内缓存，超过内存上限时按LRU淘汰（私有方法）
+
+    Args:
+        token: 访问令牌
+        df: 需要缓存的DataFrame
+        expire_time: 过期时间（秒）
+    """
+    global _local_cache_bytes
+    size = int(df.memory_usage(deep=True).sum())
+    max_bytes = LOCAL_CACHE_MAX_MB * 1024 * 1024
+    with _local_cache_lock:
+        _local_invalidate_locked(token)
+        # 单表超过上限时不缓存
+        if size > max_bytes:
+            return
+        _local_cache[token] = (df, time.monotonic() + expire_time, size)
+        _local_cache_bytes += size
+        # 超过内存上限，淘汰最久未使用的表
+        while _local_cache_bytes > max_bytes:
+            _, (_, _, evicted_size) = _local_cache.popitem(last=False)
+            _local_cache_bytes -= evicted_size
+            _local_cache_stats["evictions"] += 1
+
+
+def _local_invalidate_locked(token: str):
+    """
+    删除进程内缓存中的表，调用方需持有锁（私有方法）
+    """
+    global _local_cache_bytes
+    entry = _local_cache.pop(token, None)
+    if entry is not None:
+        _local_cache_bytes -= entry[2]
+
+
+def _local_after_save(token: str, data, saved: bool, expire_time: int):
+    """
+    写入Redis后同步进程内缓存（私有方法）
+    """
+    if saved and isinstance(data, pd.DataFrame):
+        # 覆盖写入进程内缓存，下一步工具可直接命中
+        _local_put(token, data.copy(), expire_time)
+    else:
+        # 非表格数据或写入失败，删除进程内旧数据
+        local_cache_invalidate(token)
+
+
+def local_cache_get(token: str) -> Optional[pd.DataFrame]:
+    """
+    仅读取进程内缓存，不访问Redis
+
+    Args:
+        token: 访问令牌
+
+    Returns:
+        pd.DataFrame: 缓存数据表的副本，未命中返回None
+    """
+    df = _local_get(token)
+    return df.copy() if df is not None else None
+
+
+def local_cache_put(token: str, df: pd.DataFrame, expire_time: float = 600):
+    """
+    仅写入进程内缓存，不写Redis（用于按查询计划计算出的结果表）
+
+    Args:
+        token: 访问令牌
+        df: 需要缓存的DataFrame
+        expire_time: 过期时间（秒），默认10分钟
+    """
+    _local_put(token, df.copy(), expire_time)
+
+
+def local_cache_invalidate(token: str):
+    """
+    删除进程内缓存中的表
+
+    Args:
+        token: 访问令牌
+    """
+    with _local_cache_lock:
+        _local_invalidate_locked(token)
+
+
+def local_cache_stats() -> dict:
+    """
+    获取进程内缓存的统计信息，用于评估缓存容量
+
+    Returns:
+        dict: 命中数、未命中数、命中率、淘汰数、表数量、占用字节和内存上限
+    """
+    with _local_cache_lock:
+        hits = _local_cache_stats["hits"]
+        misses = _local_cache_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": _local_cache_stats["evictions"],
+            "entries": len(_local_cache),
+            "bytes": _local_cache_bytes,
+            "max_bytes": LOCAL_CACHE_MAX_MB * 1024 * 1024,
+        }
+
+
+def _df_to_arrow(df: pd.DataFrame) -> bytes:
+    """
+    将DataFrame编码为压缩的Arrow IPC二进制
+
+    Args:
+        df: 需要编码的DataFrame
+
+    Returns:
+        bytes: Arrow IPC文件格式的二进制数据
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 混合类型的object列无法推断Arrow类型，统一转为字符串列
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].astype("string")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # 写入Arrow IPC文件格式（列块压缩）
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=_ARROW_COMPRESSION)
+    with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_to_df(data: bytes) -> pd.DataFrame:
+    """
+    将Arrow IPC二进制还原为DataFrame
+
+    Args:
+        data: Arrow IPC文件格式的二进制数据
+
+    Returns:
+        pd.DataFrame: 还原后的DataFrame
+    """
+    reader = pa.ipc.open_file(pa.BufferReader(data))
+    return reader.read_all().to_pandas()
+
+
 def _convert_to_csv(data) -> str:
     """
     将数据转换为CSV格式字符串
@@ -145,7 +460,7 @@ def cache_save(token: str, data, expire_time: int = 600) -> bool:
 
     Args:
         token: 访问令牌，用作Redis的键
-        data: 要缓存的数据
+        data: 要缓存的数据，DataFrame按列式二进制存储，其他数据按CSV存储
         expire_time: 过期时间（秒），默认10分钟
 
     Returns:
@@ -156,11 +471,14 @@ def cache_save(token: str, data, expire_time: int = 600) -> bool:
         # 获取Redis客户端
         redis_client = _get_redis_client()
 
-        # 将数据转换为CSV格式字符串
-        csv_data = _convert_to_csv(data)
+        # 编码要缓存的数据
+        payload = _encode_payload(data)
 
         # 存储到Redis并设置过期时间
-        result = redis_client.setex(token, expire_time, csv_data)
+        result = redis_client.setex(token, expire_time, payload)
+
+        # 同步进程内缓存
+        _local_after_save(token, data, result, expire_time)
 
         return result
 
@@ -186,6 +504,7 @@ def cache_delete(token: str) -> bool:
         redis_client = _get_redis_client()
 
         # 删除缓存
+        local_cache_invalidate(token)
         result = redis_client.delete(token)
 
         return result > 0
@@ -194,3 +513,280 @@ def cache_delete(token: str) -> bool:
         # 记录错误日志（这里简化处理）
         print(f"缓存删除失败: {str(e)}")
         return False
+
+
+# --- 异步接口（redis.asyncio，独立连接池） ---
+
+def _get_async_redis_client() -> aioredis.Redis:
+    """
+    获取异步Redis客户端实例（私有方法）
+
+    使用独立的asyncio连接池，配置与同步连接池相同，
+    避免在事件循环中执行阻塞的Redis调用。
+
+    Returns:
+        redis.asyncio.Redis: 异步Redis客户端实例
+    """
+    global _async_redis_pool, _async_redis_client
+
+    # 如果连接池不存在，创建新的连接池
+    if _async_redis_pool is None:
+        _async_redis_pool = aioredis.BlockingConnectionPool(
+            **_redis_pool_kwargs(),
+            retry=aioredis.retry.Retry(ExponentialBackoff(cap=1, base=0.05), int(os.getenv("REDIS_RETRIES", "3"))),
+        )
+        _async_redis_client = aioredis.Redis(connection_pool=_async_redis_pool)
+
+    # 返回共享的异步Redis客户端
+    return _async_redis_client
+
+
+async def cache_load_async(token: str) -> Optional[str]:
+    """
+    cache_load 的异步版本，从Redis缓存中读取数据并返回CSV格式字符串
+
+    Args:
+        token: 访问令牌，用作Redis的键
+
+    Returns:
+        str: CSV格式的字符串数据，如果缓存不存在则返回None
+
+    Raises:
+        Exception: 当Redis连接失败或数据处理异常时抛出
+    """
+    try:
+        # 使用token作为键从Redis获取缓存数据
+        cached_data = await _get_async_redis_client().get(token)
+
+        # 如果缓存不存在，返回None
+        if cached_data is None:
+            return None
+
+        # 列式表缓存，仅在需要返回文本时转换为CSV（在线程池中执行，避免阻塞事件循环）
+        if cached_data.startswith(_ARROW_MAGIC):
+            df = await asyncio.to_thread(_arrow_to_df, cached_data)
+            return await asyncio.to_thread(df.to_csv, index=False)
+
+        # 旧的CSV格式字符串，解码后直接返回
+        return cached_data.decode("utf-8")
+
+    except redis.ConnectionError as e:
+        # Redis连接异常
+        raise Exception(f"Redis连接失败: {str(e)}")
+    except redis.TimeoutError as e:
+        # Redis超时异常
+        raise Exception(f"Redis操作超时: {str(e)}")
+    except Exception as e:
+        # 其他异常
+        raise Exception(f"缓存读取失败: {str(e)}")
+
+
+async def cache_load_df_async(token: str) -> Optional[pd.DataFrame]:
+    """
+    cache_load_df 的异步版本，从缓存中读取数据并返回DataFrame
+
+    Args:
+        token: 访问令牌，用作Redis的键
+
+    Returns:
+        pd.DataFrame: 缓存的数据表，如果缓存不存在则返回None
+
+    Raises:
+        Exception: 当Redis连接失败或数据处理异常时抛出
+    """
+    return (await cache_load_df_many_async([token]))[0]
+
+
+async def cache_load_df_many_async(tokens: list[str]) -> list[Optional[pd.DataFrame]]:
+    """
+    批量读取多个表，未命中进程内缓存的表在一次Redis往返（pipeline）中读取
+
+    Args:
+        tokens: 访问令牌列表
+
+    Returns:
+        list: 与tokens顺序一致的DataFrame列表，缓存不存在的位置为None
+
+    Raises:
+        Exception: 当Redis连接失败或数据处理异常时抛出
+    """
+    results = [None] * len(tokens)
+    missing = []
+    # 优先读取进程内缓存
+    for i, token in enumerate(tokens):
+        df = _local_get(token)
+        if df is not None:
+            results[i] = df.copy()
+        else:
+            missing.append(i)
+    if not missing:
+        return results
+
+    try:
+        # 在一次往返中读取所有未命中表的数据和剩余过期时间
+        pipe = _get_async_redis_client().pipeline(transaction=False)
+        for i in missing:
+            pipe.get(tokens[i])
+            pipe.pttl(tokens[i])
+        replies = await pipe.execute()
+
+        for n, i in enumerate(missing):
+            cached_data, ttl_ms = replies[2 * n], replies[2 * n + 1]
+            # 如果缓存不存在，保持None
+            if cached_data is None:
+                continue
+            # 还原为DataFrame（在线程池中执行，避免阻塞事件循环）
+            df = await asyncio.to_thread(_decode_df, cached_data)
+            # 写入进程内缓存，过期时间跟随Redis
+            if ttl_ms > 0:
+                _local_put(tokens[i], df.copy(), ttl_ms / 1000)
+            results[i] = df
+        return results
+
+    except redis.ConnectionError as e:
+        # Redis连接异常
+        raise Exception(f"Redis连接失败: {str(e)}")
+    except redis.TimeoutError as e:
+        # Redis超时异常
+        raise Exception(f"Redis操作超时: {str(e)}")
+    except Exception as e:
+        # 其他异常
+        raise Exception(f"缓存读取失败: {str(e)}")
+
+
+async def cache_mget_async(tokens: list[str]) -> list[Optional[str]]:
+    """
+    批量读取多个缓存的CSV格式字符串（MGET，一次往返）
+
+    Args:
+        tokens: 访问令牌列表
+
+    Returns:
+        list: 与tokens顺序一致的CSV字符串列表，缓存不存在的位置为None
+
+    Raises:
+        Exception: 当Redis连接失败或数据处理异常时抛出
+    """
+    try:
+        values = await _get_async_redis_client().mget(tokens)
+        results = []
+        for cached_data in values:
+            if cached_data is None:
+                results.append(None)
+            elif cached_data.startswith(_ARROW_MAGIC):
+                df = await asyncio.to_thread(_arrow_to_df, cached_data)
+                results.append(await asyncio.to_thread(df.to_csv, index=False))
+            else:
+                results.append(cached_data.decode("utf-8"))
+        return results
+
+    except redis.ConnectionError as e:
+        # Redis连接异常
+        raise Exception(f"Redis连接失败: {str(e)}")
+    except redis.TimeoutError as e:
+        # Redis超时异常
+        raise Exception(f"Redis操作超时: {str(e)}")
+    except Exception as e:
+        # 其他异常
+        raise Exception(f"缓存读取失败: {str(e)}")
+
+
+async def cache_save_async(token: str, data, expire_time: int = 600) -> bool:
+    """
+    cache_save 的异步版本，将数据存储到Redis缓存中
+
+    Args:
+        token: 访问令牌，用作Redis的键
+        data: 要缓存的数据，DataFrame按列式二进制存储，其他数据按CSV存储
+        expire_time: 过期时间（秒），默认10分钟
+
+    Returns:
+        bool: 存储成功返回True，失败返回False
+    """
+    return (await cache_save_many_async({token: data}, expire_time))[token]
+
+
+async def cache_save_many_async(items: dict, expire_time: int = 600) -> dict:
+    """
+    批量存储多个缓存数据，在一次Redis往返（pipeline）中写入
+
+    Args:
+        items: 访问令牌到数据的字典
+        expire_time: 过期时间（秒），默认10分钟
+
+    Returns:
+        dict: 访问令牌到是否存储成功的字典
+    """
+    try:
+        # 编码要缓存的数据（在线程池中执行，避免阻塞事件循环）
+        payloads = {}
+        for token, data in items.items():
+            payloads[token] = await asyncio.to_thread(_encode_payload, data)
+
+        # 存储到Redis并设置过期时间
+        pipe = _get_async_redis_client().pipeline(transaction=False)
+        for token, payload in payloads.items():
+            pipe.setex(token, expire_time, payload)
+        replies = await pipe.execute()
+
+        results = {}
+        for (token, data), result in zip(items.items(), replies):
+            # 同步进程内缓存
+            _local_after_save(token, data, result, expire_time)
+            results[token] = bool(result)
+        return results
+
+    except Exception as e:
+        # 记录错误日志（这里简化处理）
+        print(f"缓存存储失败: {str(e)}")
+        for token in items:
+            local_cache_invalidate(token)
+        return {token: False for token in items}
+
+
+async def cache_expire_many_async(tokens: list[str], expire_time: int = 600) -> bool:
+    """
+    批量刷新多个缓存的过期时间（pipeline，一次往返）
+
+    Args:
+        tokens: 访问令牌列表
+        expire_time: 过期时间（秒），默认10分钟
+
+    Returns:
+        bool: 全部刷新成功返回True，否则返回False
+    """
+    try:
+        pipe = _get_async_redis_client().pipeline(transaction=False)
+        for token in tokens:
+            pipe.expire(token, expire_time)
+        return all(await pipe.execute())
+    except Exception as e:
+        # 记录错误日志（这里简化处理）
+        print(f"缓存过期时间刷新失败: {str(e)}")
+        return False
+
+
+async def cache_snapshot_async(token: str, prefix: str, expire_time: int = 600):
+    """
+    为缓存的表生成不可变快照：按内容哈希复制到新的键，之后源键被覆盖也不影响快照
+
+    内容相同的表得到同一个快照键，重复创建只刷新过期时间。
+
+    Args:
+        token: 表令牌
+        prefix: 快照键前缀
+        expire_time: 快照的过期时间（秒），默认10分钟
+
+    Returns:
+        tuple: (快照键, DataFrame)，表不存在时返回None
+    """
+    client = _get_async_redis_client()
+    # 直接读取Redis中的原始内容，不使用可能过时的进程内缓存
+    cached_data = await client.get(token)
+    if cached_data is None:
+        return None
+    key = prefix + hashlib.sha1(cached_data).hexdigest()
+    await client.set(key, cached_data, ex=expire_time)
+    df = await asyncio.to_thread(_decode_df, cached_data)
+    local_cache_put(key, df, expire_time)
+    return key, df
@@ -1,6 +1,6 @@
 from fastmcp import FastMCP  # 导入FastMCP框架
 import services.tool as tool  # 导入工具模块
-from services.cache import cache_load  # 导入缓存服务
+from services.query_plan import PlanError, materialize_async  # 导入惰性查询计划
 import pandas as pd  # 导入pandas数据处理库
 from datetime import datetime  # 导入日期时间模块
 
@@ -8,7 +8,7 @@ calcu_mcp = FastMCP(name="calcu")  # 创建计算服务MCP实例
 
 
 @calcu_mcp.tool()
-def column_sum(token: str, column_name: str) -> str:
+async def column_sum(token: str, column_name: str) -> str:
     """
     计算数据中某列的和。
     Args:
@@ -17,16 +17,18 @@ def column_sum(token: str, column_name: str) -> str:
     Returns:
         result (str): 数据某列的和。
     """
-    data_list = cache_load(token)  # 从缓存加载数据
-    if not data_list:  # 检查数据是否存在
+    try:
+        df = await materialize_async(token)  # 按查询计划计算或从缓存加载数据
+    except PlanError:
+        df = None
+    if df is None:  # 检查数据是否存在
         return "error"  # 返回错误信息
-    df = tool.csv_to_pd(data_list)  # 转换为DataFrame
     result = tool.calculate_list_sum(df, column_name)  # 计算列的和
     return str(result)  # 返回结果字符串
 
 
 @calcu_mcp.tool()
-def column_mean(token: str, column_name: str) -> str:
+async def column_mean(token: str, column_name: str) -> str:
     """
     计算数据中某列的平均值。
     Args:
@@ -35,16 +37,18 @@ def column_mean(token: str, column_name: str) -> str:
     Returns:
         result (str): 数据某列的平均值。
     """
-    data_list = cache_load(token)  # 从缓存加载数据
-    if not data_list:  # 检查数据是否存在
+    try:
+        df = await materialize_async(token)  # 按查询计划计算或从缓存加载数据
+    except PlanError:
+        df = None
+    if df is None:  # 检查数据是否存在
         return "error"  # 返回错误信息
-    df = tool.csv_to_pd(data_list)  # 转换为DataFrame
     result = tool.calculate_list_mean(df, column_name)  # 计算列的平均值
     return str(result)  # 返回结果字符串
 
 
 @calcu_mcp.tool()
-def column_median(token: str, column_name: str) -> str:
+async def column_median(token: str, column_name: str) -> str:
     """
     计算数据中某列的中位数。
     Args:
@@ -53,9 +57,11 @@ def column_median(token: str, column_name: str) -> str:
     Returns:
         result (str): 数据某列的中位数。
     """
-    data_list = cache_load(token)  # 从缓存加载数据
-    if not data_list:  # 检查数据是否存在
+    try:
+        df = await materialize_async(token)  # 按查询计划计算或从缓存加载数据
+    except PlanError:
+        df = None
+    if df is None:  # 检查数据是否存在
         return "error"  # 返回错误信息
-    df = tool.csv_to_pd(data_list)  # 转换为DataFrame
     result = tool.calculate_list_median(df, column_name)  # 计算列的中位数
     return str(result)  # 返回结果字符串
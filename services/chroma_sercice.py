@@ -1,8 +1,18 @@
 import os  # 导入操作系统模块，用于文件和目录操作
 import json  # 导入JSON模块，用于读写JSON文件
+import time  # 导入时间模块
+import hashlib  # 导入哈希模块
+import asyncio  # 导入异步IO模块
+import threading  # 导入线程模块
 import chromadb  # 导入ChromaDB客户端库
-from text2vec import SentenceModel  # 从text2vec库导入SentenceModel，用于加载预训练模型并生成文本向量
+from fastapi import HTTPException  # 导入HTTP异常
+from services.model_registry import get_text_model  # 导入共享的文本向量化模型
 from services.llm_manager import dashscope_chat_json
+from services.llm_client import dashscope_chat_json_async  # 导入异步的大模型请求
+from services.embedding_worker import run_search  # 导入检索线程池
+from services.llm_cache import require_keys  # 导入缓存响应校验
+from services.field_search import get_field_search_backend, search_fields  # 导入字段检索后端
+from services.embedding_cache import encode_corpus, encode_queries  # 导入向量缓存
 # 注意：此脚本现在使用客户端-服务器模式，需要一个正在运行的 ChromaDB 实例。
 # 您可以使用 Docker 启动一个： docker run -p 8000:8000 chromadb/chroma
 # chroma run --port 8008 --host 0.0.0.0 --path ./chroma_data
@@ -44,30 +54,69 @@ def scan_and_process_datawork(root_dir):  # 定义函数，用于扫描指定目
     return datawork_json  # 返回包含所有处理后数据的列表
 
 def get_model():
-    # 2. 加载文本向量化模型
-    print("正在加载模型 shibing624/text2vec-base-chinese (使用 text2vec)...")  # 打印模型加载提示
-    try:  # 尝试加载模型
-        model = SentenceModel('shibing624/text2vec-base-chinese')  # 实例化SentenceModel并加载模型
-        return model  # 返回加载的模型实例
-    except Exception as e:  # 捕获加载异常
-        print(f"加载模型失败: {e}")  # 打印失败信息
-        return None
+    # 2. 获取文本向量化模型（进程内只加载一次，加载失败返回None）
+    return get_text_model()
 
 # --- ChromaDB 操作 ---
 
-# 3. 构建或更新 ChromaDB 集合
+# 每批写入或删除的条数，避免超出ChromaDB的最大限制
+CHROMA_BATCH_SIZE = 5000
+
+
+def _entry_hash(item) -> str:
+    """
+    条目内容的哈希值，内容、clazz或field变化时改变（私有方法）
+    """
+    return hashlib.sha1(json.dumps([item['content'], item['clazz'], item['field']], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _indexed_hashes(collection) -> dict:
+    """
+    读取集合中已有条目的内容哈希，作为已索引内容的清单（私有方法）
+
+    Returns:
+        dict: 条目ID -> 内容哈希（旧版本写入的条目没有哈希，为None）
+    """
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=CHROMA_BATCH_SIZE, offset=offset)
+        for entry_id, metadata in zip(page['ids'], page['metadatas']):
+            hashes[entry_id] = (metadata or {}).get('hash')
+        if len(page['ids']) < CHROMA_BATCH_SIZE:
+            return hashes
+        offset += CHROMA_BATCH_SIZE
+
+
+# 3. 构建或更新 ChromaDB 集合（增量同步）
 def build_chroma_collection(model, data_list, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):  # 定义构建集合的函数
+    """
+    把字段数据增量同步到ChromaDB集合
+
+    每个条目（ID为 clazz-field）的元数据中保存内容哈希，同步时与集合中已有的哈希比较：
+    只为新增或变化的条目生成向量并upsert，删除集合中已不存在于数据中的条目，其余不动。
+
+    Args:
+        model: 文本向量化模型
+        data_list: 条目列表 [{"id", "content", "clazz", "field"}]
+        host: ChromaDB地址
+        port: ChromaDB端口
+        collection_name: 集合名称
+
+    Returns:
+        dict: 同步统计 {"added", "updated", "deleted", "unchanged", "seconds"}，无法同步时返回None
+    """
     if not data_list:  # 检查数据列表是否为空
         print("没有数据可用于构建集合。")  # 打印提示
-        return  # 提前退出
+        return None  # 提前退出
 
     if model is None:  # 检查模型是否加载成功
         print("模型未加载，无法生成向量。")  # 打印提示
-        return  # 提前退出
+        return None  # 提前退出
 
-    print(f"正在为 {len(data_list)} 个条目生成向量...")  # 打印向量生成提示
-    contents = [item['content'] for item in data_list]  # 提取所有待处理的文本内容
-    embeddings = model.encode(contents, show_progress_bar=True)  # 批量将文本编码为向量
+    start = time.perf_counter()
+    # 同一ID出现多次时以最后一次为准
+    entries = {item['id']: item for item in data_list}
 
     print(f"正在连接到 ChromaDB 服务器 (地址: {host}:{port})...")  # 打印连接数据库的提示
     client = chromadb.HttpClient(host=host, port=port)  # 创建一个连接到服务器的ChromaDB客户端实例
@@ -75,52 +124,91 @@ def build_chroma_collection(model, data_list, host=CHROMA_HOST, port=CHROMA_PORT
     print(f"正在获取或创建集合: {collection_name}...")  # 打印集合操作的提示
     collection = client.get_or_create_collection(name=collection_name)  # 获取或创建一个新的集合
 
-    batch_size = 5000  # 设置每个批次的大小，以避免超出ChromaDB的最大限制
-    total_items = len(data_list)  # 获取数据总数
-    for i in range(0, total_items, batch_size):  # 遍历所有数据，步长为批次大小
-        batch_end = min(i + batch_size, total_items)  # 计算当前批次的结束索引
-        print(f"正在向集合中添加/更新条目 {i + 1} 到 {batch_end} (共 {total_items} 条)...")  # 打印当前批次处理的进度信息
-
-        # 为当前批次准备数据
-        batch_data = data_list[i:batch_end]  # 获取当前批次的数据列表
-        batch_embeddings = embeddings[i:batch_end]  # 获取当前批次的向量
-        batch_documents = [item['content'] for item in batch_data]  # 获取当前批次的文档内容
-        batch_metadatas = [{"clazz": item['clazz'], "field": item['field']} for item in batch_data]  # 获取当前批次的元数据
-        batch_ids = [item['id'] for item in batch_data]  # 获取当前批次的ID
-
-        collection.upsert(  # 使用upsert方法添加或更新当前批次的数据
-            embeddings=batch_embeddings.tolist(),  # 将numpy数组格式的向量转换为列表
-            documents=batch_documents,  # 提供当前批次的原始文本文档
-            metadatas=batch_metadatas,  # 提供当前批次的元数据
-            ids=batch_ids  # 提供当前批次的唯一ID列表
-        )  # 结束当前批次的upsert操作
-    print("集合构建/更新完成。")  # 所有批次处理完成后打印最终提示
-
-# 4. 从 ChromaDB 查询相似字段
-def search_similar_field_chroma(model, query_text, k=3, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):  # 定义查询函数
-    if model is None:  # 检查模型是否可用
-        print("模型未加载，无法执行查询。")  # 打印提示
-        return []  # 返回空列表
-
-    try:  # 捕获数据库连接和查询异常
-        client = chromadb.HttpClient(host=host, port=port)  # 创建一个连接到服务器的ChromaDB客户端实例
-        collection = client.get_collection(name=collection_name)  # 获取指定的集合
-    except Exception as e:  # 捕获异常
-        print(f"连接数据库或获取集合失败: {e}")  # 打印错误
-        print("请确保 ChromaDB 服务器正在运行，并且集合已创建。")  # 提示用户检查服务器和集合
-        return []  # 返回空列表
-
-    query_vector = model.encode([query_text])  # 将用户的查询文本编码为向量
+    indexed = _indexed_hashes(collection)  # 集合中已有条目的内容哈希
+    changed = []  # 新增或变化的条目
+    for entry_id, item in entries.items():
+        entry_hash = _entry_hash(item)
+        if indexed.get(entry_id) != entry_hash:
+            changed.append((item, entry_hash))
+    removed = [entry_id for entry_id in indexed if entry_id not in entries]
+    added = sum(1 for item, _ in changed if item['id'] not in indexed)
+    print(f"共 {len(entries)} 个条目：新增 {added}，变化 {len(changed) - added}，删除 {len(removed)}")
+
+    if changed:
+        print(f"正在为 {len(changed)} 个条目生成向量...")  # 打印向量生成提示
+        embeddings = encode_corpus(model, [item['content'] for item, _ in changed], show_progress_bar=True)  # 已缓存的文本不再编码
+        for i in range(0, len(changed), CHROMA_BATCH_SIZE):  # 分批写入
+            batch = changed[i:i + CHROMA_BATCH_SIZE]  # 获取当前批次的数据列表
+            print(f"正在向集合中添加/更新条目 {i + 1} 到 {i + len(batch)} (共 {len(changed)} 条)...")  # 打印当前批次处理的进度信息
+            collection.upsert(  # 使用upsert方法添加或更新当前批次的数据
+                embeddings=embeddings[i:i + len(batch)].tolist(),  # 将numpy数组格式的向量转换为列表
+                documents=[item['content'] for item, _ in batch],  # 提供当前批次的原始文本文档
+                metadatas=[{"clazz": item['clazz'], "field": item['field'], "hash": entry_hash} for item, entry_hash in batch],  # 元数据中保存内容哈希
+                ids=[item['id'] for item, _ in batch]  # 提供当前批次的唯一ID列表
+            )  # 结束当前批次的upsert操作
+
+    for i in range(0, len(removed), CHROMA_BATCH_SIZE):  # 分批删除已不存在的条目
+        collection.delete(ids=removed[i:i + CHROMA_BATCH_SIZE])
+
+    report = {
+        "added": added,
+        "updated": len(changed) - added,
+        "deleted": len(removed),
+        "unchanged": len(entries) - len(changed),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    print(f"集合同步完成: {report}")  # 打印同步统计
+    return report
+
+
+# 共享的ChromaDB客户端（(host, port) -> client）与集合（(host, port, collection_name) -> collection）
+_clients = {}
+_collections = {}
+_collections_lock = threading.Lock()
+
+
+def _get_collection(host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME, refresh=False):
+    """
+    获取共享的ChromaDB集合，首次调用时创建客户端并获取集合（私有方法）
 
-    print(f"正在集合 '{collection_name}' 中查询...")  # 打印查询提示
-    results = collection.query(  # 执行查询
-        query_embeddings=query_vector.tolist(),  # 提供查询向量
-        n_results=k  # 指定返回最相似结果的数量
-    )  # 结束查询
+    Args:
+        host: ChromaDB地址
+        port: ChromaDB端口
+        collection_name: 集合名称
+        refresh: 为True时重新获取集合（集合被重建后旧的集合对象失效）
 
+    Returns:
+        Collection: 集合对象，连接失败时返回None
+    """
+    key = (host, port, collection_name)
+    collection = _collections.get(key)
+    if collection is not None and not refresh:
+        return collection
+    with _collections_lock:
+        try:
+            client = _clients.get((host, port))
+            if client is None:
+                client = chromadb.HttpClient(host=host, port=port)  # 创建一个连接到服务器的ChromaDB客户端实例
+                _clients[(host, port)] = client
+            collection = client.get_collection(name=collection_name)  # 获取指定的集合
+        except Exception as e:  # 捕获异常
+            _collections.pop(key, None)
+            _clients.pop((host, port), None)
+            print(f"连接数据库或获取集合失败: {e}")  # 打印错误
+            print("请确保 ChromaDB 服务器正在运行，并且集合已创建。")  # 提示用户检查服务器和集合
+            return None
+        _collections[key] = collection
+        return collection
+
+
+def _format_results(results, index):
+    """
+    把collection.query返回的第index个查询的结果整理为字段列表（私有方法）
+    """
     formatted_results = []  # 初始化格式化结果的列表
     # ChromaDB返回的结果是包含多个列表的字典，需要解包处理
-    ids, distances, metadatas, documents = results['ids'][0], results['distances'][0], results['metadatas'][0], results['documents'][0]
+    ids, distances = results['ids'][index], results['distances'][index]
+    metadatas, documents = results['metadatas'][index], results['documents'][index]
     for i in range(len(ids)):  # 遍历返回的每个结果
         similarity = 1 - distances[i]  # 计算相似度
         formatted_results.append({  # 构建结果字典
@@ -131,18 +219,78 @@ def search_similar_field_chroma(model, query_text, k=3, host=CHROMA_HOST, port=C
             })  # 结束结果字典构建
     return formatted_results  # 返回格式化后的结果列表
 
-def search_similar_fields_in_batch(model, fields, k=100, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):
+
+# 4. 从 ChromaDB 查询相似字段（批量）
+def search_similar_fields_chroma_batch(model, query_texts, k=3, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):
     """
-    接收一个字段数组，为每个字段查询相似结果，并返回一个字典。
+    一次编码所有查询文本，并用一次collection.query查询所有文本的相似字段
+
+    Args:
+        model: 文本向量化模型
+        query_texts: 查询文本列表
+        k: 每个查询返回的结果数
+        host: ChromaDB地址
+        port: ChromaDB端口
+        collection_name: 集合名称
+
+    Returns:
+        dict: 查询文本 -> 相似字段列表，模型或数据库不可用时每个文本对应空列表
+    """
+    query_texts = list(dict.fromkeys(query_texts))  # 去重并保持顺序
+    empty = {text: [] for text in query_texts}
+    if not query_texts:
+        return empty
+    if model is None:  # 检查模型是否可用
+        print("模型未加载，无法执行查询。")  # 打印提示
+        return empty
+
+    collection = _get_collection(host, port, collection_name)
+    if collection is None:
+        return empty
+
+    query_vectors = encode_queries(model, query_texts).tolist()  # 一次将所有查询文本编码为向量（优先使用缓存）
+
+    print(f"正在集合 '{collection_name}' 中查询 {len(query_texts)} 个文本...")  # 打印查询提示
+    try:
+        results = collection.query(query_embeddings=query_vectors, n_results=k)  # 一次请求查询所有向量
+    except Exception as e:
+        # 集合可能已被重建，重新获取后再试一次
+        print(f"查询失败，重新获取集合: {e}")
+        collection = _get_collection(host, port, collection_name, refresh=True)
+        if collection is None:
+            return empty
+        results = collection.query(query_embeddings=query_vectors, n_results=k)
+
+    return {text: _format_results(results, i) for i, text in enumerate(query_texts)}
+
+
+def search_similar_field_chroma(model, query_text, k=3, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):  # 定义查询函数
+    """
+    查询单个文本的相似字段
     """
-    # 初始化一个空字典来存储所有字段的查询结果
-    all_results = {}
-    # 遍历传入的字段数组
-    for field_query in fields:
-        # 为当前字段调用单次查询函数
-        similar_fields = search_similar_field_chroma(model, field_query, k, host, port, collection_name)
-        # 将查询结果存入字典，键为字段名
-        all_results[field_query] = similar_fields
+    return search_similar_fields_chroma_batch(model, [query_text], k, host, port, collection_name)[query_text]
+
+def rank_similar_fields_in_batch(model, fields, k=100, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME,
+                                 backend=None):
+    """
+    为每个字段查询相似结果，并按表之间的关联关系排序、过滤候选字段（编码和向量查询，应在检索线程池中执行）
+
+    Args:
+        model: 文本向量化模型
+        fields: 字段名列表
+        k: 每个字段的候选数量
+        backend: 字段检索后端，默认为FIELD_SEARCH_BACKEND配置的后端
+
+    Returns:
+        dict: 字段名 -> 候选字段列表
+    """
+    backend = backend or get_field_search_backend()
+    # 一次编码、一次查询所有字段，结果字典的键为字段名
+    if backend.name == "chroma":
+        all_results = search_similar_fields_chroma_batch(model, fields, k, host, port, collection_name)
+    else:
+        # 进程内索引后端
+        all_results = backend.search(model, fields, k)
 
    
 
@@ -257,11 +405,18 @@ def search_similar_fields_in_batch(model, fields, k=100, host=CHROMA_HOST, port=
 
     print(json.dumps(all_results, ensure_ascii=False, indent=4))
 
-    #fields_str = "、".join(fields) # 将字段列表用顿号连接成一个字符串
-    system_prompt = """你是擅长大数据的数据分析专家，能在尽量共相同表的前提下，为每个查询需求配置最合适的字段(无需带表名)，返回JSON格式的键值对，严格遵守格式如:{"best":{"合同创建人":"contractDetailContractCreator","业务订单明细更新时间":"bizOrderDetailBizOrderUpdateTime"}}""" 
-    #print(system_prompt)
-    # 使用 f-string 将多个部分拼接成最终的提示字符串
-    data = dashscope_chat_json(system_prompt,json.dumps(all_results, ensure_ascii=False, indent=4),model="qwen-plus")
+    # 返回包含所有结果的字典
+    return all_results
+
+
+#fields_str = "、".join(fields) # 将字段列表用顿号连接成一个字符串
+BEST_FIELDS_PROMPT = """你是擅长大数据的数据分析专家，能在尽量共相同表的前提下，为每个查询需求配置最合适的字段(无需带表名)，返回JSON格式的键值对，严格遵守格式如:{"best":{"合同创建人":"contractDetailContractCreator","业务订单明细更新时间":"bizOrderDetailBizOrderUpdateTime"}}"""
+
+
+def _best_fields(data, all_results) -> dict:
+    """
+    解析大模型选择的最合适字段，失败时返回候选字段（私有方法）
+    """
     if data and "best" in data:
         print(data["best"])
         return {"message": data["best"]}
@@ -269,8 +424,45 @@ def search_similar_fields_in_batch(model, fields, k=100, host=CHROMA_HOST, port=
         return {"error": all_results}
 
 
-    # 返回包含所有结果的字典
-    #return all_results
+def search_similar_fields_in_batch(model, fields, k=100, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):
+    """
+    接收一个字段数组，为每个字段查询相似结果，并返回一个字典。
+    """
+    all_results = rank_similar_fields_in_batch(model, fields, k, host, port, collection_name)
+    # 相同的表头得到相同的候选字段，选择结果可以缓存（只缓存包含best的响应）
+    try:
+        data = dashscope_chat_json(BEST_FIELDS_PROMPT, json.dumps(all_results, ensure_ascii=False, indent=4),
+                                   model="qwen-plus", cache="best_fields", cache_valid=require_keys("best"))
+    except HTTPException as e:
+        # 大模型请求失败时与解析失败一致，返回候选字段
+        print(f"选择字段失败: {e!r}")
+        data = None
+    return _best_fields(data, all_results)
+
+
+async def search_similar_fields_in_batch_async(model, fields, k=100, host=CHROMA_HOST, port=CHROMA_PORT, collection_name=CHROMA_NAME):
+    """
+    search_similar_fields_in_batch 的异步版本：编码和向量查询在检索线程池中执行，
+    大模型请求经过并发限制、超时和重试，不阻塞事件循环
+
+    Args:
+        model: 文本向量化模型，应传入get_embedding_worker()的返回值，使编码请求合并成批
+        fields: 字段名列表
+        k: 每个字段的候选数量
+
+    Returns:
+        dict: 成功时为{"message": 字段名 -> 字段}，失败时为{"error": 候选字段}
+    """
+    all_results = await run_search(rank_similar_fields_in_batch, model, fields, k, host, port, collection_name)
+    # 相同的表头得到相同的候选字段，选择结果可以缓存（只缓存包含best的响应）
+    try:
+        data = await dashscope_chat_json_async(BEST_FIELDS_PROMPT, json.dumps(all_results, ensure_ascii=False, indent=4),
+                                               model="qwen-plus", cache="best_fields", cache_valid=require_keys("best"))
+    except (HTTPException, asyncio.TimeoutError) as e:
+        # 重试后仍失败（含上游的4xx状态码）时与解析失败一致，返回候选字段
+        print(f"选择字段失败: {e!r}")
+        data = None
+    return _best_fields(data, all_results)
 
 
 # 5. 根据指定的 clazz 和 field 查找相似字段
@@ -278,11 +470,8 @@ def get_similar_fields(model, clazz, field, k=3, host=CHROMA_HOST, port=CHROMA_P
     """
     通过指定的 clazz 和 field，找到其对应的描述，并以此为基础查询最相似的其他字段。
     """
-    try:  # 捕获数据库连接和查询异常
-        client = chromadb.HttpClient(host=host, port=port)  # 创建一个连接到服务器的ChromaDB客户端实例
-        collection = client.get_collection(name=collection_name)  # 获取指定的集合
-    except Exception as e:  # 捕获异常
-        print(f"连接数据库或获取集合失败: {e}")  # 打印错误
+    collection = _get_collection(host, port, collection_name)  # 获取共享的集合
+    if collection is None:
         return []  # 返回空列表
 
     # 使用 where 过滤器精确查找对应的条目
@@ -301,24 +490,26 @@ def get_similar_fields(model, clazz, field, k=3, host=CHROMA_HOST, port=CHROMA_P
     print(f"找到条目 '{clazz}.{field}'，使用其描述 '{query_text}' 进行相似性查询...")
 
     # 复用现有的相似性搜索函数
-    return search_similar_fields_chroma(model, query_text, k=k, host=host, port=port, collection_name=collection_name)
+    return search_similar_field_chroma(model, query_text, k=k, host=host, port=port, collection_name=collection_name)
 
 def build_chroma():
     # --- 步骤一：构建索引 (如果需要，取消注释来运行) ---
     print("--- 开始构建 ChromaDB 集合 ---")
+    report = None # 同步统计
     model = get_model() # 统一加载模型
     if not model:
-        return # 模型加载失败则退出
+        return report # 模型加载失败则退出
 
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # 获取当前脚本的绝对目录
     datawork_dir = os.path.join(base_dir, "datawork")  # 构建datawork目录的路径
     if os.path.exists(datawork_dir):  # 检查目录是否存在
          json_data = scan_and_process_datawork(datawork_dir)  # 扫描并处理数据
          if json_data:  # 如果有数据
-             build_chroma_collection(model, json_data)  # 构建ChromaDB集合
+             report = build_chroma_collection(model, json_data)  # 增量同步ChromaDB集合
     else:
         print(f"目录未找到: {datawork_dir}")
     print("--- 集合构建完成 ---\n")
+    return report
 
 def search():
     # --- 步骤二：执行查询 ---
@@ -340,11 +531,11 @@ def search():
                 f"描述: {field['content']}"  # 打印字段的描述
             )  # 结束打印
 
-def search_similar_field(user_query:str):
-    model = get_model() # 统一加载模型
+def search_similar_field(user_query:str, model=None):
+    model = model or get_model() # 统一加载模型（可传入编码工作池）
     if not model:
         return None# 模型加载失败则退出
-    similar_fields = search_similar_field_chroma(model, user_query, k=10)  # 调用查询函数
+    similar_fields = search_fields(model, [user_query], k=10)[user_query]  # 使用配置的检索后端查询
     return similar_fields
 
 
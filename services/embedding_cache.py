@@ -0,0 +1,321 @@
+import os  # 导入操作系统模块
+import re  # 导入正则表达式模块
+import json  # 导入JSON模块
+import hashlib  # 导入哈希模块
+import threading  # 导入线程模块
+from contextlib import contextmanager  # 导入上下文管理器装饰器
+from collections import OrderedDict  # 导入有序字典，用于LRU
+import numpy as np  # 导入NumPy库
+from dotenv import load_dotenv  # 导入环境变量加载器
+if os.name == "nt":
+    import msvcrt  # 导入Windows文件锁
+else:
+    import fcntl  # 导入POSIX文件锁
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 文本向量化模型名称，缓存按模型区分
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "shibing624/text2vec-base-chinese")
+# 向量缓存文件目录
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(BASE_DIR, "vector_index", "embeddings"))
+# 查询文本的进程内LRU容量（条）
+EMBEDDING_LRU_SIZE = int(os.getenv("EMBEDDING_LRU_SIZE", "2048"))
+
+
+def _text_hash(text: str) -> str:
+    """
+    文本的哈希值，作为缓存键（私有方法）
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _file_lock(path: str):
+    """
+    跨进程的排他文件锁（私有方法）
+
+    API进程和chroma_tool、hnsw_tool等命令行工具共用缓存目录，写入前都要先拿到这把锁。
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a+b') as f:
+        if os.name == "nt":
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK重试约10秒后仍拿不到会抛出OSError，继续等待
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    """
+    磁盘上的向量缓存
+
+    向量追加写入一个float32矩阵文件，以内存映射方式读取；偏移索引（文本哈希 -> 行号）
+    保存在JSON文件中。写入时先追加矩阵再替换索引文件，中途失败时多出的行不会被引用。
+    多个进程共用缓存目录：写入在文件锁内进行，并先从磁盘重新读取索引，从其他进程写入的行之后追加。
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache_dir: str = None):
+        """
+        Args:
+            model_name: 模型名称
+            cache_dir: 缓存目录，默认EMBEDDING_CACHE_DIR
+        """
+        cache_dir = cache_dir or EMBEDDING_CACHE_DIR
+        safe_name = re.sub(r"[^0-9A-Za-z_.-]", "_", model_name)
+        self.matrix_path = os.path.join(cache_dir, f"{safe_name}.f32")
+        self.index_path = os.path.join(cache_dir, f"{safe_name}.idx.json")
+        self.lock_path = os.path.join(cache_dir, f"{safe_name}.lock")
+        self._lock = threading.Lock()
+        self._dim = None
+        self._offsets = {}  # 文本哈希 -> 行号
+        self._matrix = None  # 内存映射的向量矩阵
+        self._load()
+
+    def _read_index(self):
+        """
+        从磁盘读取偏移索引，文件不存在或与矩阵文件不一致时返回None（私有方法）
+
+        Returns:
+            tuple: (维度, 偏移索引)
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            dim, offsets = index["dim"], index["offsets"]
+            rows = os.path.getsize(self.matrix_path) // (dim * 4)
+            if offsets and max(offsets.values()) >= rows:
+                raise ValueError("向量文件不完整")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"向量缓存无效，已忽略: {e}")
+            return None
+        return dim, offsets
+
+    def _load(self):
+        """
+        读取偏移索引并映射矩阵文件，文件不一致时清空缓存（私有方法）
+        """
+        index = self._read_index()
+        if index is None:
+            return
+        self._dim, self._offsets = index
+        self._map(len(self._offsets))
+
+    def _map(self, rows: int):
+        """
+        映射矩阵文件的前rows行（私有方法）
+        """
+        self._matrix = np.memmap(self.matrix_path, dtype='float32', mode='r', shape=(rows, self._dim)) if rows else None
+
+    def get_many(self, texts: list) -> dict:
+        """
+        读取已缓存的向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            dict: 文本 -> 向量，只包含命中的文本
+        """
+        with self._lock:
+            if self._matrix is None:
+                return {}
+            hits = {text: self._offsets.get(_text_hash(text)) for text in texts}
+            hits = {text: row for text, row in hits.items() if row is not None}
+            if not hits:
+                return {}
+            # 复制出来，映射可能在追加时被替换
+            vectors = np.array(self._matrix[list(hits.values())])
+        return dict(zip(hits.keys(), vectors))
+
+    def put_many(self, texts: list, vectors: np.ndarray):
+        """
+        追加向量，已存在的文本跳过
+
+        Args:
+            texts: 文本列表
+            vectors: 与texts对应的向量矩阵
+        """
+        vectors = np.asarray(vectors, dtype='float32')
+        with self._lock, _file_lock(self.lock_path):
+            # 其他进程可能已经追加过，以磁盘上的索引为准
+            index = self._read_index()
+            if index is not None and len(index[1]) != len(self._offsets):
+                self._dim, self._offsets = index
+                self._map(len(self._offsets))
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self._dim:
+                print(f"向量维度不一致，跳过缓存: {vectors.shape[1]} != {self._dim}")
+                return
+            new_rows = {}
+            for text, vector in zip(texts, vectors):
+                key = _text_hash(text)
+                if key not in self._offsets and key not in new_rows:
+                    new_rows[key] = vector
+            if not new_rows:
+                return
+            start = len(self._offsets)
+            # 释放映射后再追加，Windows上不能扩展已映射的文件
+            self._matrix = None
+            os.makedirs(os.path.dirname(self.matrix_path), exist_ok=True)
+            with open(self.matrix_path, 'r+b' if os.path.exists(self.matrix_path) else 'wb') as f:
+                # 从已引用的最后一行之后写入，覆盖上次失败遗留的行
+                f.seek(start * self._dim * 4)
+                f.write(np.stack(list(new_rows.values())).tobytes())
+                f.truncate()
+            offsets = dict(self._offsets)
+            for row, key in enumerate(new_rows, start):
+                offsets[key] = row
+            with open(self.index_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump({"dim": self._dim, "offsets": offsets}, f)
+            os.replace(self.index_path + ".tmp", self.index_path)
+            self._offsets = offsets
+            self._map(len(offsets))
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+class _LRU:
+    """
+    线程安全的LRU字典（私有类）
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._items.get(key)
+                if value is None:
+                    self.misses += 1
+                    continue
+                self._items.move_to_end(key)
+                self.hits += 1
+                found[key] = value
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            for key, value in items.items():
+                self._items[key] = value
+                self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+
+# 进程内共享的缓存（模型名称 -> EmbeddingStore / _LRU）
+_stores = {}
+_query_lrus = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_store(model_name: str = EMBEDDING_MODEL_NAME) -> EmbeddingStore:
+    """
+    获取模型对应的磁盘向量缓存
+    """
+    store = _stores.get(model_name)
+    if store is None:
+        with _shared_lock:
+            store = _stores.get(model_name)
+            if store is None:
+                store = EmbeddingStore(model_name)
+                _stores[model_name] = store
+    return store
+
+
+def _get_query_lru(model_name: str) -> _LRU:
+    """
+    获取模型对应的查询文本LRU（私有方法）
+    """
+    with _shared_lock:
+        return _query_lrus.setdefault(model_name, _LRU(EMBEDDING_LRU_SIZE))
+
+
+def encode_corpus(model, texts: list, model_name: str = None, **encode_kwargs) -> np.ndarray:
+    """
+    编码表结构字段描述等语料：命中磁盘缓存的直接读取，只编码新增或变化的文本，并写入缓存
+
+    Args:
+        model: 文本向量化模型
+        texts: 文本列表
+        model_name: 缓存使用的模型名称，默认取模型的cache_key属性
+        **encode_kwargs: 透传给model.encode的参数，例如show_progress_bar
+
+    Returns:
+        np.ndarray: 与texts对应的float32向量矩阵
+    """
+    model_name = model_name or getattr(model, "cache_key", EMBEDDING_MODEL_NAME)
+    store = get_embedding_store(model_name)
+    cached = store.get_many(texts)
+    missing = list(dict.fromkeys(text for text in texts if text not in cached))
+    print(f"向量缓存命中 {len(cached)} 条，需要编码 {len(missing)} 条")
+    if missing:
+        vectors = np.asarray(model.encode(missing, **encode_kwargs), dtype='float32')
+        store.put_many(missing, vectors)
+        cached.update(zip(missing, vectors))
+    return np.stack([cached[text] for text in texts]) if texts else np.zeros((0, 0), dtype='float32')
+
+
+def encode_queries(model, texts: list, model_name: str = None) -> np.ndarray:
+    """
+    编码查询文本：先查进程内LRU，再查磁盘缓存（查询常与字段描述相同），其余一次编码
+
+    查询文本只放入LRU，不写入磁盘缓存。
+
+    Args:
+        model: 文本向量化模型
+        texts: 查询文本列表
+        model_name: 缓存使用的模型名称，默认取模型的cache_key属性
+
+    Returns:
+        np.ndarray: 与texts对应的float32向量矩阵
+    """
+    model_name = model_name or getattr(model, "cache_key", EMBEDDING_MODEL_NAME)
+    lru = _get_query_lru(model_name)
+    found = lru.get_many(texts)
+    rest = [text for text in texts if text not in found]
+    if rest:
+        found.update(get_embedding_store(model_name).get_many(rest))
+    missing = list(dict.fromkeys(text for text in texts if text not in found))
+    if missing:
+        vectors = np.asarray(model.encode(missing), dtype='float32')
+        found.update(zip(missing, vectors))
+    lru.put_many({text: found[text] for text in texts})
+    return np.stack([found[text] for text in texts]) if texts else np.zeros((0, 0), dtype='float32')
+
+
+def embedding_cache_stats(model_name: str = EMBEDDING_MODEL_NAME) -> dict:
+    """
+    向量缓存统计
+
+    Returns:
+        dict: 磁盘缓存条数，查询LRU的命中/未命中次数
+    """
+    lru = _get_query_lru(model_name)
+    return {"stored": len(get_embedding_store(model_name)), "query_lru_hits": lru.hits, "query_lru_misses": lru.misses}
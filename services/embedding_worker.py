@@ -0,0 +1,217 @@
+import os  # 导入操作系统模块
+import time  # 导入时间模块
+import queue  # 导入队列模块
+import asyncio  # 导入异步IO模块
+import threading  # 导入线程模块
+from concurrent.futures import Future, ThreadPoolExecutor  # 导入线程池和Future
+import numpy as np  # 导入NumPy库
+from dotenv import load_dotenv  # 导入环境变量加载器
+from services.model_registry import get_text_model  # 导入共享的文本向量化模型
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 同时执行编码的线程数（模型推理本身已多线程，默认1）
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+# 合并并发编码请求的时间窗口（毫秒）
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+# 一批最多合并的文本数
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "256"))
+# 执行向量检索（编码+ChromaDB查询或进程内索引查询）的线程数
+EMBEDDING_SEARCH_WORKERS = int(os.getenv("EMBEDDING_SEARCH_WORKERS", "8"))
+
+
+class EmbeddingWorker:
+    """
+    文本编码工作池
+
+    各线程提交的编码请求先进入队列，收集线程在时间窗口内把并发请求合并成一批，
+    交给固定大小的编码线程池一次编码，再按请求拆分结果、逐个完成Future。
+    编码线程全部忙碌时收集线程等待，期间到达的请求会并入下一批。
+
+    encode方法与模型的encode接口一致，可以直接当作模型传给现有的检索函数。
+    """
+
+    def __init__(self, model, workers: int = None, window_ms: float = None, max_batch: int = None):
+        """
+        Args:
+            model: 文本向量化模型
+            workers: 编码线程数，默认EMBEDDING_WORKERS
+            window_ms: 合并请求的时间窗口（毫秒），默认EMBEDDING_BATCH_WINDOW_MS
+            max_batch: 一批最多合并的文本数，默认EMBEDDING_MAX_BATCH
+        """
+        self.model = model
+        # 缓存键与模型一致，编码结果和直接调用模型共用向量缓存
+        self.cache_key = getattr(model, "cache_key", None)
+        self.workers = workers or EMBEDDING_WORKERS
+        self.window = (EMBEDDING_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or EMBEDDING_MAX_BATCH
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.workers)  # 正在编码的批数不超过线程数
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embedding")
+        self._closed = False
+        self.batches = 0  # 已编码的批数
+        self.requests = 0  # 已处理的请求数
+        self._collector = threading.Thread(target=self._collect, name="embedding-collector", daemon=True)
+        self._collector.start()
+
+    def submit(self, texts: list) -> Future:
+        """
+        提交编码请求
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            Future: 结果为与texts对应的float32向量矩阵
+        """
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("编码工作池已关闭"))
+        elif not texts:
+            future.set_result(np.zeros((0, 0), dtype='float32'))
+        else:
+            self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        """
+        同步编码，与模型的encode接口一致（其余参数忽略）
+        """
+        if isinstance(sentences, str):
+            return self.submit([sentences]).result()[0]
+        return self.submit(sentences).result()
+
+    async def aencode(self, texts: list) -> np.ndarray:
+        """
+        异步编码，等待期间不阻塞事件循环
+        """
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _collect(self):
+        """
+        收集线程：按时间窗口合并请求后提交到编码线程池（私有方法）
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, size = [item], len(item[0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # 先处理完这一批再退出
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._slots.acquire()
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: list):
+        """
+        编码线程：一次编码整批去重后的文本，再拆分给各个请求（私有方法）
+        """
+        try:
+            texts = list(dict.fromkeys(text for request_texts, _ in batch for text in request_texts))
+            vectors = np.asarray(self.model.encode(texts), dtype='float32')
+            rows = {text: row for row, text in enumerate(texts)}
+            for request_texts, future in batch:
+                future.set_result(vectors[[rows[text] for text in request_texts]])
+            self.batches += 1
+            self.requests += len(batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        停止收集线程，等待已提交的批次完成
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """
+        工作池统计
+
+        Returns:
+            dict: 批数、请求数、平均每批合并的请求数
+        """
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0,
+        }
+
+
+# 进程内共享的编码工作池和检索线程池
+_worker = None
+_search_executor = None
+_worker_lock = threading.Lock()
+
+
+def get_embedding_worker():
+    """
+    获取进程内共享的编码工作池，首次调用时加载模型
+
+    Returns:
+        EmbeddingWorker: 编码工作池，模型加载失败时返回None
+    """
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                model = get_text_model()
+                if model is None:
+                    return None
+                _worker = EmbeddingWorker(model)
+    return _worker
+
+
+async def run_search(func, *args, **kwargs):
+    """
+    在检索线程池中执行同步的向量检索函数，等待期间不阻塞事件循环
+
+    Args:
+        func: 检索函数，例如rank_similar_fields_in_batch
+        *args: 位置参数，模型参数应传入get_embedding_worker()的返回值，使编码请求合并成批
+        **kwargs: 关键字参数
+
+    Returns:
+        检索函数的返回值
+    """
+    global _search_executor
+    if _search_executor is None:
+        with _worker_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(max_workers=EMBEDDING_SEARCH_WORKERS, thread_name_prefix="vector-search")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_search_executor, lambda: func(*args, **kwargs))
+
+
+def shutdown_embedding_worker():
+    """
+    关闭编码工作池和检索线程池
+    """
+    global _worker, _search_executor
+    with _worker_lock:
+        if _worker is not None:
+            _worker.close()
+            _worker = None
+        if _search_executor is not None:
+            _search_executor.shutdown(wait=True)
+            _search_executor = None
@@ -0,0 +1,96 @@
+import os  # 导入操作系统模块
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # 导入线程池
+from dotenv import load_dotenv  # 导入环境变量加载器
+from services.tool import get_ids, append_data  # 导入ID提取与数据绑定函数
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 同时进行的上游请求数上限
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+# 依赖ID列表按此大小拆分为多个并行请求
+FETCH_CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", "200"))
+
+
+def run_fetch_dag(nodes: dict, max_workers: int = None, chunk_size: int = None) -> dict:
+    """
+    按依赖关系并发调用多个上游接口，并把从接口的数据绑定到主接口的数据中
+
+    nodes 按声明顺序描述每个接口：
+        {
+            "interface1": {"call": lambda: call_interface1(...)},
+            "material": {
+                "call": lambda ids: call_material_interface2(access_token, ids),
+                "depends_on": "interface1",          # 依赖的接口
+                "id_key": "procOrderDetMaterialId",  # 从依赖接口数据中提取ID的字段
+                "join_key": "matId",                 # 本接口数据中与ID对应的字段，用于绑定
+            },
+        }
+    没有依赖的接口立即调用；依赖接口完成后，提取去重后的ID，按chunk_size拆分为多个请求
+    并发调用，结果合并。所有接口完成后按声明顺序用append_data绑定到依赖接口的数据中。
+
+    Args:
+        nodes: 接口声明字典
+        max_workers: 同时进行的请求数上限，默认FETCH_MAX_WORKERS
+        chunk_size: ID列表拆分大小，默认FETCH_CHUNK_SIZE
+
+    Returns:
+        dict: 接口名 -> 返回的数据列表（主接口的数据已绑定从接口字段）
+
+    Raises:
+        ValueError: 依赖的接口未声明时抛出
+    """
+    chunk_size = chunk_size or FETCH_CHUNK_SIZE
+    for name, node in nodes.items():
+        if node.get("depends_on") and node["depends_on"] not in nodes:
+            raise ValueError(f"接口 {name} 依赖的接口 {node['depends_on']} 未声明")
+
+    results = {}
+    chunks = {}  # 接口名 -> 已完成的分块结果列表
+    pending_chunks = {}  # 接口名 -> 未完成的分块数
+    running = {}  # future -> 接口名
+    with ThreadPoolExecutor(max_workers=max_workers or FETCH_MAX_WORKERS) as executor:
+
+        def submit(name):
+            node = nodes[name]
+            if not node.get("depends_on"):
+                pending_chunks[name] = 1
+                running[executor.submit(node["call"])] = name
+                return
+            # 提取依赖接口返回的ID，去重后分块并发请求
+            ids = list(dict.fromkeys(get_ids(results[node["depends_on"]], node["id_key"])))
+            if not ids:
+                finish(name, [])
+                return
+            id_chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+            pending_chunks[name] = len(id_chunks)
+            for id_chunk in id_chunks:
+                running[executor.submit(node["call"], id_chunk)] = name
+
+        def finish(name, data):
+            results[name] = data
+            # 依赖此接口的接口可以开始调用
+            for child, node in nodes.items():
+                if node.get("depends_on") == name:
+                    submit(child)
+
+        for name, node in nodes.items():
+            if not node.get("depends_on"):
+                submit(name)
+
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                data = future.result()
+                # 接口失败时返回错误字符串，按空列表处理
+                chunks.setdefault(name, []).extend(data if isinstance(data, list) else [])
+                pending_chunks[name] -= 1
+                if pending_chunks[name] == 0:
+                    finish(name, chunks.pop(name))
+
+    # 所有接口完成后再绑定，避免并发读取ID时数据被修改
+    for name, node in nodes.items():
+        if node.get("depends_on") and node.get("join_key"):
+            append_data(results[node["depends_on"]], results[name], node["id_key"], node["join_key"])
+    return results
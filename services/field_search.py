@@ -0,0 +1,326 @@
+import os  # 导入操作系统模块
+import json  # 导入JSON模块
+import time  # 导入时间模块
+import threading  # 导入线程模块
+from abc import ABC, abstractmethod  # 导入抽象基类
+import numpy as np  # 导入NumPy库
+from services.embedding_cache import encode_corpus, encode_queries  # 导入向量缓存
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 字段检索后端：chroma（ChromaDB服务）、hnsw（进程内hnswlib索引）、faiss（进程内FAISS索引，内存映射加载）
+FIELD_SEARCH_BACKEND = os.getenv("FIELD_SEARCH_BACKEND", "chroma").lower()
+# 进程内索引文件所在目录
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELD_INDEX_DIR = os.getenv("FIELD_INDEX_DIR", os.path.join(BASE_DIR, "vector_index"))
+# HNSW构建与查询参数
+FIELD_INDEX_M = int(os.getenv("FIELD_INDEX_M", "16"))
+FIELD_INDEX_EF_CONSTRUCTION = int(os.getenv("FIELD_INDEX_EF_CONSTRUCTION", "200"))
+FIELD_INDEX_EF_SEARCH = int(os.getenv("FIELD_INDEX_EF_SEARCH", "128"))
+# 进程内索引的距离空间，与ChromaDB集合的默认空间一致
+FIELD_INDEX_SPACE = "l2"
+
+
+class FieldSearchBackend(ABC):
+    """
+    字段检索后端接口
+
+    search 接收查询文本列表，返回 查询文本 -> [{"similarity", "clazz", "field", "content"}]，
+    结果按相似度从高到低排列，与原先ChromaDB查询的结果格式一致。
+    相似度统一为 1 - 平方欧氏距离（ChromaDB默认的l2空间），字段排序按相似度是否大于0分支，
+    各后端必须使用相同的尺度。
+    """
+
+    name = ""
+
+    @abstractmethod
+    def load(self) -> bool:
+        """加载索引（或连接服务），成功返回True"""
+
+    @abstractmethod
+    def search(self, model, query_texts: list, k: int) -> dict:
+        """批量查询相似字段"""
+
+    @abstractmethod
+    def build(self):
+        """从表结构同步索引，返回 {"added", "updated", "deleted", "unchanged", "seconds"}，无法构建时返回None"""
+
+    @abstractmethod
+    def clear(self):
+        """删除索引"""
+
+
+class ChromaBackend(FieldSearchBackend):
+    """ChromaDB服务后端（原有实现）"""
+
+    name = "chroma"
+
+    def load(self) -> bool:
+        from services.chroma_sercice import _get_collection
+        return _get_collection() is not None
+
+    def search(self, model, query_texts: list, k: int) -> dict:
+        from services.chroma_sercice import search_similar_fields_chroma_batch
+        return search_similar_fields_chroma_batch(model, query_texts, k)
+
+    def build(self):
+        from services.chroma_sercice import _get_collection
+        from chroma_tool import build_chroma
+        report = build_chroma()
+        # 集合可能是新建的，重新获取集合
+        _get_collection(refresh=True)
+        return report
+
+    def clear(self):
+        from chroma_tool import clear_chroma
+        clear_chroma()
+
+
+class _LocalBackend(FieldSearchBackend):
+    """
+    进程内索引后端的公共部分（私有类）
+
+    与ChromaDB集合相同，原始向量（不归一化）按平方欧氏距离检索，相似度为 1 - 距离。
+    元数据（clazz、field、content）按向量编号保存在JSON文件中。构建时先写临时文件再替换，
+    加载完成后才切换到新索引。
+    """
+
+    index_filename = ""
+
+    def __init__(self, index_dir: str = None):
+        self.index_dir = index_dir or FIELD_INDEX_DIR
+        self.index_path = os.path.join(self.index_dir, self.index_filename)
+        self.meta_path = os.path.join(self.index_dir, f"{self.name}_meta.json")
+        self._loaded = None  # (索引, 元数据列表)，一起替换
+
+    @abstractmethod
+    def _read_index(self, path: str, dim: int):
+        """读取索引文件（子类实现）"""
+
+    @abstractmethod
+    def _write_index(self, vectors: np.ndarray, path: str):
+        """构建并写入索引文件（子类实现）"""
+
+    @abstractmethod
+    def _knn(self, index, vectors: np.ndarray, k: int) -> tuple:
+        """k近邻查询，返回 (编号矩阵, 相似度矩阵)，编号为-1表示没有结果（子类实现）"""
+
+    def load(self) -> bool:
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("space") != FIELD_INDEX_SPACE:
+                # 旧版本按内积构建的索引，相似度尺度与ChromaDB不同
+                raise ValueError(f"索引的距离空间为 {meta.get('space', 'ip')}，需要 {FIELD_INDEX_SPACE}")
+            index = self._read_index(self.index_path, meta["dim"])
+        except Exception as e:
+            print(f"加载字段索引失败 ({self.name}): {e}")
+            print("请先调用 /table/build-vector/build-vector 构建索引。")
+            return False
+        self._loaded = (index, meta["items"])
+        print(f"字段索引已加载 ({self.name}): {len(meta['items'])} 条")
+        return True
+
+    def search(self, model, query_texts: list, k: int) -> dict:
+        query_texts = list(dict.fromkeys(query_texts))  # 去重并保持顺序
+        results = {text: [] for text in query_texts}
+        if not query_texts:
+            return results
+        if model is None:
+            print("模型未加载，无法执行查询。")
+            return results
+        if self._loaded is None and not self.load():
+            return results
+        index, metadata = self._loaded
+        k = min(k, len(metadata))
+        if k <= 0:
+            return results
+
+        vectors = _as_float32(encode_queries(model, query_texts))  # 一次编码所有查询文本（优先使用缓存）
+        labels, similarities = self._knn(index, vectors, k)
+        for text, row_labels, row_similarities in zip(query_texts, labels, similarities):
+            for label, similarity in zip(row_labels, row_similarities):
+                if label < 0:
+                    continue
+                match = metadata[label]
+                results[text].append({
+                    "similarity": float(similarity),
+                    "clazz": match["clazz"],
+                    "field": match["field"],
+                    "content": match["content"],
+                })
+        return results
+
+    def build(self):
+        """
+        从表结构构建索引，返回与ChromaDB增量同步相同格式的统计
+
+        条目内容没有变化时直接返回；有变化时只编码新增或变化的文本（其余从向量缓存读取），
+        再用全部向量重新生成HNSW图，几万条向量只需几秒。
+        """
+        from services.chroma_sercice import get_model
+        from chroma_tool import scan_and_process_datawork
+        start = time.perf_counter()
+        # 与ChromaDB集合使用相同的数据来源，同一ID出现多次时以最后一次为准
+        entries = {item["id"]: item for item in scan_and_process_datawork(os.path.join(BASE_DIR, "scheme"))}
+        if not entries:
+            print("没有数据可用于构建索引。")
+            return None
+
+        # 与上次构建的条目比较
+        previous = {}
+        previous_space = None
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            previous = {item.get("id"): item for item in meta["items"]}
+            previous_space = meta.get("space")
+        except Exception:
+            pass
+        items = [{"id": entry_id, "clazz": item["clazz"], "field": item["field"], "content": item["content"]}
+                 for entry_id, item in entries.items()]
+        changed = [item for item in items if previous.get(item["id"]) != item]
+        added = sum(1 for item in changed if item["id"] not in previous)
+        report = {
+            "added": added,
+            "updated": len(changed) - added,
+            "deleted": sum(1 for entry_id in previous if entry_id not in entries),
+            "unchanged": len(items) - len(changed),
+        }
+        # 距离空间变化时（旧的内积索引）条目不变也要重建
+        if changed or report["deleted"] or previous_space != FIELD_INDEX_SPACE or not os.path.exists(self.index_path):
+            model = get_model()
+            if model is None:
+                return None
+            print(f"正在为 {len(items)} 个条目生成向量...")
+            # 只编码新增或变化的文本
+            vectors = _as_float32(encode_corpus(model, [item["content"] for item in items], show_progress_bar=True))
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._write_index(vectors, self.index_path + ".tmp")
+            with open(self.meta_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump({"dim": int(vectors.shape[1]), "space": FIELD_INDEX_SPACE, "items": items}, f, ensure_ascii=False)
+            os.replace(self.index_path + ".tmp", self.index_path)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+            print(f"字段索引已保存到 {self.index_path}")
+            self.load()
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        print(f"字段索引同步完成 ({self.name}): {report}")
+        return report
+
+    def clear(self):
+        self._loaded = None
+        for path in (self.index_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"字段索引已删除 ({self.name})")
+
+
+class HnswBackend(_LocalBackend):
+    """进程内hnswlib索引后端"""
+
+    name = "hnsw"
+    index_filename = "fields_hnsw.index"
+
+    def _read_index(self, path: str, dim: int):
+        import hnswlib
+        index = hnswlib.Index(space=FIELD_INDEX_SPACE, dim=dim)
+        index.load_index(path)
+        index.set_ef(FIELD_INDEX_EF_SEARCH)
+        return index
+
+    def _write_index(self, vectors: np.ndarray, path: str):
+        import hnswlib
+        index = hnswlib.Index(space=FIELD_INDEX_SPACE, dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), ef_construction=FIELD_INDEX_EF_CONSTRUCTION, M=FIELD_INDEX_M)
+        index.add_items(vectors, np.arange(len(vectors)))
+        index.save_index(path)
+
+    def _knn(self, index, vectors: np.ndarray, k: int) -> tuple:
+        # ef不能小于k
+        if k > FIELD_INDEX_EF_SEARCH:
+            index.set_ef(k)
+        labels, distances = index.knn_query(vectors, k=k)
+        # l2空间的距离为平方欧氏距离，与ChromaDB相同
+        return labels.astype(np.int64), 1 - distances
+
+
+class FaissBackend(_LocalBackend):
+    """进程内FAISS HNSW索引后端，索引文件以内存映射方式加载"""
+
+    name = "faiss"
+    index_filename = "fields_faiss.index"
+
+    def _read_index(self, path: str, dim: int):
+        import faiss
+        try:
+            # 内存映射加载，多个进程共享同一份页缓存
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except Exception:
+            # 索引类型不支持内存映射时完整读入
+            index = faiss.read_index(path)
+        index.hnsw.efSearch = FIELD_INDEX_EF_SEARCH
+        return index
+
+    def _write_index(self, vectors: np.ndarray, path: str):
+        import faiss
+        # METRIC_L2返回平方欧氏距离，与hnswlib的l2空间、ChromaDB相同
+        index = faiss.IndexHNSWFlat(vectors.shape[1], FIELD_INDEX_M, faiss.METRIC_L2)
+        index.hnsw.efConstruction = FIELD_INDEX_EF_CONSTRUCTION
+        index.add(vectors)
+        faiss.write_index(index, path)
+
+    def _knn(self, index, vectors: np.ndarray, k: int) -> tuple:
+        import faiss
+        params = faiss.SearchParametersHNSW(efSearch=max(FIELD_INDEX_EF_SEARCH, k))
+        distances, labels = index.search(vectors, k, params=params)
+        return labels, 1 - distances
+
+
+def _as_float32(vectors) -> np.ndarray:
+    """
+    转为连续存储的float32矩阵（私有方法）
+    """
+    return np.ascontiguousarray(vectors, dtype='float32')
+
+
+_BACKENDS = {"chroma": ChromaBackend, "hnsw": HnswBackend, "faiss": FaissBackend}
+# 进程内共享的后端
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_field_search_backend() -> FieldSearchBackend:
+    """
+    获取FIELD_SEARCH_BACKEND配置的字段检索后端
+
+    Returns:
+        FieldSearchBackend: 字段检索后端
+
+    Raises:
+        ValueError: 配置的后端不存在时抛出
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if FIELD_SEARCH_BACKEND not in _BACKENDS:
+                    raise ValueError(f"未知的字段检索后端: {FIELD_SEARCH_BACKEND}，可选: {', '.join(_BACKENDS)}")
+                _backend = _BACKENDS[FIELD_SEARCH_BACKEND]()
+    return _backend
+
+
+def search_fields(model, query_texts: list, k: int = 3) -> dict:
+    """
+    使用配置的后端批量查询相似字段
+
+    Args:
+        model: 文本向量化模型
+        query_texts: 查询文本列表
+        k: 每个查询返回的结果数
+
+    Returns:
+        dict: 查询文本 -> 相似字段列表
+    """
+    return get_field_search_backend().search(model, query_texts, k)
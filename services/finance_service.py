@@ -2,8 +2,10 @@ from fastmcp import FastMCP  # 导入FastMCP框架
 from dotenv import load_dotenv  # 导入环境变量加载器
 import os  # 导入操作系统模块
 import requests  # 导入HTTP请求库
+import services.http_client as http_client  # 导入上游HTTP客户端
 # 导入JSON转换CSV函数和数据绑定函数
-from services.tool import json_to_csv, get_csv_header, get_ids, append_data
+from services.tool import json_to_df, get_csv_header, get_ids, append_data
+from services.fetch_dag import run_fetch_dag  # 导入并发取数函数
 from services.cache import cache_save  # 导入缓存保存函数
 
 # 加载环境变量
@@ -51,32 +53,28 @@ def finance_find_pay_settle(access_token: str,
     Returns:
         result (str): 有效数据的列名清单，表示这些列有数据 / 没有数据
     """
-    # 调用接口1获取财务数据
-    interface1_data = call_pay_settle_interface1(access_token,
-                                                 pay_settle_det_pay_settle_from_receipt_date,
-                                                 pay_settle_det_pay_settle_to_receipt_date,
-                                                 supplier_name=supplier_name)
-    # 第二步：从接口1返回的data中提取matIds，调用接口2
-    mat_ids = get_ids(interface1_data, "procOrderDetMaterialId")  # 提取物料ID列表
-
-    # 调用接口2获取物料信息
-    interface2_data = call_material_interface2(
-        access_token, mat_ids)  # 调用物料接口2获取物料数据
-
-    # 将接口2的数据绑定到接口1的数据中
-    append_data(interface1_data, interface2_data,
-                "procOrderDetMaterialId", "matId")  # 将物料数据绑定到主数据
-
-    # 第三步：从接口1返回的data中提取supplierIds，调用接口4
-    supplier_ids = get_ids(
-        interface1_data, "paySettleDetPaySettleSupplierId")  # 提取供应商ID列表
-
-    # 调用接口4获取供应商信息
-    interface4_data = call_supplier_interface4(
-        access_token, supplier_ids)  # 调用供应商接口4获取供应商数据
-   # 将接口4的数据绑定到接口1的数据中
-    append_data(interface1_data, interface4_data,
-                "paySettleDetPaySettleSupplierId", "supplierId")  # 将供应商数据绑定到主数据
+    # 接口1获取财务数据；物料接口2与供应商接口4只依赖接口1返回的ID，并发调用后绑定到接口1的数据中
+    results = run_fetch_dag({
+        "interface1": {
+            "call": lambda: call_pay_settle_interface1(access_token,
+                                                       pay_settle_det_pay_settle_from_receipt_date,
+                                                       pay_settle_det_pay_settle_to_receipt_date,
+                                                       supplier_name=supplier_name),
+        },
+        "interface2": {
+            "call": lambda mat_ids: call_material_interface2(access_token, mat_ids),  # 调用物料接口2获取物料数据
+            "depends_on": "interface1",
+            "id_key": "procOrderDetMaterialId",  # 按物料ID绑定物料数据
+            "join_key": "matId",
+        },
+        "interface4": {
+            "call": lambda supplier_ids: call_supplier_interface4(access_token, supplier_ids),  # 调用供应商接口4获取供应商数据
+            "depends_on": "interface1",
+            "id_key": "paySettleDetPaySettleSupplierId",  # 按供应商ID绑定供应商数据
+            "join_key": "supplierId",
+        },
+    })
+    interface1_data = results["interface1"]
 
     # 定义字段映射（根据实际响应数据结构定义）
     grid_list = {
@@ -163,13 +161,13 @@ def finance_find_pay_settle(access_token: str,
         "paySettleDetPaySettleAuditStatus": "审核状态"
     }  # 字段映射字典，需要根据实际数据结构填充
 
-    csv_str = json_to_csv(interface1_data, grid_list)  # 转换为CSV格式
+    df = json_to_df(interface1_data, grid_list)  # 转换为DataFrame
 
-    print(f"finance_find_all 转换为CSV格式数据: {csv_str}")
+    print(f"finance_find_all 转换后的数据: {len(df) if df is not None else 0} 行")
 
-    if csv_str:  # 如果转换成功
+    if df is not None:  # 如果转换成功
         key = f"财务数据表_{access_token}"
-        cache_save(key, csv_str)  # 保存到缓存
+        cache_save(key, df)  # 保存到缓存（列式二进制）
         #header = get_csv_header(csv_str)  # 获取CSV头部
         return key  # 返回列名清单
     else:
@@ -343,8 +341,8 @@ def call_pay_settle_interface1(access_token: str,
         }
 
         # 发送HTTP POST请求
-        response = requests.post(
-            url, json=payload, headers=headers, timeout=30)  # 发送POST请求并设置超时时间和请求头
+        response = http_client.post(
+            url, json=payload, headers=headers)  # 通过共享长连接会话发送POST请求
         response.raise_for_status()  # 检查HTTP响应状态
 
         # 解析响应数据
@@ -425,8 +423,8 @@ def call_material_interface2(access_token: str, mat_ids: list,
         }
 
         # 发送HTTP POST请求
-        response = requests.post(
-            url, json=payload, headers=headers, timeout=30)  # 发送POST请求，超时30秒
+        response = http_client.post(
+            url, json=payload, headers=headers)  # 通过共享长连接会话发送POST请求
 
         # 检查响应状态
         if response.status_code == 200:  # 如果响应状态为200
@@ -543,8 +541,8 @@ def call_supplier_interface4(access_token: str, supplier_ids: list,
         }
 
         # 发送HTTP POST请求
-        response = requests.post(
-            url, json=payload, headers=headers, timeout=30)  # 发送POST请求，超时30秒
+        response = http_client.post(
+            url, json=payload, headers=headers)  # 通过共享长连接会话发送POST请求
 
         # 检查响应状态
         if response.status_code == 200:  # 如果响应状态为200
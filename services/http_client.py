@@ -0,0 +1,155 @@
+import os  # 导入操作系统模块
+import threading  # 导入线程模块
+import time  # 导入时间模块
+from urllib.parse import urlsplit  # 导入URL解析函数
+import requests  # 导入HTTP请求库
+from requests.adapters import HTTPAdapter  # 导入连接池适配器
+from urllib3.util.retry import Retry  # 导入重试策略
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 连接与读取超时（秒）
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+# 每个主机保持的长连接数
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+# 连接失败、读取超时与502/503/504的重试次数及退避系数（秒，指数递增）
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.3"))
+
+# 耗时直方图的桶上限（秒），最后一个桶收集其余请求
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+# 每个主机一个会话（scheme://host:port -> requests.Session）
+_sessions = {}
+_sessions_lock = threading.Lock()
+# 每个接口的耗时统计（路径 -> {"count", "errors", "sum", "buckets"}）
+_latency = {}
+_latency_lock = threading.Lock()
+
+
+def _get_session(url: str) -> requests.Session:
+    """
+    获取URL所在主机的共享会话，不存在时创建（私有方法）
+
+    会话保持长连接，避免每次调用重新建立TCP/TLS连接。ERP的findList等接口
+    虽然是POST但只做查询，因此POST也按重试策略重试。
+
+    Args:
+        url: 请求地址
+
+    Returns:
+        requests.Session: 共享会话
+    """
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                connect=HTTP_RETRIES,
+                read=HTTP_RETRIES,
+                status=HTTP_RETRIES,
+                backoff_factor=HTTP_BACKOFF_FACTOR,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET", "POST"}),
+                raise_on_status=False,  # 重试用尽后返回最后的响应，由调用方raise_for_status
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount(host, adapter)
+            _sessions[host] = session
+        return session
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    通过共享会话发送HTTP请求，并记录接口耗时
+
+    Args:
+        method: 请求方法，例如GET、POST
+        url: 请求地址
+        timeout: 超时时间（秒），可以是(连接超时, 读取超时)，默认使用环境变量配置
+        **kwargs: 透传给requests的参数，例如params、json、headers
+
+    Returns:
+        requests.Response: 响应对象
+
+    Raises:
+        requests.exceptions.RequestException: 重试用尽后仍然失败时抛出
+    """
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    endpoint = urlsplit(url).path or "/"
+    start = time.perf_counter()
+    try:
+        response = _get_session(url).request(method, url, timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException:
+        _observe(endpoint, time.perf_counter() - start, error=True)
+        raise
+    _observe(endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+    return response
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """
+    通过共享会话发送POST请求，参数同request
+    """
+    return request("POST", url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    通过共享会话发送GET请求，参数同request
+    """
+    return request("GET", url, **kwargs)
+
+
+def _observe(endpoint: str, elapsed: float, error: bool = False):
+    """
+    记录一次接口调用的耗时（私有方法）
+    """
+    with _latency_lock:
+        stats = _latency.get(endpoint)
+        if stats is None:
+            stats = {"count": 0, "errors": 0, "sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)}
+            _latency[endpoint] = stats
+        stats["count"] += 1
+        stats["sum"] += elapsed
+        if error:
+            stats["errors"] += 1
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                stats["buckets"][index] += 1
+                break
+
+
+def latency_stats() -> dict:
+    """
+    获取每个上游接口的耗时直方图
+
+    Returns:
+        dict: 接口路径 -> {"count": 调用次数, "errors": 失败次数, "avg_ms": 平均耗时（毫秒）,
+              "buckets": {"<=桶上限秒数": 累计次数}}
+    """
+    result = {}
+    with _latency_lock:
+        for endpoint, stats in _latency.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            result[endpoint] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "avg_ms": round(stats["sum"] * 1000 / stats["count"], 2) if stats["count"] else 0.0,
+                "buckets": buckets,
+            }
+    return result
@@ -0,0 +1,194 @@
+import os  # 导入操作系统模块
+import json  # 导入JSON模块
+import threading  # 导入线程模块
+import numpy as np  # 导入NumPy库
+from dotenv import load_dotenv  # 导入环境变量加载器
+from services.embedding_cache import encode_corpus, encode_queries  # 导入向量缓存
+from services.embedding_worker import get_embedding_worker, run_search  # 导入编码工作池
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 是否启用本地意图分类，关闭时全部交给远程意图模型。
+# 默认关闭：先用 bench/eval_intent_classifier.py 在实际模型和留出的标注问题上确定阈值，再开启
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "false").lower() == "true"
+# 带标注的意图示例文件：{"意图": ["示例问题", ...]}
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTENT_EXAMPLES_PATH = os.getenv("INTENT_EXAMPLES_PATH", os.path.join(BASE_DIR, "json", "intent_examples.json"))
+# 参与投票的最近邻示例数
+INTENT_KNN_K = int(os.getenv("INTENT_KNN_K", "5"))
+# 最相似示例的余弦相似度下限，低于时交给远程模型
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.75"))
+# 得票最多的意图在k个近邻中的相似度加权占比下限，低于时交给远程模型
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.8"))
+# 本地不作答的意图，逗号分隔：误判代价高的拒答类意图总是交给远程模型（其示例仍参与投票）
+INTENT_LOCAL_SKIP = [label.strip() for label in
+                     os.getenv("INTENT_LOCAL_SKIP", "政治敏感,违法犯罪,违反道德").split(",") if label.strip()]
+
+
+class IntentClassifier:
+    """
+    基于示例问题的kNN意图分类器
+
+    示例问题用共享的文本向量化模型编码并归一化。分类时只在候选意图的示例中找k个最近邻，
+    按相似度加权投票；最相似示例足够接近且投票占比足够高时才给出结果，否则返回None，
+    由调用方交给远程意图模型。候选意图中有任何一个没有示例时也返回None，避免漏掉它。
+    得票最多的是skip_labels中的意图时同样返回None。
+    """
+
+    def __init__(self, examples: dict, model, k: int = None, min_similarity: float = None, min_confidence: float = None,
+                 skip_labels: list = None):
+        """
+        Args:
+            examples: 意图 -> 示例问题列表
+            model: 文本向量化模型（或编码工作池）
+            k: 参与投票的近邻数，默认INTENT_KNN_K
+            min_similarity: 最相似示例的相似度下限，默认INTENT_MIN_SIMILARITY
+            min_confidence: 投票占比下限，默认INTENT_MIN_CONFIDENCE
+            skip_labels: 本地不作答的意图，默认INTENT_LOCAL_SKIP
+        """
+        self.model = model
+        self.k = k or INTENT_KNN_K
+        self.min_similarity = INTENT_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self.min_confidence = INTENT_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.skip_labels = set(INTENT_LOCAL_SKIP if skip_labels is None else skip_labels)
+        self.texts = [text for texts in examples.values() for text in texts]
+        self.labels = np.array([label for label, texts in examples.items() for _ in texts])
+        self.vectors = _normalize(encode_corpus(model, self.texts)) if self.texts else np.zeros((0, 0), dtype='float32')
+
+    def scores(self, question: str, intent_list: list, exclude: int = None):
+        """
+        计算问题在候选意图上的投票结果
+
+        Args:
+            question: 用户问题
+            intent_list: 候选意图
+            exclude: 不参与投票的示例下标（离线留一评估用）
+
+        Returns:
+            tuple: (得票最多的意图, 投票占比, 最相似示例的相似度)；候选意图缺少示例时返回None
+        """
+        mask = np.isin(self.labels, intent_list)
+        if exclude is not None:
+            mask[exclude] = False
+        if not set(intent_list) <= set(self.labels[mask]):
+            return None
+        query = _normalize(encode_queries(self.model, [question]))[0]
+        candidates = np.flatnonzero(mask)
+        similarities = self.vectors[candidates] @ query
+        top = np.argsort(-similarities)[:self.k]
+        votes = {}
+        for i in top:
+            label = self.labels[candidates[i]]
+            votes[label] = votes.get(label, 0.0) + max(float(similarities[i]), 0.0)
+        best = max(votes, key=votes.get)
+        total = sum(votes.values())
+        return best, (votes[best] / total if total else 0.0), float(similarities[top[0]])
+
+    def classify(self, intent_list: list, question: str):
+        """
+        本地分类
+
+        Args:
+            intent_list: 候选意图
+            question: 用户问题
+
+        Returns:
+            str: 有把握时返回意图，否则返回None
+        """
+        result = self.scores(question, intent_list)
+        if result is None:
+            return None
+        label, confidence, similarity = result
+        if similarity < self.min_similarity or confidence < self.min_confidence or label in self.skip_labels:
+            return None
+        return str(label)
+
+
+def load_intent_examples(path: str = None) -> dict:
+    """
+    读取意图示例文件
+
+    Args:
+        path: 示例文件路径，默认INTENT_EXAMPLES_PATH
+
+    Returns:
+        dict: 意图 -> 示例问题列表，文件不存在或格式错误时返回空字典
+    """
+    try:
+        with open(path or INTENT_EXAMPLES_PATH, 'r', encoding='utf-8') as f:
+            examples = json.load(f)
+        return {label: [text for text in texts if text] for label, texts in examples.items()}
+    except Exception as e:
+        print(f"读取意图示例失败: {e}")
+        return {}
+
+
+def _normalize(vectors) -> np.ndarray:
+    """
+    按行归一化（私有方法）
+    """
+    vectors = np.asarray(vectors, dtype='float32')
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+# 进程内共享的分类器，首次使用时构建
+_classifier = None
+_classifier_lock = threading.Lock()
+_classifier_failed = False
+
+
+def get_intent_classifier():
+    """
+    获取进程内共享的意图分类器
+
+    Returns:
+        IntentClassifier: 分类器；未启用、没有示例或模型加载失败时返回None
+    """
+    global _classifier, _classifier_failed
+    if _classifier is None and INTENT_CLASSIFIER and not _classifier_failed:
+        with _classifier_lock:
+            if _classifier is None and not _classifier_failed:
+                examples = load_intent_examples()
+                worker = get_embedding_worker() if examples else None
+                if worker is None:
+                    _classifier_failed = True
+                    return None
+                try:
+                    _classifier = IntentClassifier(examples, worker)
+                except Exception as e:
+                    print(f"本地意图分类器加载失败，全部交给远程意图模型: {e}")
+                    _classifier_failed = True
+                    return None
+                print(f"本地意图分类器已加载: {len(_classifier.texts)} 条示例")
+    return _classifier
+
+
+def predict_intent(intent_list: list, question: str):
+    """
+    用本地分类器预测意图
+
+    Args:
+        intent_list: 候选意图
+        question: 用户问题
+
+    Returns:
+        str: 有把握时返回意图，否则返回None（调用方应改用远程意图模型）
+    """
+    if not question:
+        return None
+    try:
+        classifier = get_intent_classifier()
+        return classifier.classify(intent_list, question) if classifier else None
+    except Exception as e:
+        print(f"本地意图分类失败: {e}")
+        return None
+
+
+async def predict_intent_async(intent_list: list, question: str):
+    """
+    predict_intent 的异步版本，编码在线程池中执行
+    """
+    return await run_search(predict_intent, intent_list, question)
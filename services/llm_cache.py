@@ -0,0 +1,224 @@
+import os  # 导入操作系统模块
+import json  # 导入JSON模块
+import time  # 导入时间模块
+import hashlib  # 导入哈希模块
+import threading  # 导入线程模块
+from collections import OrderedDict  # 导入有序字典，用于LRU
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 缓存的有效期（秒）
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+# 进程内缓存的最大条数
+LLM_CACHE_L1_SIZE = int(os.getenv("LLM_CACHE_L1_SIZE", "1024"))
+# 是否使用Redis（多个进程共享、重启后仍然有效）
+LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "true").lower() == "true"
+# Redis键前缀
+LLM_CACHE_PREFIX = os.getenv("LLM_CACHE_PREFIX", "llm:resp:")
+# Redis出错后暂停访问的时间（秒）
+LLM_CACHE_REDIS_RETRY_AFTER = float(os.getenv("LLM_CACHE_REDIS_RETRY_AFTER", "30"))
+
+# 进程内缓存：键 -> (过期时间戳, JSON文本)；保存文本，命中时解析出新对象，调用方修改结果不影响缓存
+_l1 = OrderedDict()
+_l1_lock = threading.Lock()
+# 按调用位置统计：名称 -> {"l1_hits", "redis_hits", "misses"}
+_stats = {}
+_redis_paused_until = 0.0
+
+
+def llm_cache_key(model: str, system_prompt: str, user_prompt: str, **params) -> str:
+    """
+    由模型、提示词和其余参数生成缓存键
+
+    Args:
+        model: 模型名称
+        system_prompt: 系统提示词
+        user_prompt: 用户提示词
+        **params: 其余影响结果的参数，例如enable_thinking
+
+    Returns:
+        str: 缓存键（sha256）
+    """
+    payload = json.dumps([model, system_prompt, user_prompt, params], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def require_keys(*keys):
+    """
+    生成响应校验函数，供cache_valid参数使用
+
+    Args:
+        *keys: 调用位置需要的键
+
+    Returns:
+        function: 响应是非空字典且这些键的值都非空时返回True
+    """
+    def valid(data) -> bool:
+        return isinstance(data, dict) and bool(data) and all(data.get(key) for key in keys)
+    return valid
+
+
+def _count(name: str, field: str):
+    """
+    记录调用位置的命中情况（私有方法）
+    """
+    with _l1_lock:
+        _stats.setdefault(name, {"l1_hits": 0, "redis_hits": 0, "misses": 0})[field] += 1
+
+
+def _l1_get(key: str):
+    """
+    读取进程内缓存，返回JSON文本，未命中或过期返回None（私有方法）
+    """
+    with _l1_lock:
+        entry = _l1.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            _l1.pop(key)
+            return None
+        _l1.move_to_end(key)
+        return entry[1]
+
+
+def _l1_put(key: str, text: str, ttl: float):
+    """
+    写入进程内缓存，超过最大条数时淘汰最久未使用的条目（私有方法）
+    """
+    with _l1_lock:
+        _l1[key] = (time.monotonic() + ttl, text)
+        _l1.move_to_end(key)
+        while len(_l1) > LLM_CACHE_L1_SIZE:
+            _l1.popitem(last=False)
+
+
+def _redis_enabled() -> bool:
+    """
+    当前是否访问Redis（私有方法）
+    """
+    return LLM_CACHE_REDIS and time.monotonic() >= _redis_paused_until
+
+
+def _redis_failed(e: Exception):
+    """
+    Redis出错后暂停访问，期间只用进程内缓存（私有方法）
+    """
+    global _redis_paused_until
+    _redis_paused_until = time.monotonic() + LLM_CACHE_REDIS_RETRY_AFTER
+    print(f"大模型响应缓存访问Redis失败: {e}")
+
+
+def _hit(name: str, key: str, text: str, field: str, ttl: float = None):
+    """
+    命中后解析JSON，Redis命中时回填进程内缓存（私有方法）
+    """
+    if ttl:
+        _l1_put(key, text, ttl)
+    _count(name, field)
+    return json.loads(text)
+
+
+def llm_cache_get(name: str, key: str):
+    """
+    读取缓存的响应
+
+    Args:
+        name: 调用位置名称，用于统计命中率
+        key: llm_cache_key生成的缓存键
+
+    Returns:
+        缓存的响应，未命中返回None
+    """
+    text = _l1_get(key)
+    if text is not None:
+        return _hit(name, key, text, "l1_hits")
+    if _redis_enabled():
+        try:
+            from services.cache import _get_redis_client
+            # 一次往返读取内容和剩余有效期
+            text, ttl = _get_redis_client().pipeline(transaction=False).get(LLM_CACHE_PREFIX + key).ttl(LLM_CACHE_PREFIX + key).execute()
+        except Exception as e:
+            _redis_failed(e)
+        else:
+            if text is not None:
+                return _hit(name, key, text.decode("utf-8"), "redis_hits", ttl if ttl and ttl > 0 else LLM_CACHE_TTL)
+    _count(name, "misses")
+    return None
+
+
+def llm_cache_put(key: str, value, ttl: int = None):
+    """
+    写入响应，None（请求或解析失败）不缓存
+
+    Args:
+        key: llm_cache_key生成的缓存键
+        value: 可序列化为JSON的响应
+        ttl: 有效期（秒），默认LLM_CACHE_TTL
+    """
+    if value is None:
+        return
+    ttl = ttl or LLM_CACHE_TTL
+    text = json.dumps(value, ensure_ascii=False)
+    _l1_put(key, text, ttl)
+    if _redis_enabled():
+        try:
+            from services.cache import _get_redis_client
+            _get_redis_client().set(LLM_CACHE_PREFIX + key, text, ex=ttl)
+        except Exception as e:
+            _redis_failed(e)
+
+
+async def llm_cache_get_async(name: str, key: str):
+    """
+    llm_cache_get 的异步版本
+    """
+    text = _l1_get(key)
+    if text is not None:
+        return _hit(name, key, text, "l1_hits")
+    if _redis_enabled():
+        try:
+            from services.cache import _get_async_redis_client
+            async with _get_async_redis_client().pipeline(transaction=False) as pipe:
+                text, ttl = await pipe.get(LLM_CACHE_PREFIX + key).ttl(LLM_CACHE_PREFIX + key).execute()
+        except Exception as e:
+            _redis_failed(e)
+        else:
+            if text is not None:
+                return _hit(name, key, text.decode("utf-8"), "redis_hits", ttl if ttl and ttl > 0 else LLM_CACHE_TTL)
+    _count(name, "misses")
+    return None
+
+
+async def llm_cache_put_async(key: str, value, ttl: int = None):
+    """
+    llm_cache_put 的异步版本
+    """
+    if value is None:
+        return
+    ttl = ttl or LLM_CACHE_TTL
+    text = json.dumps(value, ensure_ascii=False)
+    _l1_put(key, text, ttl)
+    if _redis_enabled():
+        try:
+            from services.cache import _get_async_redis_client
+            await _get_async_redis_client().set(LLM_CACHE_PREFIX + key, text, ex=ttl)
+        except Exception as e:
+            _redis_failed(e)
+
+
+def llm_cache_stats() -> dict:
+    """
+    按调用位置统计命中率
+
+    Returns:
+        dict: 调用位置 -> {"l1_hits", "redis_hits", "misses", "hit_rate"}，以及进程内缓存条数
+    """
+    with _l1_lock:
+        sites = {}
+        for name, counts in _stats.items():
+            hits = counts["l1_hits"] + counts["redis_hits"]
+            total = hits + counts["misses"]
+            sites[name] = {**counts, "hit_rate": round(hits / total, 4) if total else 0.0}
+        return {"sites": sites, "l1_entries": len(_l1)}
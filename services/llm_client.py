@@ -0,0 +1,193 @@
+import os  # 导入操作系统模块
+import random  # 导入随机数模块，用于重试抖动
+import asyncio  # 导入异步IO模块
+import inspect  # 导入inspect模块，用于读取函数的默认模型
+import functools  # 导入functools模块
+import requests  # 导入requests库，用于识别网络错误
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池
+from dotenv import load_dotenv  # 导入环境变量加载器
+from fastapi import HTTPException  # 导入HTTP异常
+from services import llm_manager  # 导入同步的大模型请求方法
+from services.R import log  # 导入日志方法
+from services.llm_cache import llm_cache_key, llm_cache_get_async, llm_cache_put_async  # 导入大模型响应缓存
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 全局同时进行的大模型请求数（同时也是执行请求的线程数）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# 每个模型同时进行的请求数
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "8"))
+# 单次请求的超时时间（秒）
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# 图片、视频生成请求的超时时间（秒）
+LLM_MEDIA_TIMEOUT = float(os.getenv("LLM_MEDIA_TIMEOUT", "120"))
+# 失败后的重试次数
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+# 重试等待的基数和上限（秒），实际等待在[0, min(上限, 基数*2^n)]之间随机
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", "0.5"))
+LLM_RETRY_CAP = float(os.getenv("LLM_RETRY_CAP", "4"))
+
+# 执行同步请求的线程数。超时后asyncio不再等待结果并释放信号量，但同步请求无法中断，会继续占用线程直到
+# 上游返回；线程数只等于并发上限时，持续超时会让新请求和重试排在这些已放弃的请求后面。
+# 默认留出与并发上限相同的余量，容纳同样数量的已超时请求
+LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", str(LLM_MAX_CONCURRENCY * 2)))
+
+# 执行同步请求的线程池，与其他asyncio.to_thread调用分开，避免互相占满
+_executor = ThreadPoolExecutor(max_workers=LLM_EXECUTOR_WORKERS, thread_name_prefix="llm")
+# 信号量在首次使用时创建（需要在事件循环中）
+_global_semaphore = None
+_model_semaphores = {}
+
+
+def _semaphores(model: str) -> tuple:
+    """
+    获取全局和模型的信号量（私有方法）
+    """
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    semaphore = _model_semaphores.get(model)
+    if semaphore is None:
+        semaphore = _model_semaphores[model] = asyncio.Semaphore(LLM_MODEL_CONCURRENCY)
+    return _global_semaphore, semaphore
+
+
+def _retryable(e: Exception) -> bool:
+    """
+    判断异常是否值得重试：只重试超时、网络错误、限流（429）和服务端错误（5xx），
+    参数错误等4xx和代码异常（TypeError、KeyError等）直接抛出（私有方法）
+    """
+    if isinstance(e, HTTPException):
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, (asyncio.TimeoutError, TimeoutError, ConnectionError,
+                          requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+async def call_llm(func, *args, model: str = None, timeout: float = None, retries: int = None, **kwargs):
+    """
+    在线程池中执行同步的大模型请求方法，带并发限制、超时和抖动重试
+
+    Args:
+        func: llm_manager中的同步方法
+        *args: 位置参数
+        model: 模型名称，用于按模型限制并发；为None时使用func的默认模型
+        timeout: 单次请求超时（秒），默认LLM_TIMEOUT
+        retries: 失败后的重试次数，默认LLM_RETRIES
+        **kwargs: 关键字参数
+
+    Returns:
+        func的返回值
+
+    Raises:
+        Exception: 重试后仍失败时抛出最后一次的异常（超时为asyncio.TimeoutError）
+    """
+    if model is None:
+        model = _default_model(func)
+    else:
+        kwargs["model"] = model
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    retries = LLM_RETRIES if retries is None else retries
+    loop = asyncio.get_running_loop()
+    global_semaphore, model_semaphore = _semaphores(model)
+    attempt = 0
+    while True:
+        try:
+            async with global_semaphore, model_semaphore:
+                # 超时后不再等待结果，后台线程中的请求会自行结束
+                return await asyncio.wait_for(
+                    loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs)), timeout)
+        except Exception as e:
+            if attempt >= retries or not _retryable(e):
+                raise
+            delay = random.uniform(0, min(LLM_RETRY_CAP, LLM_RETRY_BASE * 2 ** attempt))
+            attempt += 1
+            log(f"{func.__name__} 第{attempt}次重试（{delay:.2f}秒后）: {type(e).__name__} {e}")
+            await asyncio.sleep(delay)
+
+
+@functools.lru_cache(maxsize=None)
+def _default_model(func) -> str:
+    """
+    读取方法签名中model参数的默认值（私有方法）
+    """
+    parameter = inspect.signature(func).parameters.get("model")
+    return parameter.default if parameter is not None and parameter.default is not inspect.Parameter.empty else func.__name__
+
+
+async def dashscope_chat_json_async(system_prompt: str, user_prompt: str, model: str = None, enable_thinking: bool = False,
+                                    cache: str = None, cache_ttl: int = None, cache_valid=None) -> dict:
+    """
+    dashscope_chat_json 的异步版本，cache、cache_ttl、cache_valid含义相同；命中缓存时不占用并发额度
+    """
+    if not cache:
+        return await call_llm(llm_manager.dashscope_chat_json, system_prompt, user_prompt, model=model, enable_thinking=enable_thinking)
+    key = llm_cache_key(model or _default_model(llm_manager.dashscope_chat_json), system_prompt, user_prompt, enable_thinking=enable_thinking)
+    cached = await llm_cache_get_async(cache, key)
+    if cached is not None:
+        return cached
+    data = await call_llm(llm_manager.dashscope_chat_json, system_prompt, user_prompt, model=model, enable_thinking=enable_thinking)
+    if cache_valid is None or cache_valid(data):
+        await llm_cache_put_async(key, data, cache_ttl)
+    return data
+
+
+async def dashscope_chat_block_async(system_prompt: str, user_prompt: str, model: str = None, enable_thinking: bool = False) -> str:
+    """
+    dashscope_chat_block 的异步版本；DashScope返回错误状态时（限流、服务端错误重试后）返回空字符串，与原来的行为一致
+    """
+    try:
+        return await call_llm(llm_manager.dashscope_chat_block, system_prompt, user_prompt, model=model, enable_thinking=enable_thinking)
+    except HTTPException:
+        return ""
+
+
+async def dashscope_chat_tool_async(tools_string: str, user_prompt: str, model: str = None) -> dict:
+    """
+    dashscope_chat_tool 的异步版本
+    """
+    return await call_llm(llm_manager.dashscope_chat_tool, tools_string, user_prompt, model=model)
+
+
+async def dashscope_chat_intent_async(intent_list: list[str], user_prompt: str, model: str = None) -> str:
+    """
+    dashscope_chat_intent 的异步版本
+    """
+    return await call_llm(llm_manager.dashscope_chat_intent, intent_list, user_prompt, model=model)
+
+
+async def dashscope_text2image_async(prompt: str, model: str = None, size: str = "1920*1080"):
+    """
+    dashscope_text2image 的异步版本
+    """
+    return await call_llm(llm_manager.dashscope_text2image, prompt, model=model, size=size, timeout=LLM_MEDIA_TIMEOUT)
+
+
+async def dashscope_image2image_async(prompt: str, images: list[str], model: str = None, size: str = "1280*1280"):
+    """
+    dashscope_image2image 的异步版本
+    """
+    return await call_llm(llm_manager.dashscope_image2image, prompt, images, model=model, size=size, timeout=LLM_MEDIA_TIMEOUT)
+
+
+async def dashscope_image2video_async(prompt: str, img_url: str, audio_url: str = None, model: str = None, resolution: str = "720P", duration: int = 10):
+    """
+    dashscope_image2video 的异步版本（提交任务不是幂等的，不重试）
+    """
+    return await call_llm(llm_manager.dashscope_image2video, prompt, img_url, audio_url, model=model, resolution=resolution, duration=duration,
+                          timeout=LLM_MEDIA_TIMEOUT, retries=0)
+
+
+async def dashscope_video2video_async(prompt: str, reference_video_urls: list[str], model: str = None, size: str = "1280*720", duration: int = 10):
+    """
+    dashscope_video2video 的异步版本（提交任务不是幂等的，不重试）
+    """
+    return await call_llm(llm_manager.dashscope_video2video, prompt, reference_video_urls, model=model, size=size, duration=duration,
+                          timeout=LLM_MEDIA_TIMEOUT, retries=0)
+
+
+async def dashscope_task_status_async(task_id: str):
+    """
+    dashscope_task_status 的异步版本（没有模型参数，按方法名单独限流）
+    """
+    return await call_llm(llm_manager.dashscope_task_status, task_id)
@@ -13,6 +13,9 @@ from fastapi import Request, HTTPException
 from fastapi.responses import StreamingResponse  # 导入流式响应
 from sse_starlette.sse import EventSourceResponse
 from starlette.concurrency import iterate_in_threadpool
+import asyncio
+import threading
+import concurrent.futures
 
 import dashscope  # 导入dashscope SDK
 from dashscope import Generation
@@ -20,6 +23,8 @@ from dashscope import ImageSynthesis
 
 # 导入R模块
 from services.R import log
+# 导入大模型响应缓存
+from services.llm_cache import llm_cache_key, llm_cache_get, llm_cache_put
 # 导入qwen_agent
 from qwen_agent.agents import Assistant
 
@@ -31,7 +36,91 @@ load_dotenv()
 dashscope.api_key = os.getenv("DASHSCOPE_API_KEY")
 
 
-def dashscope_chat_json(system_prompt: str, user_prompt: str, model: str = "qwen-flash", enable_thinking: bool = False) -> dict:
+# 流式响应在内存中最多缓冲的数据包数，客户端读取慢时上游读取线程会暂停
+LLM_STREAM_QUEUE_SIZE = int(os.getenv("LLM_STREAM_QUEUE_SIZE", "64"))
+# 流式响应结束的标记
+_STREAM_END = object()
+
+
+async def iterate_in_thread(iterator_factory, maxsize: int = None):
+    """
+    在独立线程中迭代同步迭代器，通过有界队列把结果交给事件循环
+
+    队列满时读取线程等待（背压），不会无限缓冲；调用方停止迭代（客户端断开、break或任务取消）时
+    通知读取线程停止，并关闭同步迭代器，从而关闭上游HTTP连接。
+
+    Args:
+        iterator_factory: 无参函数，在读取线程中调用，返回同步迭代器
+        maxsize: 队列容量，默认LLM_STREAM_QUEUE_SIZE
+
+    Yields:
+        同步迭代器产生的元素；读取线程中的异常会在这里重新抛出
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue(maxsize=maxsize or LLM_STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def _put(item) -> bool:
+        # 把元素放入队列，队列满时等待；调用方已停止时返回False
+        future = asyncio.run_coroutine_threadsafe(items.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if cancelled.is_set():
+                    future.cancel()
+                    return False
+
+    def _produce():
+        iterator = None
+        try:
+            iterator = iterator_factory()
+            for item in iterator:
+                if cancelled.is_set() or not _put(item):
+                    break
+            else:
+                _put(_STREAM_END)
+        except Exception as e:
+            if not cancelled.is_set():
+                try:
+                    _put(e)
+                except RuntimeError:
+                    pass  # 事件循环已关闭
+        finally:
+            # 关闭生成器，释放上游连接
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=_produce, name="llm-stream", daemon=True).start()
+    try:
+        while True:
+            item = await items.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 正常结束、break、客户端断开导致的任务取消都会走到这里
+        cancelled.set()
+
+
+def _check_status(response):
+    """
+    检查生成接口的响应状态，非200时抛出带DashScope错误码的HTTPException（私有方法）
+
+    DashScope出错时不抛异常，而是返回output为None的响应，直接读取output会变成AttributeError，
+    上层无法区分限流、服务端错误和参数错误。
+    """
+    if response.status_code != HTTPStatus.OK:
+        log(f"DashScope请求失败: {response.status_code} {response.code} {response.message}")
+        raise HTTPException(status_code=response.status_code, detail=f"DashScope {response.code}: {response.message}")
+
+
+def dashscope_chat_json(system_prompt: str, user_prompt: str, model: str = "qwen-flash", enable_thinking: bool = False,
+                        cache: str = None, cache_ttl: int = None, cache_valid=None) -> dict:
     """
     大语言模型请求方法，返回JSON格式的响应
 
@@ -40,9 +129,21 @@ def dashscope_chat_json(system_prompt: str, user_prompt: str, model: str = "qwen
         user_prompt (str): 用户输入的文本内容
         model (str, optional): 模型名称，默认值为"qwen-flash"
         enable_thinking (bool, optional): 是否开启深度思考，默认值为False
+        cache (str, optional): 调用位置名称，传入时按提示词缓存响应（只用于结果确定的选择类任务），默认不缓存
+        cache_ttl (int, optional): 缓存有效期（秒），默认LLM_CACHE_TTL
+        cache_valid (callable, optional): 响应校验函数，返回False时不缓存（例如缺少调用位置需要的键），默认缓存所有非None响应
     Returns:
         str: 模型返回的JSON格式文本内容
     """
+    if cache:
+        key = llm_cache_key(model, system_prompt, user_prompt, enable_thinking=enable_thinking)
+        cached = llm_cache_get(cache, key)
+        if cached is not None:
+            return cached
+        data = dashscope_chat_json(system_prompt, user_prompt, model, enable_thinking)
+        if cache_valid is None or cache_valid(data):
+            llm_cache_put(key, data, cache_ttl)
+        return data
 
     # 构建消息列表
     messages = [
@@ -57,6 +158,7 @@ def dashscope_chat_json(system_prompt: str, user_prompt: str, model: str = "qwen
         result_format='message',
         response_format={'type': 'json_object'}
     )
+    _check_status(response)
     try:
         # 尝试解析JSON字符串
         json_string = response.output.choices[0].message.content
@@ -79,6 +181,9 @@ def dashscope_chat_block(system_prompt: str, user_prompt: str, model: str = "qwe
 
     Returns:
         str: 模型返回的文本内容
+
+    Raises:
+        HTTPException: DashScope返回非200状态时抛出
     """
     # 构建消息列表
     messages = [
@@ -95,6 +200,7 @@ def dashscope_chat_block(system_prompt: str, user_prompt: str, model: str = "qwe
         result_format='message',
         stream=False,  # 开启流式传输
     )
+    _check_status(response)
 
     try:
         # 提取返回的文本内容
@@ -119,47 +225,53 @@ def dashscope_chat_stream(request: Request, system_prompt: str, user_prompt: str
     Returns:
         StreamingResponse: FastAPI流式响应对象
     """
+    def _call():
+        # 在后台线程中调用dashscope API，返回流式响应的同步迭代器
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        return Generation.call(
+            # 可按需更换为其它深度思考模型
+            model=model or "qwen-plus-2025-04-28",
+            messages=messages,
+            result_format="message",  # Qwen3开源版模型只支持设定为"message"；为了更好的体验，其它模型也推荐您优先设定为"message"
+            # 开启深度思考，该参数对qwen3-30b-a3b-thinking-2507、qwen3-235b-a22b-thinking-2507、QwQ、DeepSeek-R1 模型无效
+            enable_thinking=enable_thinking,
+            stream=True,  # 开启流式传输
+            incremental_output=True,  # Qwen3开源版模型只支持 true；为了更好的体验，其它模型也推荐您优先设定为 true
+        )
+
     # 定义内部生成器函数，用于生成流式内容
     async def _stream_generator():
         try:
             # 构建消息列表
             if system_prompt and user_prompt:
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-                # 调用dashscope API获取流式响应
-                responses = Generation.call(
-                    # 可按需更换为其它深度思考模型
-                    model=model or "qwen-plus-2025-04-28",
-                    messages=messages,
-                    result_format="message",  # Qwen3开源版模型只支持设定为"message"；为了更好的体验，其它模型也推荐您优先设定为"message"
-                    # 开启深度思考，该参数对qwen3-30b-a3b-thinking-2507、qwen3-235b-a22b-thinking-2507、QwQ、DeepSeek-R1 模型无效
-                    enable_thinking=enable_thinking,
-                    stream=True,  # 开启流式传输
-                    incremental_output=True,  # Qwen3开源版模型只支持 true；为了更好的体验，其它模型也推荐您优先设定为 true
-                )
-
-                # 遍历流式响应
-                for resp in responses:
-                    # 检查客户端是否断开连接
-                    if await request.is_disconnected():
-                        break
-                    # 检查响应状态码
-                    if resp.status_code == HTTPStatus.OK:
-                        # 获取AI回复内容
-                        content = resp.output.choices[0].message.content
-                        yield content  # 使用yield返回增量内容
-
-                        # 检查是否是最后一个数据包
-                        if resp.output.choices[0].finish_reason == "stop":
-                            break  # 结束流式输出
-                    else:
-                        # 处理错误情况
-                        # 构建错误信息
-                        error_msg = f"\n错误: code={resp.code}, message={resp.message}"
-                        yield error_msg  # 返回错误信息
-                        break  # 终止生成器
+                # 网络读取在后台线程中进行，事件循环只等待队列
+                responses = iterate_in_thread(_call)
+                try:
+                    async for resp in responses:
+                        # 检查客户端是否断开连接（断开后退出循环，后台线程随之关闭上游连接）
+                        if await request.is_disconnected():
+                            break
+                        # 检查响应状态码
+                        if resp.status_code == HTTPStatus.OK:
+                            # 获取AI回复内容
+                            content = resp.output.choices[0].message.content
+                            yield content  # 使用yield返回增量内容
+
+                            # 检查是否是最后一个数据包
+                            if resp.output.choices[0].finish_reason == "stop":
+                                break  # 结束流式输出
+                        else:
+                            # 处理错误情况
+                            # 构建错误信息
+                            error_msg = f"\n错误: code={resp.code}, message={resp.message}"
+                            yield error_msg  # 返回错误信息
+                            break  # 终止生成器
+                finally:
+                    # 立即停止后台线程并关闭上游连接，不等垃圾回收
+                    await responses.aclose()
 
         except Exception as e:  # 捕获异常
             yield f"\n发生错误: {str(e)}"  # 返回异常信息
@@ -188,6 +300,7 @@ def dashscope_chat_tool(tools_string: str, user_prompt: str, model: str = "tongy
         messages=messages,
         result_format="message"
     )
+    _check_status(response)
     # 获取响应内容
     json_string = response.output.choices[0].message.content
     # 解析文本内容
@@ -248,6 +361,7 @@ Just reply with the chosen tag."""
         messages=messages,
         result_format="message"
     )
+    _check_status(response)
     # 获取响应内容
     json_string = response.output.choices[0].message.content
     # 如果响应内容是意图字典的键，则返回对应的值
@@ -0,0 +1,195 @@
+import os  # 导入操作系统模块
+import re  # 导入正则表达式模块
+import time  # 导入时间模块
+import threading  # 导入线程模块
+import numpy as np  # 导入NumPy库
+from dotenv import load_dotenv  # 导入环境变量加载器
+from services.embedding_cache import EMBEDDING_MODEL_NAME  # 导入向量模型名称
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 编码后端：torch（text2vec SentenceModel）或 onnx（int8量化的ONNX Runtime CPU推理）
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# 量化ONNX模型所在目录，不存在时首次加载会自动导出
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.join(BASE_DIR, "vector_index", "onnx"))
+# 最大序列长度，与text2vec SentenceModel的默认值一致
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "256"))
+# 加载后用于预热的批大小，0表示不预热
+EMBEDDING_WARMUP_BATCH = int(os.getenv("EMBEDDING_WARMUP_BATCH", "8"))
+
+# 进程内共享的模型（(模型名称, 后端) -> 模型）
+_models = {}
+_models_lock = threading.Lock()
+# 每个模型的加载耗时（秒）
+_load_seconds = {}
+
+
+class OnnxSentenceModel:
+    """
+    int8量化ONNX模型的文本编码器
+
+    与text2vec SentenceModel的encode接口一致（MEAN池化），在CPU上用ONNX Runtime推理。
+    """
+
+    def __init__(self, model_name: str, onnx_path: str, max_seq_length: int = EMBEDDING_MAX_SEQ_LENGTH):
+        """
+        Args:
+            model_name: 模型名称，用于加载分词器
+            onnx_path: 量化后的ONNX模型文件
+            max_seq_length: 最大序列长度
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.max_seq_length = max_seq_length
+
+    def encode(self, sentences, batch_size: int = 64, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """
+        编码文本
+
+        Args:
+            sentences: 文本或文本列表
+            batch_size: 批大小
+
+        Returns:
+            np.ndarray: 输入为单个文本时返回一维向量，否则返回二维矩阵
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        # 按长度排序后分批，减少填充
+        order = np.argsort([-len(text) for text in sentences], kind="stable")
+        vectors = [None] * len(sentences)
+        for start in range(0, len(sentences), batch_size):
+            batch_index = order[start:start + batch_size]
+            encoded = self.tokenizer([sentences[i] for i in batch_index], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            inputs = {name: encoded[name].astype(np.int64) for name in encoded if name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+            # MEAN池化：按注意力掩码对词向量求平均
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            for i, vector in zip(batch_index, pooled):
+                vectors[i] = vector
+        result = np.stack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return result[0] if single else result
+
+
+def _onnx_path(model_name: str) -> str:
+    """
+    量化ONNX模型的文件路径（私有方法）
+    """
+    return os.path.join(EMBEDDING_ONNX_DIR, re.sub(r"[^0-9A-Za-z_.-]", "_", model_name) + ".int8.onnx")
+
+
+def export_quantized_onnx(model_name: str = EMBEDDING_MODEL_NAME) -> str:
+    """
+    把Transformer模型导出为ONNX并做int8动态量化
+
+    Args:
+        model_name: 模型名称
+
+    Returns:
+        str: 量化后的ONNX模型文件路径
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    output_path = _onnx_path(model_name)
+    fp32_path = output_path.replace(".int8.onnx", ".fp32.onnx")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    print(f"正在导出ONNX模型: {model_name} -> {output_path}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    sample = tokenizer(["预热文本"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print(f"ONNX模型已量化保存: {output_path}")
+    return output_path
+
+
+def _load(model_name: str, backend: str):
+    """
+    加载模型（私有方法）
+    """
+    if backend == "onnx":
+        try:
+            onnx_path = _onnx_path(model_name)
+            if not os.path.exists(onnx_path):
+                export_quantized_onnx(model_name)
+            return OnnxSentenceModel(model_name, onnx_path)
+        except ImportError as e:
+            # 未安装onnxruntime时使用默认后端
+            print(f"ONNX后端不可用，改用text2vec: {e}")
+    from text2vec import SentenceModel
+    return SentenceModel(model_name)
+
+
+def get_text_model(model_name: str = EMBEDDING_MODEL_NAME, backend: str = None):
+    """
+    获取进程内共享的文本向量化模型，首次调用时加载并预热
+
+    Args:
+        model_name: 模型名称
+        backend: 编码后端（torch或onnx），默认EMBEDDING_BACKEND
+
+    Returns:
+        模型实例（有encode方法），cache_key属性为向量缓存使用的名称；加载失败时返回None
+    """
+    backend = backend or EMBEDDING_BACKEND
+    key = (model_name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+        print(f"正在加载模型 {model_name} (后端: {backend})...")  # 打印模型加载提示
+        start = time.perf_counter()
+        try:
+            model = _load(model_name, backend)
+            if EMBEDDING_WARMUP_BATCH > 0:
+                # 预热：首次推理会分配内存、选择算子，放在加载阶段完成
+                model.encode(["预热"] * EMBEDDING_WARMUP_BATCH)
+        except Exception as e:  # 捕获加载异常
+            print(f"加载模型失败: {e}")  # 打印失败信息
+            return None
+        # 不同后端的向量略有差异，分开缓存
+        model.cache_key = f"{model_name}@onnx-int8" if isinstance(model, OnnxSentenceModel) else model_name
+        _load_seconds[key] = round(time.perf_counter() - start, 3)
+        print(f"模型已加载，耗时 {_load_seconds[key]} 秒")
+        _models[key] = model
+        return model
+
+
+def model_stats() -> dict:
+    """
+    已加载的模型及加载耗时
+
+    Returns:
+        dict: "模型名称@后端" -> 加载耗时（秒）
+    """
+    return {f"{name}@{backend}": seconds for (name, backend), seconds in _load_seconds.items()}
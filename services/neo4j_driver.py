@@ -0,0 +1,108 @@
+import os  # 导入操作系统模块
+import threading  # 导入线程模块
+from contextlib import contextmanager  # 导入上下文管理器装饰器
+from neo4j import GraphDatabase  # 导入Neo4j驱动
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# Neo4j 连接配置
+NEO4J_URI = os.getenv("NEO4J_URI", "neo4j://127.0.0.1:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "12345678")
+# 连接池配置
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))  # 最大连接数
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))  # 等待空闲连接的超时（秒）
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))  # 连接最长存活时间（秒）
+
+# 进程内共享的驱动（懒加载）
+_driver = None
+_driver_lock = threading.Lock()
+# 会话统计
+_session_stats = {"active": 0, "peak": 0, "total": 0}
+_session_stats_lock = threading.Lock()
+
+
+def get_driver():
+    """
+    获取进程内共享的Neo4j驱动，首次调用时创建
+
+    驱动自带连接池，所有查询共用同一个驱动，不要在调用方关闭；
+    进程退出时调用 close_driver()。
+
+    Returns:
+        neo4j.Driver: Neo4j驱动实例
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(
+                    NEO4J_URI,
+                    auth=(NEO4J_USER, NEO4J_PASSWORD),
+                    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                    connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+                    max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+                )
+    return _driver
+
+
+@contextmanager
+def neo4j_session(**kwargs):
+    """
+    从共享驱动打开一个会话，并记录会话数用于连接池统计
+
+    Args:
+        **kwargs: 透传给 driver.session() 的参数，例如 database
+
+    Yields:
+        neo4j.Session: 数据库会话
+    """
+    with _session_stats_lock:
+        _session_stats["active"] += 1
+        _session_stats["total"] += 1
+        _session_stats["peak"] = max(_session_stats["peak"], _session_stats["active"])
+    try:
+        with get_driver().session(**kwargs) as session:
+            yield session
+    finally:
+        with _session_stats_lock:
+            _session_stats["active"] -= 1
+
+
+def close_driver():
+    """
+    关闭共享驱动及其连接池，进程退出时调用
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+def pool_stats() -> dict:
+    """
+    获取Neo4j连接池使用情况
+
+    Returns:
+        dict: max_pool_size、活动会话数、峰值、累计会话数、利用率，以及驱动连接池中
+              各服务器地址的连接数（in_use/idle，取决于驱动版本是否提供）
+    """
+    with _session_stats_lock:
+        stats = dict(_session_stats)
+    stats["max_pool_size"] = NEO4J_MAX_POOL_SIZE
+    stats["utilisation"] = round(stats["active"] / NEO4J_MAX_POOL_SIZE, 4) if NEO4J_MAX_POOL_SIZE else 0.0
+    stats["connected"] = _driver is not None
+    # 驱动没有公开连接池统计接口，这里尽量读取内部连接池，读取失败时忽略
+    servers = {}
+    try:
+        pool = _driver._pool if _driver is not None else None
+        for address, connections in dict(getattr(pool, "connections", {})).items():
+            in_use = sum(1 for connection in list(connections) if getattr(connection, "in_use", False))
+            servers[str(address)] = {"in_use": in_use, "idle": len(connections) - in_use}
+    except Exception:
+        servers = {}
+    stats["servers"] = servers
+    return stats
@@ -7,11 +7,16 @@ if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 from fastmcp import FastMCP  # 导入FastMCP框架
 import json  # 导入JSON库
+import threading  # 导入线程模块
 import random # 导入random库 用于生成随机数
 import string # 导入string库 用于处理字符串
 from datetime import datetime, timedelta # 导入datetime库 用于处理日期和时间
 from services.llm_manager import dashscope_chat_json
-from neo4j import GraphDatabase
+from services.llm_client import dashscope_chat_json_async  # 导入异步的大模型请求
+from services.llm_cache import require_keys  # 导入缓存响应校验
+from services.neo4j_driver import neo4j_session  # 导入共享的Neo4j驱动会话
+from services.relation_index import RelationIndex  # 导入表关系路径索引
+from services.scheme_registry import get_datawork_registry  # 导入表结构注册表
 import pandas as pd
 
 
@@ -207,40 +212,14 @@ def generate_random_datetime(start_date_str=None, end_date_str=None):
     return random_date.strftime(date_format)
 
 
-# Neo4j 配置 (请根据你的实际情况修改)
-NEO4J_URI = os.getenv("NEO4J_URI", "neo4j://127.0.0.1:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "12345678")  # 替换为你刚才设置的密码
 # 定义全局路径
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATAWORK_DIR = os.path.join(BASE_DIR, "datawork")
 MCP_RELATION_PATH = os.path.join(BASE_DIR, "mcp_relation.json")
 
 def load_datawork_meta():
-    """加载datawork目录下的元数据，返回属性映射和表名映射"""
-    attr_map = {}
-    table_map = {}
-    # 遍历datawork目录
-    for root, dirs, files in os.walk(DATAWORK_DIR):
-        for file in files:
-            if file.endswith(".json"):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        main_tab = data.get('mainTabClazz')
-                        table_name = data.get('table_name', main_tab)
-                        
-                        if main_tab:
-                            table_map[main_tab] = table_name
-                            
-                            # 映射属性名到mainTabClazz
-                            resp = data.get('response', {})
-                            for attr in resp.keys():
-                                attr_map[attr] = main_tab
-                except Exception:
-                    continue
-    return attr_map, table_map
+    """加载datawork目录下的元数据，返回属性映射和表名映射（从内存中的注册表读取，文件变化时自动重新加载）"""
+    registry = get_datawork_registry()
+    return registry.attr_map(), registry.table_map()
 
 def load_relations():
     """加载mcp_relation.json中的所有关系，构建有向图和邻接表"""
@@ -269,20 +248,105 @@ def load_relations():
             pass
     return adj, directed_edges
 
-def find_relation_path_logic(attributes: list[str]) -> dict:
+# 进程内共享的表关系路径索引（懒加载）
+_relation_index = None
+_relation_index_version = None  # 构建索引时datawork注册表的版本
+_relation_index_lock = threading.Lock()
+
+
+def rebuild_relation_index() -> RelationIndex:
     """
-    根据输入的属性名数组，查找对应表之间的关系路径
-    输入：属性名数组
-    输出：路径编码-中文简述 字典
+    重新加载datawork元数据和mcp_relation.json，构建表关系路径索引
+
+    服务启动和表结构、关系变化后调用。
+
+    Returns:
+        RelationIndex: 新的索引
+    """
+    global _relation_index, _relation_index_version
+    registry = get_datawork_registry()
+    registry.refresh(force=True)
+    adj, directed_edges = load_relations()
+    index = RelationIndex(registry.attr_map(), registry.table_map(), adj, directed_edges)
+    with _relation_index_lock:
+        _relation_index = index
+        _relation_index_version = registry.version
+    print(f"表关系路径索引已构建: {index.stats()}")
+    return index
+
+
+def get_relation_index() -> RelationIndex:
+    """
+    获取表关系路径索引，首次调用或datawork表结构变化时构建
+
+    Returns:
+        RelationIndex: 表关系路径索引
+    """
+    index = _relation_index
+    registry = get_datawork_registry()
+    registry.refresh()
+    # datawork表结构有变化时重建
+    if index is None or _relation_index_version != registry.version:
+        index = rebuild_relation_index()
+    return index
+
+
+def find_candidate_paths(index: RelationIndex, tables: list, limit: int = 5) -> dict:
+    """
+    从索引中取出表之间经过全部表的候选路径
+
+    Args:
+        index: 表关系路径索引
+        tables: 去重后的表名列表
+        limit: 每对表最多返回的路径条数
+
+    Returns:
+        dict: 路径编码 -> 中文简述
+    """
+    from itertools import combinations
+
+    result = {}
+    for start_node, end_node in combinations(tables, 2):
+        found = 0
+        for path in index.paths(start_node, end_node):
+            if found >= limit:
+                break
+            # 仅保留经过全部tables的节点的路径
+            if not all(t in path for t in tables):
+                continue
+            found += 1
+            # 生成路径编码
+            path_code = "-".join(path)
+            # 生成中文简述
+            path_desc = "-".join([index.table_map.get(n, n) for n in path])
+            result[path_code] = path_desc
+    return result
+
+
+# 从候选路径中选择最优路径的提示词
+RELATION_PATH_PROMPT = """
+    你是ERP数据分析专家，擅长分析数据结构，选择最优路径找到答案
+    用户会提供路径集合，请按常规业务逻辑分析并推荐最优路径 返回最佳路径编号
+    输出格式为JSON:
+    { "best":"XXXXX-XXX-XXX"}   
     """
-    # 1. 加载元数据
-    attr_map, table_map = load_datawork_meta()
+
+
+def _relation_path_candidates(attributes: list[str]):
+    """
+    找到属性对应的表及其之间的候选路径（私有方法）
+
+    Returns:
+        tuple: (直接返回的结果, 候选路径)，需要大模型选择时第一项为None
+    """
+    # 1. 获取预先构建的路径索引
+    index = get_relation_index()
     
     # 2. 找到属性名对应的 mainTabClazz
     tables = []
     for attr in attributes:
-        if attr in attr_map:
-            tables.append(attr_map[attr])
+        if attr in index.attr_map:
+            tables.append(index.attr_map[attr])
             
     # 去重并保持顺序
     seen = set()
@@ -296,101 +360,60 @@ def find_relation_path_logic(attributes: list[str]) -> dict:
 
     # 如果找不到足够的表，返回提示
     if len(unique_tables) < 0:
-        return {"error": "Need at least two distinct tables identified from attributes.", "identified_tables": unique_tables}
+        return {"error": "Need at least two distinct tables identified from attributes.", "identified_tables": unique_tables}, None
     if len(unique_tables) == 1:
-        return {"message": unique_tables[0]}
+        return {"message": unique_tables[0]}, None
         
-    # 3. 加载关系数据
-    adj, directed_edges = load_relations()
-    
-    # 4. 查找所有节点对之间的路径
-    from itertools import combinations
-    
-    result = {}
-    limit = 5
-    max_depth = 12 # 防止过深
-    
-    # 对每对节点进行路径查找
-    for start_node, end_node in combinations(unique_tables, 2):
-        queue = [[start_node]]
-        found_paths = []
-        iterations = 0
-        MAX_ITERATIONS = 50000
-        
-        while queue and len(found_paths) < limit and iterations < MAX_ITERATIONS:
-            iterations += 1
-            path = queue.pop(0)
-            node = path[-1]
-            
-            if node == end_node:
-                # 检查路径方向一致性
-                is_valid_direction = True
-                if len(path) > 1:
-                    # 检查是否全部是正向 (A->B->C)
-                    all_forward = True
-                    for i in range(len(path) - 1):
-                        if (path[i], path[i+1]) not in directed_edges:
-                            all_forward = False
-                            break
-                    
-                    # 检查是否全部是反向 (A<-B<-C)
-                    all_backward = True
-                    for i in range(len(path) - 1):
-                        if (path[i+1], path[i]) not in directed_edges:
-                            all_backward = False
-                            break
-                            
-                    # 只有全正向或全反向才算方向一致
-                    if not all_forward and not all_backward:
-                        is_valid_direction = False
-                
-                if is_valid_direction:
-                    # 仅保留经过全部unique_tables的节点的路径
-                    if all(t in path for t in unique_tables):
-                        found_paths.append(path)
-                continue
-                
-            if len(path) >= max_depth:
-                continue
-                
-            if node in adj:
-                for neighbor in adj[node]:
-                    if neighbor not in path:
-                        new_path = list(path)
-                        new_path.append(neighbor)
-                        queue.append(new_path)
-                        
-        # 格式化当前对的路径
-        for path in found_paths:
-            # 生成路径编码
-            path_code = "-".join(path)
-            # 生成中文简述
-            path_desc = "-".join([table_map.get(n, n) for n in path])
-            result[path_code] = path_desc
+    # 3. 查找所有节点对之间的路径（直接从索引中取出）
+    result = find_candidate_paths(index, unique_tables)
     print(result)       
     if not result:
-        return {"error": f"No path found between identified tables: {unique_tables}"}
-    
-    system_prompt= """
-    你是ERP数据分析专家，擅长分析数据结构，选择最优路径找到答案
-    用户会提供路径集合，请按常规业务逻辑分析并推荐最优路径 返回最佳路径编号
-    输出格式为JSON:
-    { "best":"XXXXX-XXX-XXX"}   
-    """
+        return {"error": f"No path found between identified tables: {unique_tables}"}, None
+    return None, result
 
-    data = dashscope_chat_json(system_prompt, json.dumps(result, ensure_ascii=False, indent=4))
+
+def _best_path(data) -> dict:
+    """
+    解析大模型选择的最优路径（私有方法）
+    """
     if data and "best" in data:
         print(data["best"])
         return {"message": data["best"]}
     else:
         return {"error": "None"}
 
+
+def find_relation_path_logic(attributes: list[str]) -> dict:
+    """
+    根据输入的属性名数组，查找对应表之间的关系路径
+    输入：属性名数组
+    输出：路径编码-中文简述 字典
+    """
+    early, result = _relation_path_candidates(attributes)
+    if early is not None:
+        return early
+    data = dashscope_chat_json(RELATION_PATH_PROMPT, json.dumps(result, ensure_ascii=False, indent=4),
+                               cache="relation_path", cache_valid=require_keys("best"))
+    return _best_path(data)
+
+
+async def find_relation_path_logic_async(attributes: list[str]) -> dict:
+    """
+    find_relation_path_logic 的异步版本，大模型请求不阻塞事件循环
+    """
+    early, result = _relation_path_candidates(attributes)
+    if early is not None:
+        return early
+    # 相同的表集合得到相同的候选路径，选择结果可以缓存（只缓存包含best的响应）
+    data = await dashscope_chat_json_async(RELATION_PATH_PROMPT, json.dumps(result, ensure_ascii=False, indent=4),
+                                           cache="relation_path", cache_valid=require_keys("best"))
+    return _best_path(data)
+
 def select(start_clazz:str,end_clazz:str):
     """
     查询 Neo4j 数据库中的关系
     """
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:        
+    with neo4j_session() as session:        
         # 定义一个f-string格式的Cypher查询字符串
         for i in range(1,5):
             query = f"""
@@ -415,8 +438,7 @@ def select_one(clazz:str):
     """
     根据clazz查询单个节点，只返回一个结果
     """
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:
+    with neo4j_session() as session:
         query = f"MATCH (n:`{clazz}`) RETURN n"
         print(query)
         result = session.run(query)
@@ -447,8 +469,7 @@ def select_list(clazz_list: list[str]):
     if not clazz_list or len(clazz_list) == 1:
         return select_one(clazz_list[0])
 
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:
+    with neo4j_session() as session:
         # 动态构建链式查询语句
         # 假设 clazz_list = ['A', 'B', 'C']
         # 目标: MATCH p = (n0:`A`)-[*1..4]-(n1:`B`)-[*1..4]-(n2:`C`) RETURN p
@@ -584,10 +605,8 @@ def update_node_properties(clazz: str, match_properties: dict, update_properties
         # 如果为空，则返回错误信息，因为无法定位要更新的节点
         return {"error": "match_properties cannot be empty."}
 
-    # 使用配置的URI、用户名和密码创建Neo4j数据库驱动实例
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     # 创建一个数据库会话，使用'with'确保会话在使用后自动关闭
-    with driver.session() as session:
+    with neo4j_session() as session:
         # 为每个匹配属性生成一个Cypher WHERE子句部分
         where_clauses = [f"n.{key} = ${key}" for key in match_properties.keys()]
         # 将所有WHERE子句用'AND'连接成一个完整的WHERE条件字符串
@@ -606,61 +625,6 @@ def update_node_properties(clazz: str, match_properties: dict, update_properties
         
         # 在控制台打印将要执行的Cypher查询语句，便于调试
         print(f"Executing query: {query}")
-
-
-# 根据时间范围查找节点的函数
-def find_nodes_by_time_range(clazz: str, attribute: str, start_time: str, end_time: str) -> list:
-    """
-    根据时间范围查找节点
-    :param clazz: 节点标签
-    :param attribute: 用于时间范围过滤的属性名
-    :param start_time: 开始时间 (e.g., "2026-01-01 00:00:00")
-    :param end_time: 结束时间 (e.g., "2026-12-31 23:59:59")
-    """
-    # 使用配置的URI、用户名和密码创建Neo4j数据库驱动实例
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    # 创建一个数据库会话，使用'with'确保会话在使用后自动关闭
-    with driver.session() as session:
-        # 如果开始时间或结束时间为空，则不进行时间过滤
-        if not start_time or not end_time:
-            query = f"""
-            MATCH (n:`{clazz}`)
-            RETURN n
-            LIMIT 300
-            """
-            parameters = {}
-        else:
-            # 构建Cypher查询语句，用于匹配指定标签的节点，并根据时间属性进行过滤
-            query = f"""
-                MATCH (n:`{clazz}`) 
-                WHERE n.{attribute} >= "{start_time}" AND n.{attribute} <= "{end_time}" 
-                RETURN n
-                """
-            # 定义查询参数，防止Cypher注入
-            parameters = {"start_time": start_time, "end_time": end_time}
-        
-        # 在控制台打印将要执行的Cypher查询语句和参数，便于调试
-        print(f"Executing query: {query} with parameters: {parameters}")
-        # 执行查询
-        result = session.run(query, parameters)
-        
-        # 将结果转换为列表
-        records = list(result)
-        
-        # 如果查询到记录
-        if records:
-            # 创建一个空列表，用于存放格式化后的结果
-            formatted_results = []
-            # 遍历每一条记录
-            for record in records:
-                # 获取记录中的节点对象
-                node = record['n']
-                # 将节点的属性字典添加到结果列表中
-                formatted_results.append(dict(node))
-            # 返回包含结果列表的消息字典
-            return formatted_results
-        # 如果没有找到数据，返回一个包含空列表的消息字典
-        return []
         # 在控制台打印传递给查询的参数，便于调试
         print(f"With parameters: {parameters}")
 
@@ -679,6 +643,108 @@ def find_nodes_by_time_range(clazz: str, attribute: str, start_time: str, end_ti
             return {"message": "No nodes found matching the criteria."}
 
 
+# Neo4j 分页配置
+NEO4J_PAGE_SIZE = int(os.getenv("NEO4J_PAGE_SIZE", "5000"))  # 每页读取的节点数
+# 已确认存在范围索引的 (标签, 属性)
+_range_indexes = set()
+
+
+def _quote(name: str) -> str:
+    """
+    将标签或属性名转义为Cypher标识符（私有方法）
+    """
+    return "`" + name.replace("`", "``") + "`"
+
+
+def ensure_range_index(clazz: str, attribute: str):
+    """
+    为标签的时间属性创建范围索引（已存在则跳过），同一进程内每个属性只检查一次
+
+    Args:
+        clazz: 节点标签
+        attribute: 属性名，例如 bizOrderDetailAuditDate
+    """
+    if (clazz, attribute) in _range_indexes:
+        return
+    index_name = "range_" + "".join(c if c.isalnum() else "_" for c in f"{clazz}_{attribute}")
+    query = f"CREATE INDEX {_quote(index_name)} IF NOT EXISTS FOR (n:{_quote(clazz)}) ON (n.{_quote(attribute)})"
+    try:
+        with neo4j_session() as session:
+            session.run(query).consume()
+        _range_indexes.add((clazz, attribute))
+    except Exception as e:
+        # 建索引失败不影响查询
+        print(f"创建范围索引失败: {query}, {e}")
+
+
+def iter_nodes_by_time_range(clazz: str, attribute: str, start_time: str, end_time: str, page_size: int = None):
+    """
+    根据时间范围分页查找节点，每页为节点属性字典列表
+
+    查询参数化以复用执行计划；时间属性自动建立范围索引。按 (时间属性, elementId) 排序后用键集分页：
+    每页从上一页最后一个节点之后开始，时间相同的节点不会重复或遗漏，翻页期间写入新节点也不会使后续页错位。
+
+    Args:
+        clazz: 节点标签
+        attribute: 用于时间范围过滤的属性名
+        start_time: 开始时间 (e.g., "2026-01-01 00:00:00")
+        end_time: 结束时间 (e.g., "2026-12-31 23:59:59")
+        page_size: 每页节点数，默认NEO4J_PAGE_SIZE
+
+    Yields:
+        list: 一页节点的属性字典
+    """
+    # 如果开始时间或结束时间为空，则不进行时间过滤
+    if not start_time or not end_time:
+        query = f"MATCH (n:{_quote(clazz)}) RETURN properties(n) AS properties LIMIT 300"
+        with neo4j_session() as session:
+            page = [record["properties"] for record in session.run(query).data()]
+        if page:
+            yield page
+        return
+
+    ensure_range_index(clazz, attribute)
+    page_size = page_size or NEO4J_PAGE_SIZE
+    attr = _quote(attribute)
+    # 构建参数化的Cypher查询语句，按时间属性过滤和排序，可以使用范围索引。
+    # $start_time为上一页最后一个节点的时间（首页为开始时间），时间相同时只取elementId更大的节点（首页$last_id为空串）
+    query = f"""
+        MATCH (n:{_quote(clazz)})
+        WHERE n.{attr} >= $start_time AND n.{attr} <= $end_time
+          AND (n.{attr} > $start_time OR elementId(n) > $last_id)
+        WITH n ORDER BY n.{attr}, elementId(n) LIMIT $limit
+        RETURN properties(n) AS properties, n.{attr} AS sort_value, elementId(n) AS element_id
+        """
+    parameters = {"start_time": start_time, "end_time": end_time, "last_id": "", "limit": page_size}
+    print(f"Executing query: {query} with parameters: {parameters}")
+    with neo4j_session() as session:
+        while True:
+            # 一次取回整页数据
+            records = session.run(query, parameters).data()
+            if records:
+                yield [record["properties"] for record in records]
+            if len(records) < page_size:
+                return
+            # 下一页从本页最后一个节点之后开始
+            parameters["start_time"] = records[-1]["sort_value"]
+            parameters["last_id"] = records[-1]["element_id"]
+
+
+# 根据时间范围查找节点的函数
+def find_nodes_by_time_range(clazz: str, attribute: str, start_time: str, end_time: str) -> list:
+    """
+    根据时间范围查找节点
+    :param clazz: 节点标签
+    :param attribute: 用于时间范围过滤的属性名
+    :param start_time: 开始时间 (e.g., "2026-01-01 00:00:00")
+    :param end_time: 结束时间 (e.g., "2026-12-31 23:59:59")
+    """
+    results = []
+    for page in iter_nodes_by_time_range(clazz, attribute, start_time, end_time):
+        results.extend(page)
+    return results
+
+
 def testcase1():
     result = find_relation_path_logic(["bizOrderDetailAuditStatus", "contractDetailBriefName","prdRetDetBusDivisId"])
     print(json.dumps(result, ensure_ascii=False, indent=4))
@@ -761,10 +827,8 @@ def update_node_with_random_value_by_property(clazz: str, property_name: str, ra
     :param random_type: 随机值类型 (e.g., "string", "name", "number", "material", "company_name", "sequential_code")
     :param kwargs: 传递给随机值生成函数的可选参数 (e.g., length=10, prefix="AB")
     """
-    # 使用配置的URI、用户名和密码创建Neo4j数据库驱动实例
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     # 创建一个数据库会话，使用'with'确保会话在使用后自动关闭
-    with driver.session() as session:
+    with neo4j_session() as session:
         # 构建Cypher查询，查找所有具有指定标签的节点
         query_find = f"MATCH (n:`{clazz}`) RETURN n"
         # 执行查找查询
@@ -895,9 +959,8 @@ def create_nodes_from_excel(clazz, excel_file_path, primary_key=None):
     :param excel_file_path: 包含节点数据的Excel文件路径
     :param primary_key: 用于MERGE操作的主键字段名 (e.g., "bizOrderDetailId")
     """
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
-    with driver.session() as session:
+    with neo4j_session() as session:
         try:
             # 使用pandas读取Excel文件
             df = pd.read_excel(excel_file_path)
@@ -968,9 +1031,8 @@ def create_nodes_from_json(clazz, json_file_path, primary_key=None):
         print("错误: JSON文件的顶层结构必须是一个数组/列表。")
         return
 
-    # 连接到Neo4j数据库
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:
+    # 使用共享驱动打开会话
+    with neo4j_session() as session:
         # 遍历列表中的每个对象并创建节点
         for properties in data:
             if isinstance(properties, dict):
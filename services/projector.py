@@ -0,0 +1,118 @@
+import threading  # 导入线程模块
+import pandas as pd  # 导入Pandas库
+
+# 已编译的字段投影器（function_name -> FieldProjector）
+_projectors = {}
+_projectors_lock = threading.Lock()
+
+
+class FieldProjector:
+    """
+    由 filtered_fields 配置编译而成的字段投影器
+
+    配置只解析一次：得到需要读取的原始字段、列名映射和值翻译表。
+    执行时按列取出配置的字段、改名，值翻译对每个不同的值只查表一次，
+    不再逐行逐字段判断配置类型。记录中缺少的字段保持为空，不参与翻译。
+    """
+
+    def __init__(self, filtered_fields):
+        """
+        编译字段配置
+
+        Args:
+            filtered_fields: 字段配置字典，值为列名字符串或 {"name": 列名, "values": 值映射}
+        """
+        self.spec = filtered_fields
+        self.fields = []  # [(原始字段, 列名, 值映射或None)]，保持配置顺序
+        if isinstance(filtered_fields, dict):
+            for field_key, field_config in filtered_fields.items():
+                if isinstance(field_config, dict):
+                    # 字典配置，获取显示的列名和值映射
+                    mapping = field_config.get("values")
+                    self.fields.append((field_key, field_config.get("name", field_key),
+                                        mapping if isinstance(mapping, dict) else None))
+                else:
+                    # 配置只是字符串，直接作为列名
+                    self.fields.append((field_key, field_config, None))
+
+    def __call__(self, records: list) -> pd.DataFrame:
+        """
+        将一页上游JSON记录投影为DataFrame
+
+        Args:
+            records: 上游返回的记录列表
+
+        Returns:
+            pd.DataFrame: 仅包含配置字段、已改名并完成值翻译的数据
+        """
+        columns = {}
+        for field_key, header, mapping in self.fields:
+            # 按列取值，记录中没有该字段的位置用_MISSING标记，不参与翻译
+            values = [record.get(field_key, _MISSING) for record in records]
+            if mapping is not None:
+                values = _translate(values, mapping)
+            if header in columns:
+                # 多个字段映射到同一列名时，记录中存在后面的字段则覆盖
+                values = [previous if value is _MISSING else value for value, previous in zip(values, columns[header])]
+            columns[header] = values
+        # 缺失的位置补None，并在翻译之后由列表构建DataFrame推断类型（与逐行构建时一致，代码列不会先变成浮点数）
+        return pd.DataFrame({header: [None if value is _MISSING else value for value in values]
+                             for header, values in columns.items()}, index=range(len(records)))
+
+
+# 记录中缺少字段的标记
+_MISSING = object()
+
+
+def _translate_value(raw_value, mapping: dict):
+    """
+    翻译单个值：优先直接匹配，其次按小写字符串匹配（针对true/false），找不到则保留原值（私有方法）
+    """
+    try:
+        if raw_value in mapping:
+            return mapping[raw_value]
+    except TypeError:
+        # 列表、字典等不可哈希的值只按字符串匹配
+        pass
+    return mapping.get(str(raw_value).lower(), raw_value)
+
+
+def _translate(values: list, mapping: dict) -> list:
+    """
+    按值映射翻译一列：每个不同的值只查表一次，缺失的位置保持_MISSING（私有方法）
+    """
+    translated = {}  # (类型, 值) -> 翻译结果；带上类型，避免True与1、1与1.0共用结果
+    result = []
+    for value in values:
+        if value is _MISSING:
+            result.append(value)
+            continue
+        try:
+            key = (type(value), value)
+            if key not in translated:
+                translated[key] = _translate_value(value, mapping)
+            result.append(translated[key])
+        except TypeError:
+            # 不可哈希的值直接翻译
+            result.append(_translate_value(value, mapping))
+    return result
+
+
+def get_projector(function_name: str, filtered_fields) -> FieldProjector:
+    """
+    获取接口对应的字段投影器，按function_name缓存，配置变化时重新编译
+
+    Args:
+        function_name: 接口名称
+        filtered_fields: 字段配置
+
+    Returns:
+        FieldProjector: 字段投影器
+    """
+    projector = _projectors.get(function_name)
+    if projector is not None and projector.spec == filtered_fields:
+        return projector
+    projector = FieldProjector(filtered_fields)
+    with _projectors_lock:
+        _projectors[function_name] = projector
+    return projector
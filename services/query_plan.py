@@ -0,0 +1,347 @@
+import asyncio  # 导入异步IO模块
+import json  # 导入JSON模块
+from typing import Optional  # 导入类型提示
+import pandas as pd  # 导入Pandas库
+import services.tool as tool  # 导入工具模块
+from services.cache import (  # 导入缓存服务
+    cache_load_async,
+    cache_load_df_async,
+    cache_load_df_many_async,
+    cache_save_async,
+    cache_expire_many_async,
+    cache_snapshot_async,
+    local_cache_get,
+    local_cache_put,
+    local_cache_invalidate,
+)
+
+# 查询计划在Redis中的键前缀，计划本身是很小的JSON文本
+PLAN_PREFIX = "查询计划_"
+# 查询计划及其源表的过期时间（秒），与结果表缓存一致
+PLAN_EXPIRE_TIME = 600
+# 计划源表快照的键前缀。表令牌在同一接口再次取数时会被覆盖，计划引用按内容哈希保存的快照，
+# 结果与创建时的数据一致（与原来保存结果副本的行为相同），各进程也按同一份数据计算
+PLAN_SOURCE_PREFIX = "计划源表_"
+
+# 查询计划结构（惰性执行，只记录步骤不生成中间表）：
+# {
+#     "source": 源表令牌,
+#     "source_columns": 源表的列名,
+#     "columns": 最终输出的列名,
+#     "steps": [
+#         {"op": "project", "columns": [...]},
+#         {"op": "sort", "column": 列名, "ascending": True},
+#         {"op": "aggregate", "group_column": 列名, "agg_column": 列名, "agg_function": "sum"},
+#         {"op": "operation", "col1": 列名, "col2": 列名, "operation": "+"},
+#         {"op": "ratio", "target_column": 列名},
+#         {"op": "merge", "right": 从表查询计划, "key_left": 列名, "key_right": 列名},
+#     ]
+# }
+# 每个步骤同时记录该步骤输出的列名 "columns"，用于规划期校验和执行期的列裁剪；
+# 执行结果的列与之一致（合并后全为空的列也保留）。
+
+
+class PlanError(Exception):
+    """查询计划无法执行（例如分组聚合失败、合并后无数据）"""
+
+
+async def load_plan_async(token: str) -> Optional[dict]:
+    """
+    读取结果令牌对应的查询计划
+
+    Args:
+        token: 表令牌或结果令牌
+
+    Returns:
+        dict: 查询计划，非计划结果令牌返回None
+    """
+    text = await cache_load_async(PLAN_PREFIX + token)
+    if text is None:
+        return None
+    return json.loads(text)
+
+
+async def base_plan_async(token: str) -> Optional[dict]:
+    """
+    获取以令牌为输入的查询计划：结果令牌返回其计划，表令牌先保存源表快照，返回只包含快照的计划
+
+    Args:
+        token: 表令牌或结果令牌
+
+    Returns:
+        dict: 查询计划，数据不存在时返回None
+    """
+    plan = await load_plan_async(token)
+    if plan is not None:
+        return plan
+    # 表令牌（或旧的已物化结果），固定为快照后只读取表头用于规划
+    snapshot = await cache_snapshot_async(token, PLAN_SOURCE_PREFIX, PLAN_EXPIRE_TIME)
+    if snapshot is None:
+        return None
+    source, df = snapshot
+    return {"source": source, "source_columns": list(df.columns), "columns": list(df.columns), "steps": []}
+
+
+def add_step(plan: dict, step: dict) -> dict:
+    """
+    在查询计划末尾追加一个步骤，并推导该步骤输出的列名
+
+    Args:
+        plan: 输入的查询计划
+        step: 要追加的步骤
+
+    Returns:
+        dict: 新的查询计划（不修改输入计划）
+
+    Raises:
+        PlanError: 步骤引用的列不存在，无法生成有效结果时抛出
+    """
+    columns = list(plan["columns"])
+    op = step["op"]
+    if op == "project":
+        # 仅保留存在的列
+        columns = [col for col in step["columns"] if col in columns]
+        if not columns:
+            raise PlanError("没有可保留的列")
+        step = {**step, "columns": columns}
+    elif op == "aggregate":
+        if step["group_column"] == step["agg_column"] or step["group_column"] not in columns \
+                or step["agg_column"] not in columns \
+                or step["agg_function"] not in ("sum", "mean", "count", "min", "max"):
+            raise PlanError("分组聚合失败")
+        columns = [step["group_column"], step["agg_column"]]
+    elif op == "operation":
+        new_column = f"{step['col1']}{step['operation']}{step['col2']}"
+        if step["col1"] in columns and step["col2"] in columns \
+                and step["operation"] in ("+", "-", "*", "/") and new_column not in columns:
+            columns.append(new_column)
+    elif op == "ratio":
+        new_column = f"{step['target_column']}_占比"
+        if step["target_column"] in columns and new_column not in columns:
+            columns.append(new_column)
+    elif op == "merge":
+        right_columns = step["right"]["columns"]
+        if step["key_left"] not in columns or step["key_right"] not in right_columns:
+            raise PlanError("关联键不存在")
+        columns = _merge_columns(columns, right_columns, step["key_left"], step["key_right"])
+    # 排序不改变列
+    return {
+        **plan,
+        "columns": columns,
+        "steps": plan["steps"] + [{**step, "columns": columns}],
+    }
+
+
+async def save_plan_async(token: str, plan: dict) -> bool:
+    """
+    保存查询计划，并刷新计划引用的源表过期时间
+
+    Args:
+        token: 结果令牌
+        plan: 查询计划
+
+    Returns:
+        bool: 保存成功返回True，失败返回False
+    """
+    # 之前物化过的同名结果已失效
+    local_cache_invalidate(token)
+    saved = await cache_save_async(PLAN_PREFIX + token, json.dumps(plan, ensure_ascii=False), PLAN_EXPIRE_TIME)
+    if saved:
+        # 源表与计划同时过期，避免计划还在而源表已被清理
+        await cache_expire_many_async(_plan_sources(plan), PLAN_EXPIRE_TIME)
+    return saved
+
+
+async def materialize_async(token: str) -> Optional[pd.DataFrame]:
+    """
+    获取令牌对应的具体数据：结果令牌按查询计划计算，表令牌直接读取缓存
+
+    计算结果只放入进程内缓存，不写回Redis。
+
+    Args:
+        token: 表令牌或结果令牌
+
+    Returns:
+        pd.DataFrame: 数据表，数据不存在（或源表已过期）时返回None
+
+    Raises:
+        PlanError: 查询计划执行失败时抛出
+    """
+    # 进程内缓存命中（表令牌或已物化的结果）
+    df = local_cache_get(token)
+    if df is not None:
+        return df
+    plan = await load_plan_async(token)
+    if plan is None:
+        # 旧的已物化结果
+        return await cache_load_df_async(token)
+
+    # 一次往返读取计划用到的所有源表
+    sources = _plan_sources(plan)
+    frames = await cache_load_df_many_async(sources)
+    if any(frame is None for frame in frames):
+        return None
+    # 在线程池中执行Pandas计算，避免阻塞事件循环
+    df = await asyncio.to_thread(_execute, optimize(plan), dict(zip(sources, frames)))
+    local_cache_put(token, df, PLAN_EXPIRE_TIME)
+    return df
+
+
+def optimize(plan: dict, needed: Optional[set] = None) -> dict:
+    """
+    优化查询计划：把列裁剪下推到读取源表和合并之前，并去掉无效的排序和运算
+
+    Args:
+        plan: 查询计划
+        needed: 下游需要的列名，None表示全部列
+
+    Returns:
+        dict: 优化后的查询计划，"scan_columns"为读取源表后保留的列
+    """
+    steps = plan["steps"]
+    optimized = []
+    # 从最后一步向前推导每一步需要的输入列
+    for index in range(len(steps) - 1, -1, -1):
+        step = steps[index]
+        input_columns = steps[index - 1]["columns"] if index > 0 else None
+        op = step["op"]
+        if op == "project":
+            needed = set(step["columns"]) if needed is None else needed & set(step["columns"])
+        elif op == "sort":
+            # 紧接着分组聚合的排序不影响结果
+            if optimized and optimized[0]["op"] == "aggregate":
+                continue
+            if needed is not None:
+                needed = needed | {step["column"]}
+        elif op == "aggregate":
+            needed = {step["group_column"], step["agg_column"]}
+        elif op == "operation":
+            if needed is not None:
+                new_column = f"{step['col1']}{step['operation']}{step['col2']}"
+                # 下游用不到的新列不需要计算
+                if new_column not in needed:
+                    continue
+                needed = (needed - {new_column}) | {step["col1"], step["col2"]}
+        elif op == "ratio":
+            if needed is not None:
+                new_column = f"{step['target_column']}_占比"
+                # 下游用不到的新列不需要计算
+                if new_column not in needed:
+                    continue
+                needed = (needed - {new_column}) | {step["target_column"]}
+        elif op == "merge":
+            left_columns = input_columns if input_columns is not None else plan["source_columns"]
+            left_needed, right_needed = _split_merge_needed(
+                needed, left_columns, step["right"]["columns"], step["key_left"], step["key_right"])
+            step = {**step, "right": optimize(step["right"], right_needed),
+                    "left_columns": [col for col in left_columns if left_needed is None or col in left_needed]}
+            needed = left_needed
+        optimized.insert(0, step)
+
+    scan_columns = None
+    if needed is not None:
+        scan_columns = [col for col in plan["source_columns"] if col in needed]
+    return {**plan, "steps": optimized, "scan_columns": scan_columns}
+
+
+def _execute(plan: dict, frames: dict) -> pd.DataFrame:
+    """
+    执行优化后的查询计划（私有方法）
+
+    Args:
+        plan: 优化后的查询计划
+        frames: 源表令牌到DataFrame的字典
+
+    Returns:
+        pd.DataFrame: 计算结果
+
+    Raises:
+        PlanError: 步骤执行失败时抛出
+    """
+    df = frames[plan["source"]]
+    if plan.get("scan_columns") is not None:
+        # 读取源表后立即裁剪不需要的列
+        df = df[_require_columns(df, plan["scan_columns"])]
+    else:
+        df = df.copy()
+    for step in plan["steps"]:
+        op = step["op"]
+        if op == "project":
+            df = df[[col for col in step["columns"] if col in df.columns]]
+        elif op == "sort":
+            df = tool.sort_data(df, step["column"], step["ascending"])
+        elif op == "aggregate":
+            df = tool.group_and_aggregate(df, step["group_column"], step["agg_column"], step["agg_function"])
+            if df is None:
+                raise PlanError("分组聚合失败")
+        elif op == "operation":
+            df = tool.calculate_columns_operation(df.copy(), step["col1"], step["col2"], step["operation"])
+        elif op == "ratio":
+            df = tool.calculate_ratio(df.copy(), step["target_column"])
+        elif op == "merge":
+            left = df[_require_columns(df, step["left_columns"])]
+            right = _execute(step["right"], frames)
+            # 使用左连接保留主表数据
+            df = pd.merge(left, right, left_on=step["key_left"], right_on=step["key_right"], how='left')
+            if df.empty:
+                raise PlanError("没有数据，请尝试其他接口")
+    return df
+
+
+def _require_columns(df: pd.DataFrame, columns: list) -> list:
+    """
+    检查计划需要的列都在数据中，缺少时抛出PlanError（私有方法）
+    """
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise PlanError(f"源表缺少列: {'、'.join(missing)}，请重新取数")
+    return columns
+
+
+def _merge_columns(left_columns: list, right_columns: list, key_left: str, key_right: str) -> list:
+    """
+    推导左连接后的列名，与pd.merge的重名列后缀规则一致（私有方法）
+    """
+    same_key = key_left == key_right
+    overlap = set(left_columns) & set(right_columns)
+    if same_key:
+        overlap.discard(key_left)
+    columns = [f"{col}_x" if col in overlap else col for col in left_columns]
+    for col in right_columns:
+        if same_key and col == key_right:
+            continue
+        columns.append(f"{col}_y" if col in overlap else col)
+    return columns
+
+
+def _split_merge_needed(needed: Optional[set], left_columns: list, right_columns: list,
+                        key_left: str, key_right: str) -> tuple:
+    """
+    把合并结果需要的列拆分为主表和从表需要的列（私有方法）
+
+    重名列两边要么同时保留要么同时裁剪，保证合并后的列名后缀不变。
+    """
+    if needed is None:
+        return None, None
+    overlap = set(left_columns) & set(right_columns)
+    if key_left == key_right:
+        overlap.discard(key_left)
+    left_needed, right_needed = {key_left}, {key_right}
+    for col in overlap:
+        if f"{col}_x" in needed or f"{col}_y" in needed:
+            left_needed.add(col)
+            right_needed.add(col)
+    left_needed |= {col for col in left_columns if col not in overlap and col in needed}
+    right_needed |= {col for col in right_columns if col not in overlap and col in needed}
+    return left_needed, right_needed
+
+
+def _plan_sources(plan: dict) -> list:
+    """
+    计划引用的所有源表令牌（私有方法）
+    """
+    sources = [plan["source"]]
+    for step in plan["steps"]:
+        if step["op"] == "merge":
+            sources += [token for token in _plan_sources(step["right"]) if token not in sources]
+    return sources
@@ -0,0 +1,112 @@
+import os  # 导入操作系统模块
+from collections import deque  # 导入双端队列
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 每对表预先计算的最短路径条数（两个方向合计）
+RELATION_PATH_K = int(os.getenv("RELATION_PATH_K", "20"))
+# 路径最多经过的表数，与原先的搜索深度一致
+RELATION_PATH_MAX_DEPTH = int(os.getenv("RELATION_PATH_MAX_DEPTH", "12"))
+# 每个起点最多展开的路径数，防止环路较多时搜索爆炸
+RELATION_PATH_MAX_EXPANSIONS = int(os.getenv("RELATION_PATH_MAX_EXPANSIONS", "200000"))
+
+
+class RelationIndex:
+    """
+    表关系路径索引
+
+    构建时从每张表出发，在有向关系图上做一次BFS，按长度从短到长枚举简单路径，
+    每个终点保留最短的K条。一对表之间方向一致的路径，就是正向路径(A->...->B)
+    加上反向路径(B->...->A 倒序)，合并后按长度排序存入字典，查询时直接取出。
+    路径中的表用整数编号保存，BFS时用整数位图判断表是否已在路径中。
+    """
+
+    def __init__(self, attr_map: dict, table_map: dict, adj: dict, directed_edges: set,
+                 k: int = None, max_depth: int = None, max_expansions: int = None):
+        """
+        构建索引
+
+        Args:
+            attr_map: 属性名 -> 表名(mainTabClazz)
+            table_map: 表名 -> 中文表名
+            adj: 无向邻接表（保持mcp_relation.json中的顺序）
+            directed_edges: 有向边集合 {(s, t)}
+            k: 每对表保留的路径条数，默认RELATION_PATH_K
+            max_depth: 路径最多经过的表数，默认RELATION_PATH_MAX_DEPTH
+            max_expansions: 每个起点最多展开的路径数，默认RELATION_PATH_MAX_EXPANSIONS
+        """
+        self.attr_map = attr_map
+        self.table_map = table_map
+        self.k = k or RELATION_PATH_K
+        self.max_depth = max_depth or RELATION_PATH_MAX_DEPTH
+        self.max_expansions = max_expansions or RELATION_PATH_MAX_EXPANSIONS
+
+        # 表名编号
+        self.nodes = list(adj.keys())
+        self._ids = {name: i for i, name in enumerate(self.nodes)}
+        # 有向邻接表，邻居顺序与原邻接表一致
+        self._succ = [
+            [self._ids[v] for v in adj[u] if (u, v) in directed_edges]
+            for u in self.nodes
+        ]
+
+        forward = {}
+        for source in range(len(self.nodes)):
+            self._search(source, forward)
+
+        # (起点编号, 终点编号) -> 方向一致的路径元组
+        self._paths = {}
+        for s, t in set(forward) | {(t, s) for s, t in forward}:
+            # 两表之间有双向边时，正反向会得到同一条路径，去重
+            merged = list(dict.fromkeys(forward.get((s, t), []) + [path[::-1] for path in forward.get((t, s), [])]))
+            # 稳定排序：同样长度时正向路径在前
+            merged.sort(key=len)
+            self._paths[(s, t)] = tuple(merged[:self.k])
+
+    def _search(self, source: int, forward: dict):
+        """
+        从起点出发按长度枚举有向简单路径，记录到每个终点的前K条（私有方法）
+        """
+        queue = deque([(source, (source,), 1 << source)])
+        expansions = 0
+        while queue and expansions < self.max_expansions:
+            node, path, mask = queue.popleft()
+            expansions += 1
+            if node != source:
+                paths = forward.setdefault((source, node), [])
+                if len(paths) < self.k:
+                    paths.append(path)
+            if len(path) >= self.max_depth:
+                continue
+            for neighbor in self._succ[node]:
+                if not mask >> neighbor & 1:
+                    queue.append((neighbor, path + (neighbor,), mask | 1 << neighbor))
+
+    def paths(self, start: str, end: str) -> list:
+        """
+        查询两张表之间方向一致的路径，按长度从短到长
+
+        Args:
+            start: 起点表名
+            end: 终点表名
+
+        Returns:
+            list: 路径列表，每条路径为表名列表；没有路径时返回空列表
+        """
+        pair = (self._ids.get(start), self._ids.get(end))
+        return [[self.nodes[i] for i in path] for path in self._paths.get(pair, ())]
+
+    def stats(self) -> dict:
+        """
+        索引规模统计
+
+        Returns:
+            dict: 表数、有路径的表对数、路径总数
+        """
+        return {
+            "tables": len(self.nodes),
+            "pairs": len(self._paths),
+            "paths": sum(len(paths) for paths in self._paths.values()),
+        }
@@ -0,0 +1,199 @@
+import os  # 导入操作系统模块
+import json  # 导入JSON模块
+import time  # 导入时间模块
+import threading  # 导入线程模块
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 项目根目录
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATAWORK_DIR = os.path.join(BASE_DIR, "datawork")
+SCHEME_DIR = os.path.join(BASE_DIR, "scheme")
+# 检查文件是否变化的最短间隔（秒），间隔内的查询直接读内存
+SCHEME_POLL_INTERVAL = float(os.getenv("SCHEME_POLL_INTERVAL", "5"))
+
+
+class SchemeRegistry:
+    """
+    表结构元数据注册表
+
+    把目录下所有JSON表结构一次读入内存，按文件名、mainTabClazz和属性名建立索引。
+    查询时最多每隔poll_interval秒检查一次文件的修改时间和大小，有变化才重新加载，
+    其余查询不访问磁盘。返回的对象是共享的，调用方不要修改。
+    """
+
+    def __init__(self, root_dir: str, poll_interval: float = None):
+        """
+        Args:
+            root_dir: 表结构目录
+            poll_interval: 检查文件变化的最短间隔（秒），默认SCHEME_POLL_INTERVAL
+        """
+        self.root_dir = root_dir
+        self.poll_interval = SCHEME_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.version = 0  # 每次重新加载加1，依赖元数据的索引据此判断是否需要重建
+        self._lock = threading.Lock()
+        self._checked = None  # 上次检查时间
+        self._signature = None  # 上次加载时的文件签名
+        self._files = {}  # 文件名 -> 文件路径（重名取遍历到的第一个）
+        self._contents = {}  # 文件名 -> 解析后的JSON
+        self._errors = {}  # 文件名 -> 解析失败的原因
+        self._structure = {}  # 相对目录 -> 文件名列表（不含扩展名）
+        self._attr_map = {}  # 属性名 -> mainTabClazz
+        self._table_map = {}  # mainTabClazz -> 表名
+
+    def _walk(self):
+        """
+        按os.walk顺序遍历目录下的JSON文件（私有方法）
+
+        Yields:
+            tuple: (相对目录, 文件名, 文件路径)
+        """
+        for root, dirs, files in os.walk(self.root_dir):
+            # 获取相对于根目录的路径，统一使用'/'分隔，根目录记为'/'
+            relative_dir = os.path.relpath(root, self.root_dir)
+            if os.sep != '/':
+                relative_dir = relative_dir.replace(os.sep, '/')
+            if relative_dir == '.':
+                relative_dir = '/'
+            for file in files:
+                if file.endswith(".json"):
+                    yield relative_dir, file, os.path.join(root, file)
+
+    def _current_signature(self) -> tuple:
+        """
+        当前所有JSON文件的路径、修改时间和大小（私有方法）
+        """
+        signature = []
+        for _, _, path in self._walk():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load(self, signature: tuple):
+        """
+        重新读取所有JSON文件并建立索引（私有方法）
+        """
+        files, contents, errors, structure = {}, {}, {}, {}
+        attr_map, table_map = {}, {}
+        for relative_dir, file, path in self._walk():
+            structure.setdefault(relative_dir, []).append(os.path.splitext(file)[0])
+            first = file not in files
+            if first:
+                files[file] = path
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                if first:
+                    errors[file] = str(e)
+                continue
+            if first:
+                contents[file] = data
+            if not isinstance(data, dict):
+                continue
+            main_tab = data.get('mainTabClazz')
+            if main_tab:
+                table_map[main_tab] = data.get('table_name', main_tab)
+                # 映射属性名到mainTabClazz
+                for attr in data.get('response', {}).keys():
+                    attr_map[attr] = main_tab
+        self._files, self._contents, self._errors, self._structure = files, contents, errors, structure
+        self._attr_map, self._table_map = attr_map, table_map
+        self._signature = signature
+        self.version += 1
+        print(f"表结构已加载: {self.root_dir}, {len(files)} 个文件")
+
+    def refresh(self, force: bool = False):
+        """
+        文件有变化时重新加载，距上次检查不足poll_interval秒时跳过检查
+
+        Args:
+            force: 为True时立即检查
+        """
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.poll_interval:
+            return
+        with self._lock:
+            if not force and self._checked is not None and now - self._checked < self.poll_interval:
+                return
+            signature = self._current_signature()
+            if signature != self._signature:
+                self._load(signature)
+            self._checked = time.monotonic()
+
+    def get_content(self, filename: str):
+        """
+        按文件名获取表结构
+
+        Args:
+            filename: 文件名（含.json扩展名）
+
+        Returns:
+            dict: 解析后的JSON，文件不存在时返回None
+
+        Raises:
+            ValueError: 文件存在但解析失败时抛出
+        """
+        self.refresh()
+        if filename in self._errors:
+            raise ValueError(self._errors[filename])
+        return self._contents.get(filename)
+
+    def structure(self) -> dict:
+        """
+        获取目录结构
+
+        Returns:
+            dict: 相对目录 -> 文件名列表（不含扩展名），只包含有JSON文件的目录
+        """
+        self.refresh()
+        return self._structure
+
+    def attr_map(self) -> dict:
+        """
+        获取属性名到mainTabClazz的映射
+        """
+        self.refresh()
+        return self._attr_map
+
+    def table_map(self) -> dict:
+        """
+        获取mainTabClazz到表名的映射
+        """
+        self.refresh()
+        return self._table_map
+
+
+# 进程内共享的注册表
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def _get_registry(root_dir: str) -> SchemeRegistry:
+    """
+    获取目录对应的共享注册表，不存在时创建（私有方法）
+    """
+    registry = _registries.get(root_dir)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(root_dir, SchemeRegistry(root_dir))
+    return registry
+
+
+def get_datawork_registry() -> SchemeRegistry:
+    """
+    获取datawork目录的表结构注册表
+    """
+    return _get_registry(DATAWORK_DIR)
+
+
+def get_scheme_registry() -> SchemeRegistry:
+    """
+    获取scheme目录的表结构注册表
+    """
+    return _get_registry(SCHEME_DIR)
@@ -13,6 +13,7 @@ import base64  # 导入base64模块
 from urllib.parse import urlparse, unquote
 from pathlib import PurePosixPath
 import requests
+from services.token_cache import invalidate_token  # 导入token缓存失效
 # 加载环境变量
 load_dotenv()
 
@@ -310,6 +311,8 @@ class SupabaseManager:
                 "token": new_token,
                 "expire": expire_time
             }).eq("id", user_id).execute()
+            # 旧token已被覆盖，删除其验证缓存
+            invalidate_token(result.data[0].get("token"))
 
             return new_token
         except Exception as e:
@@ -334,37 +337,56 @@ class SupabaseManager:
                     "token": None,
                     "expire": None
                 }).eq("id", user_id).execute()
+                # 删除token的验证缓存
+                invalidate_token(token)
                 return True
             else:
                 return False
         except Exception as e:
             return False
 
-    def verify_token(self, token: str):
+    def verify_token(self, token: str, raise_errors: bool = False):
         """
         验证token是否有效
+
+        Args:
+            token: 访问令牌
+            raise_errors: 连接或查询失败时是否抛出异常；默认返回(False, None)，与token不存在时相同
+
+        Returns:
+            tuple: (是否有效, 用户信息)
         """
         if not self.client:
             if not self.connect():
+                if raise_errors:
+                    raise ConnectionError("Supabase连接失败")
                 return False, None
 
         try:
-            user = self.get_user(token)
+            user = self.get_user(token, raise_errors=raise_errors)
             if user:
                 return user["expire"] > datetime.now().isoformat(), user
             else:
                 return False, None
         except Exception as e:
+            if raise_errors:
+                raise
             return False, None
 
-    def get_user(self, token: str) -> Dict[str, Any]:
+    def get_user(self, token: str, raise_errors: bool = False) -> Dict[str, Any]:
         """
         获取用户信息
+
+        Args:
+            token: 访问令牌
+            raise_errors: 连接或查询失败时是否抛出异常；默认返回None
         """
         if token is None or token == "" or token == "null":
             return None
         if not self.client:
             if not self.connect():
+                if raise_errors:
+                    raise ConnectionError("Supabase连接失败")
                 return None
         try:
             result = self.client.table(self.user_table).select(
@@ -374,6 +396,8 @@ class SupabaseManager:
             else:
                 return None
         except Exception as e:
+            if raise_errors:
+                raise
             return None
 
     # ==================== 文件库方法 ====================
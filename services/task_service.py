@@ -2,7 +2,8 @@ from fastmcp import FastMCP  # 导入FastMCP框架
 from dotenv import load_dotenv  # 导入环境变量加载器
 import os  # 导入操作系统模块
 import requests  # 导入HTTP请求库
-from services.tool import json_to_csv, get_csv_header, clear_data, get_ids, append_data  # 导入JSON转换CSV函数
+import services.http_client as http_client  # 导入上游HTTP客户端
+from services.tool import json_to_df, get_csv_header, clear_data, get_ids, append_data  # 导入JSON转换DataFrame函数
 from services.cache import cache_save
 
 # 加载环境变量
@@ -62,8 +63,8 @@ def find_schedule(access_token: str, plan_type: str = "瓦楞",
         }
 
         # 发送HTTP POST请求
-        response = requests.post(
-            url, params=params, json=payload, headers=headers, timeout=30)  # 发送POST请求并设置超时时间和请求头
+        response = http_client.post(
+            url, params=params, json=payload, headers=headers)  # 通过共享长连接会话发送POST请求
         response.raise_for_status()  # 检查HTTP响应状态
 
         # 解析响应数据
@@ -170,13 +171,13 @@ def find_schedule(access_token: str, plan_type: str = "瓦楞",
                         "previousProcessPlannedEndTime": "上工序计划完成时间"
                     }
 
-                    # 将数据转换为CSV格式
-                    csv_str = json_to_csv(all_records, column_mapping)
+                    # 将数据转换为DataFrame
+                    df = json_to_df(all_records, column_mapping)
 
                     # 保存到缓存
-                    if csv_str:
+                    if df is not None:
                         key = f"任务表_{access_token}"
-                        cache_save(key, csv_str)  # 保存CSV数据到缓存
+                        cache_save(key, df)  # 保存到缓存（列式二进制）
                         #header = get_csv_header(csv_str)  # 获取列名列表
                         return key  # 返回列名列表
                     return "没有数据"  # 转换失败返回提示信息
@@ -303,11 +304,11 @@ def find_progress(access_token: str, start_time: str = "", end_time: str = "",
         "frontPrdSalSituation": "成品销货情况"
     }
 
-    csv_str = json_to_csv(interface1_data, mapping)  # 转换为CSV格式
+    df = json_to_df(interface1_data, mapping)  # 转换为DataFrame
 
-    if csv_str:  
+    if df is not None:  
         key = f"任务进度表_{access_token}"  # 如果转换成功
-        cache_save(key, csv_str)  # 保存到缓存  
+        cache_save(key, df)  # 保存到缓存（列式二进制）
         #header = get_csv_header(csv_str)  # 获取CSV头部
         return key  # 返回列名清单
     return "没有数据"  # 没有数据时返回提示
@@ -361,7 +362,7 @@ def call_interface2(access_token: str, work_order_ids: list):
 
     try:
         # 发送POST请求
-        response = requests.post(
+        response = http_client.post(
             url, params=params, json=payload, headers=headers)
         response.raise_for_status()  # 检查HTTP错误
 
@@ -417,7 +418,7 @@ def call_interface6(access_token: str, customer_ids: list):
 
     try:
         # 发送POST请求
-        response = requests.post(
+        response = http_client.post(
             url, params=params, json=payload, headers=headers)
         response.raise_for_status()  # 检查HTTP错误
 
@@ -508,7 +509,7 @@ def call_interface4(access_token: str, biz_order_detail_ids: list):
 
     try:
         # 发送POST请求
-        response = requests.post(
+        response = http_client.post(
             url, params=params, json=payload, headers=headers)
         response.raise_for_status()  # 检查HTTP错误
 
@@ -595,8 +596,8 @@ def call_interface1(access_token: str, product_name: str = "", start_time: str =
         }
 
         # 发送HTTP POST请求
-        response = requests.post(
-            url, params=params, json=payload, headers=headers, timeout=30)
+        response = http_client.post(
+            url, params=params, json=payload, headers=headers)
         response.raise_for_status()  # 检查HTTP响应状态
 
         # 解析响应数据
@@ -0,0 +1,228 @@
+import os  # 导入操作系统模块
+import json  # 导入JSON模块
+import time  # 导入时间模块
+import asyncio  # 导入异步IO模块
+import hashlib  # 导入哈希模块
+import threading  # 导入线程模块
+from collections import OrderedDict  # 导入有序字典，用于LRU
+from datetime import datetime  # 导入日期时间模块
+from dotenv import load_dotenv  # 导入环境变量加载器
+
+# 加载环境变量
+load_dotenv()  # 加载.env文件中的环境变量
+
+# 有效token的最长缓存时间（秒），实际不超过token的剩余有效期
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+# 进程内缓存有效token的最长时间（秒），其他进程退出登录后最多延迟这么久失效
+TOKEN_CACHE_LOCAL_TTL = float(os.getenv("TOKEN_CACHE_LOCAL_TTL", "30"))
+# 无效token的缓存时间（秒）
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", "5"))
+# 进程内缓存的最大条数
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# 是否使用Redis共享缓存（多个工作进程共用验证结果）
+TOKEN_CACHE_REDIS = os.getenv("TOKEN_CACHE_REDIS", "true").lower() == "true"
+# Redis键前缀
+TOKEN_CACHE_PREFIX = os.getenv("TOKEN_CACHE_PREFIX", "auth:token:")
+# Redis出错后暂停使用的时间（秒），期间只用进程内缓存
+TOKEN_CACHE_REDIS_RETRY_AFTER = float(os.getenv("TOKEN_CACHE_REDIS_RETRY_AFTER", "30"))
+# 不缓存、也不返回给接口的用户字段：字段名（小写）包含其中任一关键字即去掉，逗号分隔
+TOKEN_CACHE_SENSITIVE_FIELDS = [name.strip().lower() for name in
+                                os.getenv("TOKEN_CACHE_SENSITIVE_FIELDS", "token,password,passwd,secret,salt,hash").split(",") if name.strip()]
+
+# 进程内缓存：token哈希 -> (过期时间戳, 是否有效, 用户信息)
+_local = OrderedDict()
+_local_lock = threading.Lock()
+_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+# Redis不可用时记录恢复时间
+_redis_paused_until = 0.0
+
+
+def _key(token: str) -> str:
+    """
+    token的哈希值，缓存中不保存明文token（私有方法）
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _public_user(user):
+    """
+    去掉token、密码等凭据字段后的用户信息，缓存和接口只使用这部分（私有方法）
+    """
+    if not isinstance(user, dict):
+        return user
+    return {field: value for field, value in user.items()
+            if not any(name in str(field).lower() for name in TOKEN_CACHE_SENSITIVE_FIELDS)}
+
+
+def _remaining_seconds(user: dict) -> float:
+    """
+    token的剩余有效期（秒），无法解析时返回0（私有方法）
+    """
+    try:
+        expire = datetime.fromisoformat(str(user["expire"]))
+    except Exception:
+        return 0.0
+    now = datetime.now(expire.tzinfo) if expire.tzinfo else datetime.now()
+    return (expire - now).total_seconds()
+
+
+def _redis_available() -> bool:
+    """
+    是否使用Redis缓存（私有方法）
+    """
+    return TOKEN_CACHE_REDIS and time.monotonic() >= _redis_paused_until
+
+
+def _pause_redis(e: Exception):
+    """
+    Redis出错时暂停使用一段时间，避免每个请求都等待超时（私有方法）
+    """
+    global _redis_paused_until
+    _redis_paused_until = time.monotonic() + TOKEN_CACHE_REDIS_RETRY_AFTER
+    print(f"token缓存访问Redis失败，{TOKEN_CACHE_REDIS_RETRY_AFTER:.0f}秒内只使用进程内缓存: {e}")
+
+
+def _local_get(key: str):
+    """
+    读取进程内缓存，过期则删除（私有方法）
+    """
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            _local.pop(key)
+            return None
+        _local.move_to_end(key)
+        return entry[1], entry[2]
+
+
+def _local_put(key: str, is_valid: bool, user, ttl: float):
+    """
+    写入进程内缓存，超过最大条数时按LRU淘汰（私有方法）
+    """
+    with _local_lock:
+        _local[key] = (time.monotonic() + ttl, is_valid, user)
+        _local.move_to_end(key)
+        while len(_local) > TOKEN_CACHE_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+async def _redis_get(key: str):
+    """
+    读取Redis缓存（私有方法）
+    """
+    if not _redis_available():
+        return None
+    try:
+        from services.cache import _get_async_redis_client
+        cached = await _get_async_redis_client().get(TOKEN_CACHE_PREFIX + key)
+    except Exception as e:
+        _pause_redis(e)
+        return None
+    if cached is None:
+        return None
+    entry = json.loads(cached)
+    return entry["valid"], _public_user(entry["user"])
+
+
+async def _redis_put(key: str, is_valid: bool, user, ttl: float):
+    """
+    写入Redis缓存（私有方法）
+    """
+    if not _redis_available():
+        return
+    try:
+        from services.cache import _get_async_redis_client
+        payload = json.dumps({"valid": is_valid, "user": user}, ensure_ascii=False, default=str)
+        await _get_async_redis_client().set(TOKEN_CACHE_PREFIX + key, payload, px=max(int(ttl * 1000), 1))
+    except Exception as e:
+        _pause_redis(e)
+
+
+async def verify_token_cached(supabase, token: str):
+    """
+    带缓存的token验证，与SupabaseManager.verify_token的返回值一致
+
+    先查进程内缓存，再查Redis，都未命中时在线程中调用verify_token（不阻塞事件循环）并写入缓存。
+    有效token的缓存时间不超过token的剩余有效期；token不存在或已过期时缓存TOKEN_CACHE_NEGATIVE_TTL秒，
+    数据库连接或查询失败时不缓存。用户信息中的token、密码等凭据字段不缓存也不返回。
+
+    Args:
+        supabase: SupabaseManager实例
+        token: 访问令牌
+
+    Returns:
+        tuple: (是否有效, 用户信息（不含凭据字段）)
+    """
+    key = _key(token)
+    cached = _local_get(key)
+    if cached is not None:
+        _stats["local_hits"] += 1
+        return cached
+
+    cached = await _redis_get(key)
+    if cached is not None:
+        is_valid, user = cached
+        # Redis中的有效token可能在写入后才接近过期，重新按剩余有效期计算
+        ttl = min(_remaining_seconds(user), TOKEN_CACHE_LOCAL_TTL) if is_valid else TOKEN_CACHE_NEGATIVE_TTL
+        if ttl > 0:
+            _stats["redis_hits"] += 1
+            _local_put(key, is_valid, user, ttl)
+            return is_valid, user
+
+    _stats["misses"] += 1
+    try:
+        is_valid, user = await asyncio.to_thread(supabase.verify_token, token, raise_errors=True)
+    except Exception as e:
+        # 数据库暂时不可用时不能判断token无效，不写入缓存，下次请求重新验证
+        print(f"token验证失败，不缓存结果: {e}")
+        return False, None
+    user = _public_user(user)
+    if is_valid:
+        remaining = _remaining_seconds(user)
+        local_ttl, shared_ttl = min(remaining, TOKEN_CACHE_LOCAL_TTL), min(remaining, TOKEN_CACHE_TTL)
+    else:
+        local_ttl = shared_ttl = TOKEN_CACHE_NEGATIVE_TTL
+    if local_ttl > 0:
+        _local_put(key, is_valid, user, local_ttl)
+    if shared_ttl > 0:
+        await _redis_put(key, is_valid, user, shared_ttl)
+    return is_valid, user
+
+
+def invalidate_token(token: str):
+    """
+    删除token的缓存（退出登录或重新登录后调用）
+
+    Args:
+        token: 访问令牌
+    """
+    if not token:
+        return
+    key = _key(token)
+    with _local_lock:
+        _local.pop(key, None)
+    if not _redis_available():
+        return
+    try:
+        from services.cache import _get_redis_client
+        _get_redis_client().delete(TOKEN_CACHE_PREFIX + key)
+    except Exception as e:
+        _pause_redis(e)
+
+
+def token_cache_stats() -> dict:
+    """
+    token缓存统计
+
+    Returns:
+        dict: 进程内命中数、Redis命中数、未命中数、命中率和进程内条数
+    """
+    hits = _stats["local_hits"] + _stats["redis_hits"]
+    total = hits + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "entries": len(_local),
+    }
@@ -9,26 +9,33 @@ import os  # 导入操作系统模块
 from qiniu import Auth, put_file, put_data  # 导入七牛云SDK
 import base64  # 导入base64模块
 from services.supabase_manager import SupabaseManager  
-from services.neo4j_service import find_nodes_by_time_range  
+from services.neo4j_service import iter_nodes_by_time_range  # 导入Neo4j分页查询
 import requests  # 导入requests模块用于HTTP请求
+import services.http_client as http_client  # 导入上游HTTP客户端
 import json  # 导入json模块用于处理JSON数据
 from services.cache import cache_save  # 导入缓存服务
+from services.projector import get_projector  # 导入字段投影器
 from dotenv import load_dotenv  # 从dotenv模块导入load_dotenv函数用于加载环境变量
 # 加载环境变量
 load_dotenv()  # 加载.env文件中的环境变量
 
 # 从环境变量获取配置
 BASE_URL = os.getenv("BASE_URL", "http://192.168.0.156:28002")  # 获取基础URL
+# 列表接口分页配置，每页条数为0时不分页
+ERP_PAGE_SIZE = int(os.getenv("ERP_PAGE_SIZE", "0"))  # 每页条数
+ERP_PAGE_NO_FIELD = os.getenv("ERP_PAGE_NO_FIELD", "pageNum")  # 请求体中的页码字段
+ERP_PAGE_SIZE_FIELD = os.getenv("ERP_PAGE_SIZE_FIELD", "pageSize")  # 请求体中的每页条数字段
+ERP_MAX_PAGES = int(os.getenv("ERP_MAX_PAGES", "1000"))  # 最多请求的页数
 
 
 def get_data(url: str, data: dict, access_token: str, params: dict = None,host_name:str = BASE_URL,data_label:str = "data") -> dict:
         url = f"{host_name}{url}?access_token={access_token}"
         print(url)
-        # 发送POST请求
+        # 通过共享长连接会话发送POST请求
         if params:
-            response = requests.post(url, params=params, json=data)
+            response = http_client.post(url, params=params, json=data)
         else:
-            response = requests.post(url, json=data)
+            response = http_client.post(url, json=data)
             
         response.raise_for_status()  # 检查请求是否成功
         
@@ -44,10 +51,50 @@ def get_data(url: str, data: dict, access_token: str, params: dict = None,host_n
         return data_list
 
 
-def fetch_data(api_name:str, url: str, data: dict, access_token: str, filtered_fields:dict, meaning_dict: dict = None, debug_mode: bool = False, params: dict = None,host_name:str = BASE_URL,data_label:str = "data") -> dict:
+def iter_pages(url: str, data: dict, access_token: str, params: dict = None, host_name: str = BASE_URL,
+               data_label: str = "data", page_size: int = None):
+    """
+    分页请求上游列表接口，逐页返回数据，避免一次性加载整个列表
+
+    page_size为0时不分页，整个列表作为一页返回。上游忽略分页参数（重复返回同一页）时自动停止。
+
+    Args:
+        url: API请求地址
+        data: 请求体数据
+        access_token: 访问令牌
+        params: 请求参数（可选）
+        host_name: 上游地址
+        data_label: 响应中数据列表的字段名
+        page_size: 每页条数，默认ERP_PAGE_SIZE
+
+    Yields:
+        list: 一页数据
+    """
+    page_size = ERP_PAGE_SIZE if page_size is None else page_size
+    if page_size <= 0:
+        page = get_data(url, data, access_token, params, host_name, data_label)
+        if page:
+            yield page
+        return
+    prev_first = None
+    for page_no in range(1, ERP_MAX_PAGES + 1):
+        # 在请求体中加入分页参数
+        body = {**(data or {}), ERP_PAGE_NO_FIELD: page_no, ERP_PAGE_SIZE_FIELD: page_size}
+        page = get_data(url, body, access_token, params, host_name, data_label)
+        if not page or page[0] == prev_first:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        prev_first = page[0]
+
+
+def fetch_data(api_name:str, url: str, data: dict, access_token: str, filtered_fields:dict, meaning_dict: dict = None, debug_mode: bool = False, params: dict = None,host_name:str = BASE_URL,data_label:str = "data", page_size: int = None) -> dict:
     """
     通用工具方法：发送API请求并过滤返回数据中的指定字段
     
+    数据按页拉取，每页由字段投影器直接转换为DataFrame，内存中只保留一页原始数据。
+    
     Args:
         api_name: 别名
         url: API请求地址
@@ -56,90 +103,56 @@ def fetch_data(api_name:str, url: str, data: dict, access_token: str, filtered_f
         filtered_fields: 需要保留的字段列表，可以是字符串列表、字典列表或字典
         meaning_dict_str: 字段含义字典字符串（可选）
         params: 请求参数（可选）
+        page_size: 每页条数（可选），默认ERP_PAGE_SIZE，0表示不分页
         
     Returns:
         dict: 包含过滤后数据的响应对象，数据格式为CSV字符串
     """
     try:
         if url.startswith("/"):
-            data_list = get_data(url, data, access_token, params,host_name,data_label)
+            pages = iter_pages(url, data, access_token, params, host_name, data_label, page_size)
         else:
-            print("find_nodes_by_time_range")
-            data_list = find_nodes_by_time_range(url, data["key"], data["from"], data["to"])
+            print("iter_nodes_by_time_range")
+            pages = iter_nodes_by_time_range(url, data["key"], data["from"], data["to"], page_size)
         
-        if not data_list:
-            return {"error": "没有数据"}
-        print(json.dumps(data_list[0], ensure_ascii=False))
-        # 仅保留指定字段
-        filtered_list = []
-        for item in data_list:
-            filtered_item = {}
-            
-            # 处理不同类型的filtered_fields
-            if isinstance(filtered_fields, dict):
-                # 如果是字典，使用键作为字段名，值可能是字符串或包含name和value映射的字典
-                for field_key, field_config in filtered_fields.items():
-                    if field_key in item:
-                        # 获取原始值
-                        raw_value = item[field_key]
-                        
-                        # 判断配置类型
-                        if isinstance(field_config, dict):
-                            # 如果是字典配置，获取显示的列名
-                            csv_header = field_config.get("name", field_key)
-                            
-                            # 检查是否有值映射配置
-                            if "values" in field_config and isinstance(field_config["values"], dict):
-                                # 尝试进行值映射，将原始值转为字符串后查找，找不到则用原始值
-                                str_val = str(raw_value).lower() # 统一转小写字符串匹配（针对true/false）
-                                # 这里为了兼容性，可以尝试直接匹配或转字符串匹配
-                                mapping = field_config["values"]
-                                # 优先尝试直接匹配，然后尝试字符串匹配
-                                if raw_value in mapping:
-                                    filtered_item[csv_header] = mapping[raw_value]
-                                elif str_val in mapping:
-                                    filtered_item[csv_header] = mapping[str_val]
-                                else:
-                                    filtered_item[csv_header] = raw_value
-                            else:
-                                # 没有映射配置，直接使用原始值
-                                filtered_item[csv_header] = raw_value
-                        else:
-                            # 如果配置只是字符串，直接作为列名
-                            filtered_item[field_config] = raw_value           
-            filtered_list.append(filtered_item)
+        # 按接口缓存的字段投影器，字段配置只解析一次
+        projector = get_projector(url, filtered_fields)
+        # 逐页仅保留指定字段，翻译值并改名
+        frames = []
+        for page in pages:
+            if not frames and page:
+                print(json.dumps(page[0], ensure_ascii=False))
+            frames.append(projector(page))
         
-        # 将结果数组转换为DataFrame，然后使用pd_to_csv方法转换为CSV字符串
-        if not filtered_list:
-            return {"error": "没有数据，请尝试其他参数"}
+        if not frames or sum(len(frame) for frame in frames) == 0:
+            return {"error": "没有数据"}
         
-        # 创建DataFrame
-        df = pd.DataFrame(filtered_list)
+        # 合并各页数据
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        del frames  # 释放分页数据
         df = df.dropna(axis='columns', how='all') # 删除所有值都为空的列  
 
         if df.empty:
             return {"error": "没有数据，请尝试其他接口"}
 
-        # 使用pd_to_csv方法转换为CSV字符串
-        csv_string = pd_to_csv(df)
-        if csv_string:
-            meaning_dict_str = ""        # 替换列名
-            if meaning_dict:
-                meaning_dict = {k: v for k, v in meaning_dict.items() if k in df.columns} # 只保留df中存在的列                
-                meaning_dict_str = json.dumps(meaning_dict, ensure_ascii=False)
-            key = f"{api_name}_{access_token}"
-            if debug_mode:
-                print(f"测试用例: {api_name}")
-                print(f"原始数据: {filtered_list[0]}")
-                print(f"数据条数: {len(filtered_list)}")
-                print("\n".join(csv_string.splitlines()[:5]))
-                return {"table_token": key, "field_meaning": meaning_dict_str, "data": filtered_list} 
-            elif cache_save(key, csv_string): # 缓存数据
-                return {"table_token": key,"field_meaning": meaning_dict_str,} 
-            else:
-                return {"error": "缓存异常，请暂停服务告知用户"}
-        # 返回CSV字符串
-        return {"error": "没有数据，请尝试其他接口"}
+        # 推断数值列类型，缓存以列式二进制保存，不再生成CSV字符串
+        df = infer_column_types(df)
+        meaning_dict_str = ""        # 替换列名
+        if meaning_dict:
+            meaning_dict = {k: v for k, v in meaning_dict.items() if k in df.columns} # 只保留df中存在的列                
+            meaning_dict_str = json.dumps(meaning_dict, ensure_ascii=False)
+        key = f"{api_name}_{access_token}"
+        if debug_mode:
+            filtered_list = df.to_dict("records")
+            print(f"测试用例: {api_name}")
+            print(f"原始数据: {filtered_list[0]}")
+            print(f"数据条数: {len(filtered_list)}")
+            print(pd_to_csv(df.head(4)))
+            return {"table_token": key, "field_meaning": meaning_dict_str, "data": filtered_list} 
+        elif cache_save(key, df): # 缓存数据
+            return {"table_token": key,"field_meaning": meaning_dict_str,} 
+        else:
+            return {"error": "缓存异常，请暂停服务告知用户"}
         
     except requests.exceptions.RequestException as e:
         # 处理请求异常
@@ -309,6 +322,23 @@ def pd_to_csv(df):
     return csv_str
 
 
+def infer_column_types(df):
+    """
+    将DataFrame中可转换为数值的object列转换为数值类型，与CSV解析的类型推断保持一致。
+    Args:
+        df (pd.DataFrame): 要处理的DataFrame。
+    Returns:
+        pd.DataFrame: 转换后的DataFrame。
+    """
+    for column in df.columns:
+        if df[column].dtype == object:
+            try:
+                df[column] = pd.to_numeric(df[column])
+            except (ValueError, TypeError):
+                continue
+    return df
+
+
 def csv_to_pd(csv_str):
     """ 
     将CSV格式字符串转换为DataFrame。
@@ -664,6 +694,51 @@ def transform_json(json_file_path):
         return {}
 
 
+def json_to_df(data_list, column_mapping):
+    """
+    将列表数据转换为DataFrame，使用字典映射列名，去除全空列和重复列（规则与json_to_csv相同）
+
+    缓存保存DataFrame时使用列式二进制格式，不再经过CSV字符串。空值与CSV读回时一致（为空），
+    数值列按CSV解析的方式推断类型。
+
+    Args:
+        data_list (list): 要转换的数据列表
+        column_mapping (dict): 列名映射字典，键为数据中的字段名，值为列名
+
+    Returns:
+        pd.DataFrame: 转换后的数据，没有有效数据时返回None
+    """
+    # 检查输入参数有效性
+    if not data_list or not isinstance(data_list, list):
+        print("数据列表为空或不是列表类型")
+        return None
+    if not column_mapping or not isinstance(column_mapping, dict):
+        print("列名映射字典为空或不是字典类型")
+        return None
+
+    # 去除重复的列名映射，保留第一个
+    unique_mapping = {}
+    for key, value in column_mapping.items():
+        if value not in unique_mapping.values():
+            unique_mapping[key] = value
+
+    # 按列取值，缺失的字段和空字符串都记为空
+    items = [item for item in data_list if isinstance(item, dict)]
+    if not items:
+        print("没有有效数据可转换")
+        return None
+    columns = {}
+    for source_key, column in unique_mapping.items():
+        values = [item.get(source_key) for item in items]
+        # 全为空的列不保留
+        if any(str(value or "").strip() != "" for value in values):
+            columns[column] = [None if value == "" else value for value in values]
+    if not columns:
+        print("没有有效数据可转换")
+        return None
+    return infer_column_types(pd.DataFrame(columns))
+
+
 def json_to_csv(data_list, column_mapping):
     """
     将列表数据转换为CSV格式字符串，使用字典映射列名，去除全空列和重复列